@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from .models import User
+from .revocation import revoke_user_tokens
 
 class UserAdmin(BaseUserAdmin):
     list_display = ('username', 'email', 'first_name', 'last_name', 'is_staff', 'is_active', 'is_frozen')
@@ -13,4 +14,10 @@ class UserAdmin(BaseUserAdmin):
     )
     search_fields = ('username', 'email')
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # 在后台冻结或停用用户时，已签发的令牌立即失效
+        if change and {'is_frozen', 'is_active'} & set(form.changed_data) and (obj.is_frozen or not obj.is_active):
+            revoke_user_tokens(obj)
+
 admin.site.register(User, UserAdmin)
\ No newline at end of file
@@ -0,0 +1,114 @@
+# accounts/authentication.py
+"""
+带进程内用户缓存的 JWT 认证。
+
+simplejwt 的 JWTAuthentication 每个请求都按 user_id 查询一次 User。这里把查到的用户
+在当前进程缓存一小段时间（JWT_USER_CACHE['TTL'] 秒）；用户被保存或删除时
+（如管理员在 UserViewSet 中冻结、停用、修改权限）由信号立即清除本进程的缓存，
+其他进程最多在 TTL 之后看到变化。
+
+冻结状态 (is_frozen) 与 is_active 一样在每个请求上检查，使用缓存中的用户，不增加查询。
+已撤销的令牌（退出登录、冻结后签发时间早于水位线）由 accounts.revocation 的内存列表拒绝。
+认证成功后把用户交给 db_routing，处于读己之写窗口内的用户改用主库。
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from backend_project import db_routing
+from .revocation import revocation_list
+
+DEFAULTS = {
+    'TTL': 30,
+    'MAX_ENTRIES': 10000,
+}
+
+
+def get_settings():
+    return {**DEFAULTS, **getattr(settings, 'JWT_USER_CACHE', {})}
+
+
+class UserCache:
+    """按用户 ID 缓存的 LRU + TTL 字典，线程安全。token 中的 user_id 是字符串，键统一转为 str"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, user_id):
+        user_id = str(user_id)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return user
+
+    def set(self, user_id, user):
+        user_id = str(user_id)
+        options = get_settings()
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + options['TTL'], user)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > options['MAX_ENTRIES']:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None:
+            # 刚写入过数据的用户，本请求剩余的读查询走主库（读己之写）
+            db_routing.identify(result[0])
+        return result
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if revocation_list.is_revoked(validated_token):
+            raise AuthenticationFailed(_('令牌已被撤销。'), code='token_revoked')
+        return validated_token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        user = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user)
+        else:
+            # 与父类查库后的检查保持一致
+            if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+                raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+            if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        if getattr(user, 'is_frozen', False):
+            raise AuthenticationFailed(_('此账户已被冻结。'), code='account_frozen')
+        # 返回副本，避免请求中对 request.user 的修改影响缓存里的对象
+        return copy.copy(user)
@@ -0,0 +1,153 @@
+# accounts/login_activity.py
+"""
+登录时间 (last_login) 的批量写入。
+
+simplejwt 的 UPDATE_LAST_LOGIN 在每次签发令牌时同步执行一条 UPDATE；部署后大量用户同时
+重新登录时，这些写入会在 user 表上互相争用。这里改为：
+- 登录时只在内存中记录 {user_id: 最近登录时间}，同一用户多次登录合并为一条；
+- 后台线程每隔 LOGIN_ACTIVITY['FLUSH_INTERVAL'] 秒用 bulk_update 批量写入，
+  待写入的用户数达到 MAX_PENDING 时提前写入；
+- 进程退出时 (atexit) 写入剩余记录。进程被强制杀死时最多丢失一个周期的登录时间。
+
+FLUSH_INTERVAL 为 0 时在登录请求中直接写入（测试或单进程调试时使用）。
+统计数据（登录次数、最近 1/5 分钟的登录速率、写入次数）只针对当前进程。
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'FLUSH_INTERVAL': 10,
+    'MAX_PENDING': 1000,
+    'BATCH_SIZE': 500,
+}
+
+RATE_WINDOWS = (60, 300) # 统计登录速率的时间窗口（秒）
+
+
+def get_settings():
+    return {**DEFAULTS, **getattr(settings, 'LOGIN_ACTIVITY', {})}
+
+
+class LoginRate:
+    """按秒分桶的登录计数，用于计算最近一段时间的登录速率"""
+
+    def __init__(self, window=max(RATE_WINDOWS)):
+        self.window = window
+        self._buckets = deque() # [秒, 次数]
+
+    def add(self, now):
+        second = int(now)
+        if self._buckets and self._buckets[-1][0] == second:
+            self._buckets[-1][1] += 1
+        else:
+            self._buckets.append([second, 1])
+        self._trim(second)
+
+    def _trim(self, second):
+        while self._buckets and self._buckets[0][0] <= second - self.window:
+            self._buckets.popleft()
+
+    def per_second(self, window, now):
+        since = int(now) - window
+        return sum(count for second, count in self._buckets if second > since) / window
+
+
+class LoginActivityRecorder:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {} # user_id -> 最近登录时间
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._rate = LoginRate()
+        self.logins = 0
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.last_flush_at = None
+        atexit.register(self.flush)
+
+    def record(self, user):
+        now = timezone.now()
+        user.last_login = now # 与 update_last_login 一致，本次请求中的对象立即可见
+        options = get_settings()
+        with self._lock:
+            self._pending[user.pk] = now
+            self.logins += 1
+            self._rate.add(time.time())
+            pending = len(self._pending)
+        if not options['FLUSH_INTERVAL']:
+            self.flush()
+            return
+        self._ensure_thread()
+        if pending >= options['MAX_PENDING']:
+            self._wakeup.set()
+
+    def _ensure_thread(self):
+        # fork 出的子进程不会继承父进程的线程，按 pid 判断是否需要重新启动
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='login-activity-flusher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(get_settings()['FLUSH_INTERVAL'])
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('写入登录时间失败')
+            finally:
+                connection.close() # 后台线程自己的数据库连接，不跨周期保持
+
+    def flush(self):
+        """把内存中的登录时间写入数据库，返回写入的用户数"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        User = get_user_model()
+        users = [User(pk=user_id, last_login=last_login) for user_id, last_login in pending.items()]
+        try:
+            User.objects.bulk_update(users, ['last_login'], batch_size=get_settings()['BATCH_SIZE'])
+        except Exception:
+            # 写入失败时放回，下个周期重试；期间的新登录时间更晚，优先保留
+            with self._lock:
+                self._pending = {**pending, **self._pending}
+            raise
+        with self._lock:
+            self.flushes += 1
+            self.flushed_rows += len(users)
+            self.last_flush_at = timezone.now()
+        return len(users)
+
+    def as_dict(self):
+        now = time.time()
+        with self._lock:
+            data = {
+                'logins': self.logins,
+                'pending': len(self._pending),
+                'flushes': self.flushes,
+                'flushed_rows': self.flushed_rows,
+                'last_flush_at': self.last_flush_at.isoformat() if self.last_flush_at else None,
+            }
+            for window in RATE_WINDOWS:
+                data[f'logins_per_second_{window}s'] = round(self._rate.per_second(window, now), 3)
+        return data
+
+
+recorder = LoginActivityRecorder()
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenRevocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jti', models.CharField(blank=True, max_length=255, verbose_name='令牌 ID')),
+                ('not_before', models.DateTimeField(blank=True, null=True, verbose_name='签发时间下限')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='过期时间')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='撤销时间')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='token_revocations', to=settings.AUTH_USER_MODEL, verbose_name='用户')),
+            ],
+            options={
+                'verbose_name': '令牌撤销记录',
+                'verbose_name_plural': '令牌撤销记录',
+            },
+        ),
+    ]
@@ -13,4 +13,24 @@ class User(AbstractUser):
     # REQUIRED_FIELDS = ['username'] # 如果 email 是 USERNAME_FIELD，username 可能是可选的
 
     def __str__(self):
-        return self.username
\ No newline at end of file
+        return self.username
+
+class TokenRevocation(models.Model):
+    """
+    令牌撤销记录，只追加、不修改，由 accounts.revocation 同步到各进程内存。
+    jti 非空：撤销单个令牌（如退出登录）；
+    not_before 非空：该用户在此时间及之前签发的令牌全部失效（如冻结、停用、退出所有设备）。
+    expires_at 之后被撤销的令牌本身已过期，记录可以删除。
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='token_revocations', verbose_name='用户')
+    jti = models.CharField(max_length=255, blank=True, verbose_name='令牌 ID')
+    not_before = models.DateTimeField(null=True, blank=True, verbose_name='签发时间下限')
+    expires_at = models.DateTimeField(db_index=True, verbose_name='过期时间')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='撤销时间')
+
+    class Meta:
+        verbose_name = '令牌撤销记录'
+        verbose_name_plural = verbose_name
+
+    def __str__(self):
+        return f'{self.user_id}:{self.jti or self.not_before}'
@@ -0,0 +1,157 @@
+# accounts/revocation.py
+"""
+JWT 撤销列表。
+
+simplejwt 自带的 token_blacklist 应用每个请求都要查一次库。这里把撤销信息保存在
+TokenRevocation 表中（只追加，数据量只和尚未过期的撤销记录有关），每个进程在内存里
+维护一份副本，认证时只做字典查找：
+- 按 jti 撤销单个令牌（退出登录）；
+- 按用户记录水位线 not_before，签发时间不晚于它的令牌全部失效（冻结、停用、退出所有设备）。
+  iat 只精确到秒，登录时另外写入精确到微秒的 ISSUED_AT_CLAIM，撤销后同一秒内重新登录得到的令牌仍然有效；
+  由 refresh token 换取的 access token 沿用 refresh token 的值。没有该声明的令牌按 iat 比较，同一秒内签发的也视为失效。
+
+进程每隔 TOKEN_REVOCATION['SYNC_INTERVAL'] 秒增量拉取一次新记录，其他进程的撤销最多延迟这么久生效；
+本进程的撤销立即生效。拉取时按 created_at 回看 SYNC_MARGIN 秒，避免漏掉提交较晚的事务。
+记录在对应令牌过期后从内存中移除，数据库中的过期记录每 GC_INTERVAL 秒清理一次。
+
+撤销列表只保存未过期的令牌，规模很小，直接用字典而不是布隆过滤器，省去误判后的二次确认。
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+ISSUED_AT_CLAIM = 'iat_us'
+
+DEFAULTS = {
+    'SYNC_INTERVAL': 5,
+    'SYNC_MARGIN': 60,
+    'GC_INTERVAL': 3600,
+}
+
+
+def get_settings():
+    return {**DEFAULTS, **getattr(settings, 'TOKEN_REVOCATION', {})}
+
+
+def _max_token_lifetime():
+    return max(api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME)
+
+
+def _microseconds(value):
+    return round(value.timestamp() * 1_000_000)
+
+
+def stamp_issued_at(token):
+    """写入精确签发时间，登录签发 refresh token 时调用"""
+    token[ISSUED_AT_CLAIM] = _microseconds(token.current_time)
+    return token
+
+
+class RevocationList:
+    """进程内的撤销列表，读取不加锁，同步与写入加锁"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jtis = {}        # jti -> 令牌过期时间戳
+        self._watermarks = {}  # str(user_id) -> (not_before 微秒时间戳, 记录过期时间戳)
+        self._synced_at = None # 上次同步开始的时间 (datetime)，None 表示尚未加载
+        self._next_sync = 0.0
+        self._next_gc = 0.0
+
+    def is_revoked(self, token):
+        """token 可以是 simplejwt 的 Token 对象或 payload 字典"""
+        self.maybe_sync()
+        if token.get(api_settings.JTI_CLAIM) in self._jtis:
+            return True
+        watermark = self._watermarks.get(str(token.get(api_settings.USER_ID_CLAIM)))
+        if watermark is None:
+            return False
+        issued_at = token.get(ISSUED_AT_CLAIM)
+        if issued_at is None: # 按所在秒的开始计算，同一秒内签发的也视为失效
+            issued_at = token.get('iat', 0) * 1_000_000
+        return issued_at <= watermark[0]
+
+    def maybe_sync(self):
+        if time.monotonic() < self._next_sync:
+            return
+        # 首次加载必须等待；之后若其他线程正在同步，先使用当前数据
+        if not self._lock.acquire(blocking=self._synced_at is None):
+            return
+        try:
+            if time.monotonic() >= self._next_sync:
+                self._sync()
+        finally:
+            self._lock.release()
+
+    def _sync(self):
+        from .models import TokenRevocation
+
+        options = get_settings()
+        now = timezone.now()
+        rows = TokenRevocation.objects.filter(expires_at__gt=now)
+        if self._synced_at is not None:
+            rows = rows.filter(created_at__gte=self._synced_at - timedelta(seconds=options['SYNC_MARGIN']))
+        for user_id, jti, not_before, expires_at in rows.values_list('user_id', 'jti', 'not_before', 'expires_at'):
+            self._add(user_id, jti, not_before, expires_at)
+        self._synced_at = now
+        self._purge(now.timestamp())
+
+        if time.monotonic() >= self._next_gc:
+            TokenRevocation.objects.filter(expires_at__lte=now).delete()
+            self._next_gc = time.monotonic() + options['GC_INTERVAL']
+        self._next_sync = time.monotonic() + options['SYNC_INTERVAL']
+
+    def _add(self, user_id, jti, not_before, expires_at):
+        expires_at = expires_at.timestamp()
+        if jti:
+            self._jtis[jti] = expires_at
+        if not_before is not None:
+            key = str(user_id)
+            current = self._watermarks.get(key)
+            if current is None or current[0] < _microseconds(not_before):
+                self._watermarks[key] = (_microseconds(not_before), expires_at)
+
+    def _purge(self, now):
+        # 重新赋值而不是原地删除，读取方不需要加锁
+        self._jtis = {jti: exp for jti, exp in self._jtis.items() if exp > now}
+        self._watermarks = {key: value for key, value in self._watermarks.items() if value[1] > now}
+
+    def record(self, user_id, jti='', not_before=None, expires_at=None):
+        """写入一条撤销记录，并立即在本进程生效"""
+        from .models import TokenRevocation
+
+        revocation = TokenRevocation.objects.create(
+            user_id=user_id, jti=jti, not_before=not_before, expires_at=expires_at
+        )
+        with self._lock:
+            self._add(user_id, jti, not_before, expires_at)
+        return revocation
+
+    def clear(self):
+        with self._lock:
+            self._jtis = {}
+            self._watermarks = {}
+            self._synced_at = None
+            self._next_sync = 0.0
+
+
+revocation_list = RevocationList()
+
+
+def revoke_token(token):
+    """撤销单个令牌（access 或 refresh），保留到令牌本身过期"""
+    expires_at = datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc)
+    return revocation_list.record(
+        token[api_settings.USER_ID_CLAIM], jti=token[api_settings.JTI_CLAIM], expires_at=expires_at
+    )
+
+
+def revoke_user_tokens(user):
+    """使该用户此前签发的所有令牌失效，记录保留到其中最晚签发的令牌过期"""
+    now = timezone.now()
+    return revocation_list.record(
+        getattr(user, api_settings.USER_ID_FIELD), not_before=now, expires_at=now + _max_token_lifetime()
+    )
@@ -4,7 +4,13 @@ from .models import User
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer # 导入
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer, TokenVerifySerializer
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken, UntypedToken
 from django.utils.translation import gettext_lazy as _ # 用于错误信息国际化 (可选)
+from .revocation import revocation_list, stamp_issued_at
+from . import login_activity
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -49,7 +55,8 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         token = super().get_token(user)
         # 你可以在这里向 token payload 添加自定义声明 (如果需要)
         # 例如: token['username'] = user.username
-        return token
+        # 精确到微秒的签发时间，撤销水位线与它比较 (见 accounts.revocation)
+        return stamp_issued_at(token)
 
     def validate(self, attrs):
         # 调用父类的 validate 方法，它会检查 is_active 和密码
@@ -64,6 +71,42 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
                 {"detail": _("此账户已被冻结，无法登录。")}, # 返回更标准的错误格式
                 code='account_frozen',
             )
+        # 登录时间先记在内存中，由后台线程批量写入 (SIMPLE_JWT['UPDATE_LAST_LOGIN'] 已关闭)
+        login_activity.recorder.record(self.user)
         # 如果用户未被冻结，则正常返回父类验证后的数据 (包含 token)
         return data
-# --- 新增/修改部分 结束 ---
\ No newline at end of file
+# --- 新增/修改部分 结束 ---
+
+def _check_not_revoked(token):
+    if revocation_list.is_revoked(token):
+        raise InvalidToken(_('令牌已被撤销。'), code='token_revoked')
+
+
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """已撤销的 refresh token（退出登录、冻结）不能再换取 access token"""
+    def validate(self, attrs):
+        _check_not_revoked(self.token_class(attrs['refresh']))
+        return super().validate(attrs)
+
+
+class CustomTokenVerifySerializer(TokenVerifySerializer):
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        _check_not_revoked(UntypedToken(attrs['token']))
+        return data
+
+
+class LogoutSerializer(serializers.Serializer):
+    """退出登录：撤销当前 access token 和传入的 refresh token；all_devices 为真时撤销该用户的全部令牌"""
+    refresh = serializers.CharField(required=False, write_only=True)
+    all_devices = serializers.BooleanField(default=False)
+
+    def validate_refresh(self, value):
+        try:
+            token = RefreshToken(value)
+        except TokenError as e:
+            raise serializers.ValidationError(str(e))
+        user = self.context['request'].user
+        if str(token.get(api_settings.USER_ID_CLAIM)) != str(getattr(user, api_settings.USER_ID_FIELD)):
+            raise serializers.ValidationError('该令牌不属于当前用户。')
+        return token
@@ -0,0 +1,12 @@
+# accounts/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .authentication import user_cache
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """冻结、停用、修改权限或密码后，本进程缓存的用户立即失效"""
+    user_cache.invalidate(instance.pk)
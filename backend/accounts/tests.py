@@ -1,3 +1,90 @@
-from django.test import TestCase
+from unittest import mock
+from django.contrib import admin
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from .authentication import user_cache
+from .models import User
+from .revocation import revocation_list
 
-# Create your tests here.
+
+@override_settings(LOGIN_ACTIVITY={'FLUSH_INTERVAL': 0})
+class TokenRevocationTests(APITestCase):
+    """退出登录、退出所有设备与冻结后，旧令牌在 access、refresh、verify 上都被拒绝，新登录立即可用"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('alice', 'alice@example.com', 'password')
+        cls.admin = User.objects.create_user('admin', 'admin@example.com', 'password', is_staff=True)
+
+    def setUp(self):
+        revocation_list.clear()
+        user_cache.clear()
+        self.addCleanup(revocation_list.clear)
+        self.addCleanup(user_cache.clear)
+
+    def login(self, username='alice'):
+        response = self.client.post('/api/token/', {'username': username, 'password': 'password'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def me(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        response = self.client.get('/api/accounts/me/')
+        self.client.credentials()
+        return response.status_code
+
+    def assert_revoked(self, tokens):
+        self.assertEqual(self.me(tokens['access']), status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post('/api/token/refresh/', {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post('/api/token/verify/', {'token': tokens['access']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def assert_valid(self, tokens):
+        self.assertEqual(self.me(tokens['access']), status.HTTP_200_OK)
+        response = self.client.post('/api/token/refresh/', {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # 由 refresh token 换取的 access token 沿用登录时的签发时间
+        self.assertEqual(self.me(response.data['access']), status.HTTP_200_OK)
+
+    def logout(self, tokens, **data):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        response = self.client.post('/api/accounts/logout/', data, format='json')
+        self.client.credentials()
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_logout_revokes_only_this_session(self):
+        tokens, other = self.login(), self.login()
+        self.logout(tokens, refresh=tokens['refresh'])
+        self.assert_revoked(tokens)
+        self.assert_valid(other)
+
+    def test_logout_all_devices_then_login_in_the_same_second(self):
+        tokens, other = self.login(), self.login()
+        self.logout(tokens, all_devices=True)
+        self.assert_revoked(tokens)
+        self.assert_revoked(other)
+        self.assert_valid(self.login())
+
+    def test_freeze_revokes_and_unfreeze_allows_login(self):
+        tokens = self.login()
+        self.client.force_authenticate(self.admin)
+        response = self.client.patch(f'/api/accounts/users/{self.user.pk}/', {'is_frozen': True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.patch(f'/api/accounts/users/{self.user.pk}/', {'is_frozen': False}, format='json')
+        self.client.force_authenticate(None)
+
+        self.assert_revoked(tokens)
+        self.assert_valid(self.login())
+
+    def test_admin_site_freeze_revokes(self):
+        tokens = self.login()
+        model_admin = admin.site._registry[User]
+        self.user.is_frozen = True
+        model_admin.save_model(None, self.user, mock.Mock(changed_data=['is_frozen']), change=True)
+        self.user.is_frozen = False
+        model_admin.save_model(None, self.user, mock.Mock(changed_data=['is_frozen']), change=True)
+
+        self.assert_revoked(tokens)
+        self.assert_valid(self.login())
@@ -1,7 +1,7 @@
 # accounts/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import UserRegistrationAPIView, CurrentUserAPIView, UserViewSet
+from .views import UserRegistrationAPIView, CurrentUserAPIView, UserViewSet, LogoutAPIView, LoginActivityStatsAPIView
 
 router = DefaultRouter()
 router.register(r'users', UserViewSet, basename='user-admin') # 管理员管理用户
@@ -9,5 +9,7 @@ router.register(r'users', UserViewSet, basename='user-admin') # 管理员管理
 urlpatterns = [
     path('register/', UserRegistrationAPIView.as_view(), name='user-register'), # 用户自注册
     path('me/', CurrentUserAPIView.as_view(), name='current-user'),
+    path('logout/', LogoutAPIView.as_view(), name='user-logout'),
+    path('login-activity/stats/', LoginActivityStatsAPIView.as_view(), name='login-activity-stats'),
     path('', include(router.urls)), # 将 UserViewSet 相关的 URL 包含进来
 ]
\ No newline at end of file
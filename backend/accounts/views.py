@@ -1,13 +1,21 @@
 # accounts/views.py
 from rest_framework import generics, viewsets, permissions, status
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView # 导入
+from rest_framework_simplejwt.views import TokenRefreshView, TokenVerifyView
+from rest_framework_simplejwt.tokens import Token
 from .models import User
+from .revocation import revoke_token, revoke_user_tokens
+from . import login_activity
 # 从 .serializers 导入所有需要的序列化器，包括新增的
 from .serializers import (
     UserRegistrationSerializer,
     UserDetailSerializer,
-    CustomTokenObtainPairSerializer # 导入自定义序列化器
+    CustomTokenObtainPairSerializer, # 导入自定义序列化器
+    CustomTokenRefreshSerializer,
+    CustomTokenVerifySerializer,
+    LogoutSerializer,
 )
 
 class UserRegistrationAPIView(generics.CreateAPIView):
@@ -27,9 +35,50 @@ class UserViewSet(viewsets.ModelViewSet):
     serializer_class = UserDetailSerializer
     permission_classes = [permissions.IsAdminUser]
 
+    def perform_update(self, serializer):
+        user = serializer.instance
+        was_blocked = user.is_frozen or not user.is_active
+        user = serializer.save()
+        # 冻结或停用时，已签发的令牌立即失效（用户缓存由信号清除）
+        if not was_blocked and (user.is_frozen or not user.is_active):
+            revoke_user_tokens(user)
+
+
+class LogoutAPIView(generics.GenericAPIView):
+    serializer_class = LogoutSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if serializer.validated_data['all_devices']:
+            revoke_user_tokens(request.user)
+        else:
+            if isinstance(request.auth, Token): # 会话登录时没有 access token
+                revoke_token(request.auth)
+            if 'refresh' in serializer.validated_data:
+                revoke_token(serializer.validated_data['refresh'])
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class LoginActivityStatsAPIView(APIView):
+    """登录速率与 last_login 批量写入的统计（当前进程），仅管理员可见"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(login_activity.recorder.as_dict())
+
 
 # --- 新增/修改部分 开始 ---
 # 创建一个使用自定义序列化器的 TokenObtainPairView
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+
+
+class CustomTokenRefreshView(TokenRefreshView):
+    serializer_class = CustomTokenRefreshSerializer
+
+
+class CustomTokenVerifyView(TokenVerifyView):
+    serializer_class = CustomTokenVerifySerializer
 # --- 新增/修改部分 结束 ---
\ No newline at end of file
@@ -0,0 +1,161 @@
+# articles/async_views.py
+"""
+ASGI 部署下的异步接口（/api/async/...）。
+
+DRF 的视图只能同步执行，在 ASGI 下 Django 会把每个请求放进线程，并发受限于线程数。
+这里用 Django 原生的异步视图实现文章、评论的列表与详情，以及直接返回结果的摘要接口：
+- 复用 ArticleViewSet / CommentViewSet 的查询集、过滤、分页与序列化器，输出与同步接口一致；
+- 查询使用异步 ORM（acount / afirst / async for），只在携带 Authorization 时才到线程中认证；
+- 摘要使用后端的 acomplete（ZhipuAIBackend 为 httpx.AsyncClient），等待模型时不占用线程；
+- 不经过匿名响应缓存与条件请求 (ETag)，需要这些时使用同步接口。
+
+Django 的异步 ORM 目前仍在线程中执行 SQL，收益主要来自等待模型与慢请求时不占用线程。
+在 WSGI 下这些视图同样可用（Django 用 async_to_sync 执行），但没有并发收益。
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from .summary import QueueFull, SummaryConfigurationError, SummaryError, get_summary_runner
+from .views import SUMMARY_RETRY_AFTER, ArticleViewSet, CommentViewSet
+
+
+class AsyncAPIView(View):
+    """异步视图的公共部分：JWT 认证、权限检查、JSON 输出与 DRF 异常转换"""
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    parser_classes = api_settings.DEFAULT_PARSER_CLASSES
+    require_authentication = False
+
+    async def dispatch(self, request, *args, **kwargs):
+        drf_request = Request(
+            request,
+            parsers=[parser() for parser in self.parser_classes],
+            authenticators=[auth() for auth in self.authentication_classes],
+        )
+        try:
+            await self.authenticate(drf_request)
+            return await super().dispatch(drf_request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc, drf_request)
+
+    async def authenticate(self, request):
+        if 'HTTP_AUTHORIZATION' in request.META:
+            # 认证需要查询用户（CachedJWTAuthentication 命中进程内缓存时不查库）
+            await sync_to_async(lambda: request.user)()
+        else:
+            request.user # 没有凭据时不会访问数据库
+        if self.require_authentication and not request.user.is_authenticated:
+            raise exceptions.NotAuthenticated()
+
+    def http_method_not_allowed(self, request, *args, **kwargs):
+        raise exceptions.MethodNotAllowed(request.method)
+
+    def handle_exception(self, exc, request):
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            authenticators = request.authenticators
+            header = authenticators[0].authenticate_header(request) if authenticators else None
+            if header:
+                exc.status_code = status.HTTP_401_UNAUTHORIZED
+                response = self.render(self.error_payload(exc), exc.status_code)
+                response['WWW-Authenticate'] = header
+                return response
+            exc.status_code = status.HTTP_403_FORBIDDEN
+        response = self.render(self.error_payload(exc), exc.status_code)
+        if getattr(exc, 'wait', None):
+            response['Retry-After'] = str(int(exc.wait))
+        return response
+
+    @staticmethod
+    def error_payload(exc):
+        return exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+
+    @staticmethod
+    def render(data, status_code=status.HTTP_200_OK, headers=None):
+        response = HttpResponse(JSONRenderer().render(data), status=status_code, content_type='application/json')
+        for name, value in (headers or {}).items():
+            response[name] = value
+        return response
+
+
+class AsyncReadOnlyView(AsyncAPIView):
+    """
+    以异步方式执行 viewset 的 list / retrieve。viewset 只用来构造查询集、过滤器、分页器与序列化器，
+    权限检查沿用 viewset 的 permission_classes（只读请求不会触发对象级的作者检查）。
+    """
+    viewset_class = None
+
+    def get_viewset(self, request, action, kwargs):
+        viewset = self.viewset_class(request=request, action=action, kwargs=kwargs, args=(), format_kwarg=None)
+        viewset.headers = {}
+        for permission in viewset.get_permissions():
+            if not permission.has_permission(request, viewset):
+                viewset.permission_denied(request, message=getattr(permission, 'message', None))
+        return viewset
+
+    async def get(self, request, pk=None):
+        if pk is None:
+            return await self.list(request)
+        return await self.retrieve(request, pk)
+
+    async def list(self, request):
+        viewset = self.get_viewset(request, 'list', {})
+        queryset = viewset.filter_queryset(viewset.get_queryset())
+        paginator = viewset.paginator
+        if paginator is None:
+            rows = [row async for row in queryset]
+            return self.render(viewset.get_serializer(rows, many=True).data)
+        page = await paginator.apaginate_queryset(queryset, request, view=viewset)
+        data = viewset.get_serializer(page, many=True).data
+        return self.render(paginator.get_paginated_response(data).data)
+
+    async def retrieve(self, request, pk):
+        viewset = self.get_viewset(request, 'retrieve', {'pk': pk})
+        queryset = viewset.filter_queryset(viewset.get_queryset())
+        try:
+            instance = await queryset.filter(pk=pk).afirst()
+        except (TypeError, ValueError):
+            instance = None
+        if instance is None:
+            raise exceptions.NotFound(f'No {queryset.model._meta.object_name} matches the given query.')
+        if hasattr(viewset, 'prepare_object'):
+            instance = viewset.prepare_object(instance)
+        return self.render(viewset.get_serializer(instance).data)
+
+
+class AsyncArticleView(AsyncReadOnlyView):
+    viewset_class = ArticleViewSet
+
+
+class AsyncCommentView(AsyncReadOnlyView):
+    viewset_class = CommentViewSet
+
+
+@method_decorator(csrf_exempt, name='dispatch') # 只接受 JWT，不使用会话
+class AsyncGenerateSummaryView(AsyncAPIView):
+    """
+    直接返回摘要结果（不创建任务）。并发、排队上限与重试与任务队列使用同一组配置，
+    排队已满时返回 429；摘要缓存与任务队列共享。
+    """
+    require_authentication = True
+
+    async def post(self, request):
+        content = request.data.get('content') # 解析请求体不访问数据库，ParseError 由 dispatch 转换
+        if not content:
+            return self.render({'error': '文章内容不能为空'}, status.HTTP_400_BAD_REQUEST)
+
+        try:
+            summary, cached = await get_summary_runner().run(content)
+        except SummaryConfigurationError as e:
+            return self.render({'error': str(e)}, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        except QueueFull as e:
+            return self.render(
+                {'error': str(e)}, status.HTTP_429_TOO_MANY_REQUESTS, headers={'Retry-After': str(SUMMARY_RETRY_AFTER)},
+            )
+        except SummaryError as e:
+            return self.render({'error': str(e)}, status.HTTP_502_BAD_GATEWAY)
+        return self.render({'status': 'succeeded', 'summary': summary, 'cached': cached})
@@ -0,0 +1,251 @@
+# articles/autosave.py
+"""
+编辑器的增量自动保存（/api/articles/<id>/autosave/）。
+
+编辑器原本每隔几秒用 PATCH 提交完整正文，长文每次都要上传整篇内容并改写整行。这里改为：
+- 客户端提交相对某个版本 (version) 的补丁，服务端应用后返回新的版本；
+  version 是标题、摘要与正文的哈希，与服务端当前版本不一致时返回 409，由客户端重新获取后再提交；
+- 补丁是按字符（Unicode 码位，JavaScript 中用 Array.from 计数）的操作列表：
+    正整数 n  保留接下来的 n 个字符
+    负整数 -n 删除接下来的 n 个字符
+    字符串    插入的文本
+  列表之后剩余的文本保持不变，例如 [120, -3, "新的"] 把第 121~123 个字符替换为 "新的"；
+- 连续的自动保存先合并在缓存 (CACHE) 中：距第一次未写入的修改满 FLUSH_INTERVAL 秒、
+  客户端要求 (flush) 或后台线程每隔 FLUSH_INTERVAL 秒检查时才写入数据库，写入时记录一个历史版本；
+- 通过文章接口的普通保存优先，会丢弃尚未写入的自动保存。
+
+同一篇文章的自动保存用缓存中的锁 (cache.add) 串行化。多进程部署时 CACHE 必须是共享缓存
+（如 Redis），否则各进程看到的草稿不同（manage.py check --deploy 会检查，见 articles.checks）；
+缓存条目被淘汰时最多丢失一个周期的修改。
+FLUSH_INTERVAL 为 0 时每次自动保存都直接写入数据库。
+"""
+import atexit
+import copy
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection, transaction
+from .models import Article
+from . import revisions
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'CACHE': 'default',
+    'FLUSH_INTERVAL': 10,
+    'TIMEOUT': 24 * 3600,  # 未写入草稿在缓存中的保留时间，应远大于 FLUSH_INTERVAL
+    'LOCK_TIMEOUT': 2,     # 等待同一文章的其它自动保存的最长秒数
+}
+
+DRAFT_KEY = 'articles:autosave:{}'
+LOCK_KEY = 'articles:autosave:lock:{}'
+
+
+def get_settings():
+    return {**DEFAULTS, **getattr(settings, 'ARTICLE_AUTOSAVE', {})}
+
+
+class Conflict(Exception):
+    """提交的版本不是当前版本"""
+
+    def __init__(self, version):
+        super().__init__('草稿已被其它编辑修改，请重新获取后再提交。')
+        self.version = version
+
+
+class InvalidPatch(ValueError):
+    pass
+
+
+class Busy(Exception):
+    pass
+
+
+def version_of(title, excerpt, content):
+    digest = hashlib.sha1()
+    for value in (title, excerpt, content):
+        digest.update(value.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def apply_patch(text, patch):
+    if not isinstance(patch, list):
+        raise InvalidPatch('补丁必须是列表。')
+    position = 0
+    parts = []
+    for op in patch:
+        if isinstance(op, str):
+            parts.append(op)
+        elif isinstance(op, int) and not isinstance(op, bool):
+            end = position + abs(op)
+            if end > len(text):
+                raise InvalidPatch('补丁超出了基准版本的长度。')
+            if op > 0:
+                parts.append(text[position:end])
+            position = end
+        else:
+            raise InvalidPatch('补丁只能包含整数（保留或删除的字符数）和字符串（插入的文本）。')
+    parts.append(text[position:])
+    return ''.join(parts)
+
+
+class AutosaveBuffer:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tracked = set() # 本进程缓冲过、可能尚未写入的文章 ID
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        atexit.register(self._flush_at_exit)
+
+    @staticmethod
+    def _cache():
+        return caches[get_settings()['CACHE']]
+
+    @contextmanager
+    def _locked(self, article_id):
+        cache = self._cache()
+        options = get_settings()
+        key, token = LOCK_KEY.format(article_id), uuid.uuid4().hex
+        deadline = time.monotonic() + options['LOCK_TIMEOUT']
+        # 锁的过期时间兜底持有者崩溃的情况
+        while not cache.add(key, token, timeout=max(10, options['LOCK_TIMEOUT'] * 5)):
+            if time.monotonic() >= deadline:
+                raise Busy
+            time.sleep(0.01)
+        try:
+            yield
+        finally:
+            if cache.get(key) == token:
+                cache.delete(key)
+
+    def _state(self, article_id):
+        """缓冲中的草稿；没有时取数据库中的文章"""
+        state = self._cache().get(DRAFT_KEY.format(article_id))
+        if state is not None:
+            return state
+        title, excerpt, content = Article.objects.values_list('title', 'excerpt', 'content').get(pk=article_id)
+        return {
+            'version': version_of(title, excerpt, content),
+            'title': title,
+            'excerpt': excerpt,
+            'content': content,
+            'since': None, # 第一次未写入修改的时间，None 表示与数据库一致
+        }
+
+    def get(self, article_id):
+        state = self._state(article_id)
+        return {
+            'version': state['version'],
+            'title': state['title'],
+            'excerpt': state['excerpt'],
+            'content': state['content'],
+            'saved': state['since'] is None,
+        }
+
+    def save(self, article_id, user, version, patch=None, content=None, title=None, excerpt=None, flush=False):
+        """应用一次自动保存，返回 (新版本, 是否已写入数据库)"""
+        options = get_settings()
+        with self._locked(article_id):
+            state = self._state(article_id)
+            if version != state['version']:
+                raise Conflict(state['version'])
+            if patch is not None:
+                content = apply_patch(state['content'], patch)
+            changes = {
+                'title': state['title'] if title is None else title,
+                'excerpt': state['excerpt'] if excerpt is None else excerpt,
+                'content': state['content'] if content is None else content,
+            }
+            new_version = version_of(changes['title'], changes['excerpt'], changes['content'])
+            if new_version != state['version']:
+                now = time.time()
+                state = {**state, **changes, 'version': new_version, 'since': state['since'] or now, 'user_id': user.pk}
+            elif state['since'] is None:
+                return new_version, True
+            if flush or not options['FLUSH_INTERVAL'] or time.time() - state['since'] >= options['FLUSH_INTERVAL']:
+                self._persist(article_id, state)
+                return new_version, True
+            self._cache().set(DRAFT_KEY.format(article_id), state, timeout=options['TIMEOUT'])
+        with self._lock:
+            self._tracked.add(article_id)
+        self._ensure_thread()
+        return new_version, False
+
+    @contextmanager
+    def replacing(self, article_id):
+        """文章通过普通接口保存期间持有锁，并丢弃尚未写入的自动保存"""
+        with self._locked(article_id):
+            self._cache().delete(DRAFT_KEY.format(article_id))
+            yield
+
+    def _persist(self, article_id, state):
+        """在持有文章锁时调用：写入数据库、记录历史版本并清除缓冲"""
+        with transaction.atomic():
+            article = Article.objects.select_for_update().filter(pk=article_id).first()
+            if article is not None:
+                previous = copy.copy(article)
+                article.title, article.excerpt, article.content = state['title'], state['excerpt'], state['content']
+                article.save(update_fields=['title', 'excerpt', 'content', 'updated_at'])
+                revisions.record(article, previous=previous, author=get_user_model()(pk=state['user_id']))
+        self._cache().delete(DRAFT_KEY.format(article_id))
+
+    def flush(self):
+        """写入本进程缓冲过的草稿，返回写入的篇数；其它自动保存正在进行的文章留到下个周期"""
+        with self._lock:
+            article_ids, self._tracked = self._tracked, set()
+        flushed = 0
+        retry = set()
+        for article_id in article_ids:
+            try:
+                with self._locked(article_id):
+                    state = self._cache().get(DRAFT_KEY.format(article_id))
+                    if state is not None: # 已被其它请求或进程写入时为 None
+                        self._persist(article_id, state)
+                        flushed += 1
+            except Busy:
+                retry.add(article_id)
+            except Exception:
+                retry.add(article_id)
+                logger.exception('写入文章 %s 的自动保存失败', article_id)
+        if retry:
+            with self._lock:
+                self._tracked |= retry
+        return flushed
+
+    def _ensure_thread(self):
+        # fork 出的子进程不会继承父进程的线程，按 pid 判断是否需要重新启动
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='article-autosave-flusher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(get_settings()['FLUSH_INTERVAL'] or 1)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                connection.close() # 后台线程自己的数据库连接，不跨周期保持
+
+    def _flush_at_exit(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('退出时写入自动保存失败')
+
+
+buffer = AutosaveBuffer()
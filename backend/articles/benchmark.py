@@ -0,0 +1,284 @@
+# articles/benchmark.py
+"""
+接口压测工具（benchmark_api 命令使用）。
+
+- 进程内模式：使用 Django 测试客户端直接调用视图，可统计每个请求的 SQL 数量；
+- 服务器模式：对本地运行的服务发送 HTTP 请求（--url），SQL 数量取自响应的 Server-Timing 头（如果有）。
+
+每个场景按给定并发数重复请求同一组 URL，报告吞吐量、p50/p95/p99 延迟、平均 SQL 数与错误数。
+结果保存为 JSON，可与基线文件比较。
+
+run_http_load 用 asyncio + httpx 发送请求（benchmark_servers 命令使用），高并发时不需要为每个并发开线程。
+"""
+import asyncio
+import json
+import math
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+from django.db import connection, connections
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from .models import Article, Category, CategoryClosure
+from .search import tokenize
+from .summary import FINISHED_STATES, SUCCEEDED
+
+PERCENTILES = (50, 95, 99)
+# 对比基线时参与比较的指标：(名称, 越大越好)
+COMPARED_METRICS = (('throughput', True), ('p50_ms', False), ('p95_ms', False), ('p99_ms', False), ('queries', False))
+
+
+def percentile(sorted_values, pct):
+    """最近秩法 (nearest-rank) 百分位数"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def build_scenarios():
+    """
+    根据当前数据挑选有代表性的参数：子孙最多的分类、评论最多的已发布文章、
+    该文章标题中的一个词作为检索词。返回 {场景名: URL}。
+    """
+    published = Article.objects.filter(status='published')
+    article = published.order_by('-comment_count', 'pk').only('pk', 'title').first()
+    category_id = (
+        CategoryClosure.objects.values('ancestor_id').annotate(size=Count('descendant_id'))
+        .order_by('-size', 'ancestor_id').values_list('ancestor_id', flat=True).first()
+    ) or Category.objects.values_list('pk', flat=True).first()
+
+    scenarios = {
+        'articles_list': '/api/articles/',
+        'articles_list_cursor': '/api/articles/?pagination=cursor',
+        'articles_by_comments': '/api/articles/?ordering=-comment_count',
+    }
+    if category_id is not None:
+        scenarios['articles_by_category'] = f'/api/articles/?category={category_id}'
+    if article is not None:
+        words = [word for word in tokenize(article.title, for_query=True) if len(word) > 1]
+        if words:
+            scenarios['articles_search'] = f'/api/articles/?search={urllib.request.quote(words[0])}'
+        scenarios['article_detail'] = f'/api/articles/{article.pk}/'
+        scenarios['comments_by_article'] = f'/api/comments/?article={article.pk}'
+        scenarios['comment_threads'] = f'/api/comments/threads/?article={article.pk}'
+    return scenarios
+
+
+class InProcessTransport:
+    """在当前进程内调用视图；每个线程使用自己的客户端和数据库连接"""
+    counts_queries = True
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def request(self, path):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = Client()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(path)
+            response.content # 流式响应需要读完
+        return response.status_code, len(queries)
+
+    def close(self):
+        connections.close_all()
+
+
+class HTTPTransport:
+    """
+    对运行中的服务发送请求；SQL 数量从 Server-Timing 的 db 指标中读取
+    （服务需以 DEBUG 运行或设置 REQUEST_TIMING_EXPOSE_HEADER=1，否则响应中没有该头）
+    """
+    counts_queries = False
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    @staticmethod
+    def _query_count(header):
+        for metric in (header or '').split(','):
+            parts = [part.strip() for part in metric.split(';')]
+            if parts[0] == 'db':
+                for part in parts[1:]:
+                    if part.startswith('desc='):
+                        # 形如 desc="12 queries"
+                        value = part[5:].strip('"').split()[0]
+                        return int(value) if value.isdigit() else None
+        return None
+
+    def request(self, path):
+        try:
+            with urllib.request.urlopen(self.base_url + path, timeout=self.timeout) as response:
+                response.read()
+                return response.status, self._query_count(response.headers.get('Server-Timing'))
+        except urllib.error.HTTPError as e:
+            return e.code, None
+
+    def close(self):
+        pass
+
+
+def run_scenario(transport, path, requests, concurrency, warmup=0):
+    for _ in range(warmup):
+        transport.request(path)
+
+    latencies = []
+    queries = []
+    errors = 0
+    lock = threading.Lock()
+
+    def worker(count):
+        nonlocal errors
+        try:
+            for _ in range(count):
+                started = time.perf_counter()
+                status_code, query_count = transport.request(path)
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    latencies.append(elapsed)
+                    if query_count is not None:
+                        queries.append(query_count)
+                    if status_code >= 400:
+                        errors += 1
+        finally:
+            if concurrency > 1:
+                connections.close_all() # 工作线程各自的数据库连接
+
+    shares = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(worker, shares))
+    else:
+        worker(requests)
+    wall = time.perf_counter() - started
+    return summarize(path, latencies, queries, errors, concurrency, wall)
+
+
+def summarize(path, latencies, queries, errors, concurrency, wall):
+    latencies = sorted(latencies)
+    result = {
+        'path': path,
+        'requests': len(latencies),
+        'errors': errors,
+        'concurrency': concurrency,
+        'throughput': round(len(latencies) / wall, 2) if wall else None,
+        'mean_ms': round(statistics.fmean(latencies), 3) if latencies else None,
+        'queries': round(statistics.fmean(queries), 2) if queries else None,
+    }
+    for pct in PERCENTILES:
+        value = percentile(latencies, pct)
+        result[f'p{pct}_ms'] = round(value, 3) if value is not None else None
+    return result
+
+
+def async_path(path):
+    """同步接口对应的异步接口路径（/api/async/...），没有异步版本时返回 None"""
+    if path.startswith('/api/articles/') or (path.startswith('/api/comments/') and '/threads/' not in path):
+        return '/api/async/' + path[len('/api/'):]
+    return None
+
+
+def get_operation(path):
+    async def operation(client, index):
+        response = await client.get(path)
+        return response.status_code
+    return operation
+
+
+DEFAULT_POLL_INTERVAL = 2 # 响应没有 Retry-After 时的轮询间隔（秒）
+SUMMARY_TEXT = '压测用文章 {run}-{index}。这是第一句话，用于生成摘要。这是第二句话！这是第三句话？'
+
+
+def summary_operation(path, token, poll=False):
+    """
+    请求一次摘要，内容各不相同以避开摘要缓存。
+    poll 为 True 时（任务队列接口）提交后按 Retry-After 的间隔轮询 status_url 到任务结束，
+    计为一次完整的摘要请求（延迟包含轮询间隔）
+    """
+    run = uuid.uuid4().hex[:8]
+    headers = {'Authorization': f'Bearer {token}'}
+
+    async def operation(client, index):
+        content = SUMMARY_TEXT.format(run=run, index=index)
+        response = await client.post(path, json={'content': content}, headers=headers)
+        if poll and response.status_code == 202:
+            job = response.json()
+            while response.status_code < 400 and job['status'] not in FINISHED_STATES:
+                await asyncio.sleep(float(response.headers.get('Retry-After', DEFAULT_POLL_INTERVAL)))
+                response = await client.get(job['status_url'], headers=headers)
+                if response.status_code < 400:
+                    job = response.json()
+            if response.status_code < 400 and job['status'] != SUCCEEDED:
+                return 500
+        return response.status_code
+    return operation
+
+
+async def _run_load(base_url, operation, requests, concurrency, warmup, timeout):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        for index in range(warmup):
+            await operation(client, -1 - index)
+
+        latencies = []
+        errors = 0
+        indexes = iter(range(requests)) # 各协程共享，取完即结束
+
+        async def worker():
+            nonlocal errors
+            for index in indexes:
+                started = time.perf_counter()
+                try:
+                    status_code = await operation(client, index)
+                except httpx.HTTPError:
+                    status_code = 599
+                latencies.append((time.perf_counter() - started) * 1000)
+                if status_code >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return latencies, errors, time.perf_counter() - started
+
+
+def run_http_load(base_url, path, operation, requests, concurrency, warmup=0, timeout=60):
+    """对运行中的服务保持 concurrency 个并发请求，共 requests 个，返回与 run_scenario 相同格式的结果"""
+    latencies, errors, wall = asyncio.run(
+        _run_load(base_url.rstrip('/'), operation, requests, concurrency, warmup, timeout)
+    )
+    return summarize(path, latencies, [], errors, concurrency, wall)
+
+
+def compare(results, baseline, threshold):
+    """
+    与基线比较，返回 [(规模, 场景, 指标, 基线值, 当前值, 变化百分比, 是否退化)]。
+    只比较两边都存在的规模与场景。
+    """
+    rows = []
+    for scale, scenarios in results.items():
+        for name, current in scenarios.items():
+            previous = baseline.get(scale, {}).get(name)
+            if not previous:
+                continue
+            for metric, higher_is_better in COMPARED_METRICS:
+                old, new = previous.get(metric), current.get(metric)
+                if old in (None, 0) or new is None:
+                    continue
+                change = (new - old) / old * 100
+                regressed = change < -threshold if higher_is_better else change > threshold
+                rows.append((scale, name, metric, old, new, change, regressed))
+    return rows
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['results']
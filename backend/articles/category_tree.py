@@ -0,0 +1,84 @@
+# articles/category_tree.py
+"""
+分类树的进程内缓存。
+
+整棵树由一次查询构建并缓存在当前进程内存中；缓存的有效性由 Django cache 中的
+版本号决定。任何 Category 的保存或删除都会递增版本号（见 signals.py），
+若配置了共享的 cache 后端（如 Redis），版本号在多个 worker 之间同步，
+各进程会在下次访问时重建自己的树。
+"""
+import threading
+from django.core.cache import cache
+from django.db import transaction
+from .models import Category
+
+VERSION_KEY = 'articles:category_tree:version'
+PATH_SEPARATOR = ' -> '
+
+_lock = threading.Lock()
+_cached = {'version': None, 'tree': [], 'paths': {}}
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def bump_version():
+    """使所有进程中的分类树缓存失效"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError: # 键不存在（缓存被清空或从未初始化）
+        cache.add(VERSION_KEY, 1, timeout=None)
+        cache.incr(VERSION_KEY)
+
+
+def invalidate():
+    # 立即失效保证本连接内可见；提交后再失效一次，防止其他请求在提交前用旧数据重建
+    bump_version()
+    transaction.on_commit(bump_version)
+
+
+def _build():
+    rows = list(Category.objects.order_by('name').values_list('id', 'name', 'parent_id'))
+    nodes = {
+        pk: {'id': pk, 'name': name, 'parent': parent_id, 'children': []}
+        for pk, name, parent_id in rows
+    }
+    tree = []
+    for pk, _name, parent_id in rows: # rows 已按名称排序，子节点顺序随之确定
+        parent = nodes.get(parent_id)
+        (parent['children'] if parent else tree).append(nodes[pk])
+
+    paths = {}
+    stack = [(node, node['name']) for node in tree]
+    while stack:
+        node, path = stack.pop()
+        paths[node['id']] = path
+        node['children_count'] = len(node['children'])
+        stack.extend((child, f"{path}{PATH_SEPARATOR}{child['name']}") for child in node['children'])
+    return tree, paths
+
+
+def _get_cached():
+    version = get_version()
+    if _cached['version'] == version:
+        return _cached
+    with _lock:
+        if _cached['version'] != version:
+            tree, paths = _build()
+            _cached.update(version=version, tree=tree, paths=paths)
+    return _cached
+
+
+def get_category_tree():
+    """返回完整的嵌套分类树（调用方不应修改返回值）"""
+    return _get_cached()['tree']
+
+
+def get_category_path(category_id):
+    """返回 '父 -> 子' 形式的分类路径，不存在时返回 None"""
+    return _get_cached()['paths'].get(category_id)
@@ -0,0 +1,52 @@
+# articles/checks.py
+"""
+部署检查（manage.py check --deploy）。
+
+摘要任务状态、自动保存的草稿与锁、响应缓存的代数都保存在缓存中，由后续的请求读取。
+多进程部署（如 gunicorn 的多个 worker）时，进程内缓存 (LocMemCache、DummyCache) 在各进程中互不相通，请求落到其它进程就读不到数据。
+单进程部署可以把对应的检查 ID 加入 SILENCED_SYSTEM_CHECKS。
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+LOCMEM_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+PROCESS_LOCAL_BACKENDS = (
+    LOCMEM_BACKEND,
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_process_local(alias):
+    return settings.CACHES.get(alias, {}).get('BACKEND') in PROCESS_LOCAL_BACKENDS
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_caches(app_configs, **kwargs):
+    errors = []
+    if is_process_local('default'):
+        errors.append(Error(
+            "摘要任务状态保存在进程内缓存 CACHES['default'] 中，多进程部署时轮询会返回“任务不存在或已过期”。",
+            hint="把 CACHES['default'] 改为共享缓存（如 RedisCache）；单进程部署可以忽略本检查。",
+            id='articles.E001',
+        ))
+    from . import autosave
+    alias = autosave.get_settings()['CACHE']
+    if is_process_local(alias):
+        errors.append(Error(
+            f"自动保存的草稿、锁与版本号保存在进程内缓存 CACHES['{alias}'] 中，"
+            "多进程部署时各进程的草稿互不相通，会出现虚假的 409 并在写入时丢失修改。",
+            hint="把 ARTICLE_AUTOSAVE['CACHE'] 指向共享缓存（如 RedisCache）；单进程部署可以忽略本检查。",
+            id='articles.E002',
+        ))
+    from . import response_cache
+    options = response_cache.get_settings()
+    # DummyCache 不保存任何响应，不会返回旧数据
+    if options['ENABLED'] and settings.CACHES.get(options['CACHE'], {}).get('BACKEND') == LOCMEM_BACKEND:
+        errors.append(Error(
+            f"响应缓存的代数保存在进程内缓存 CACHES['{options['CACHE']}'] 中，只在处理写请求的进程内递增，"
+            f"多进程部署时其它进程会在 TIMEOUT（{options['TIMEOUT']} 秒）内继续返回旧的列表与详情。",
+            hint="把 RESPONSE_CACHE['CACHE'] 指向共享缓存（如 RedisCache），或设置 RESPONSE_CACHE['ENABLED'] = False；"
+                 "单进程部署可以忽略本检查。",
+            id='articles.E003',
+        ))
+    return errors
@@ -0,0 +1,85 @@
+# articles/fake_data.py
+"""
+seed_data 使用的伪文本生成。
+
+这里的函数不访问数据库，可以在进程池中并行执行。每个数据块使用独立的种子，
+因此生成结果只取决于 --seed 和块序号，与进程数无关。
+"""
+import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from faker import Faker # 用于生成伪数据，需要安装: pip install Faker
+
+PARAGRAPH_POOL_MIN = 50
+
+
+def make_faker(seed):
+    fake = Faker('zh_CN') # 使用中文伪数据
+    fake.seed_instance(seed)
+    return fake
+
+
+def _ensure_django():
+    # 以 spawn 方式启动的子进程需要自行初始化 Django 才能导入 articles.search
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def article_texts(seed, count, with_segments=True):
+    """
+    返回 count 篇文章的 {title, content, excerpt[, segments]}。
+    正文由本块的段落池随机组合而成：生成与分词是造数的主要开销，每个段落只生成、分词一次。
+    段落之间以空行分隔，分词不会跨段，因此正文的分词结果等于各段分词结果的拼接。
+    """
+    fake = make_faker(seed)
+    rng = random.Random(seed)
+    if with_segments:
+        _ensure_django()
+        from .search import segment
+    pool = [fake.paragraph(nb_sentences=rng.randint(5, 15)) for _ in range(max(PARAGRAPH_POOL_MIN, count // 2))]
+    pool_segments = [segment(paragraph) for paragraph in pool] if with_segments else None
+
+    rows = []
+    for _ in range(count):
+        picks = rng.sample(range(len(pool)), rng.randint(3, 7))
+        sentences = [s for s in pool[picks[0]].split('.') if s]
+        row = {
+            'title': fake.sentence(nb_words=rng.randint(4, 10)).rstrip('.'),
+            'content': '\n\n'.join(pool[i] for i in picks),
+            'excerpt': '.'.join(sentences[:2]) + '.' if sentences else '',
+        }
+        if with_segments:
+            row['segments'] = {
+                'title': segment(row['title']),
+                'excerpt': segment(row['excerpt']),
+                'content': ' '.join(pool_segments[i] for i in picks),
+            }
+        rows.append(row)
+    return rows
+
+
+def comment_texts(seed, count):
+    fake = make_faker(seed)
+    rng = random.Random(seed)
+    return [fake.sentence(nb_words=rng.randint(5, 25)) for _ in range(count)]
+
+
+def generate(func, jobs, workers=0):
+    """
+    按顺序产出 func(*job) 的结果。workers > 1 时在进程池中执行，
+    同时在途的任务数限制为 workers * 2，避免生成速度超过写库速度时占满内存。
+    """
+    if workers <= 1:
+        for job in jobs:
+            yield func(*job)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for job in jobs:
+            pending.append(executor.submit(func, *job))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,212 @@
+# articles/images.py
+"""
+文章封面图片处理。
+
+- 上传校验：格式、文件大小、像素数（防止解压炸弹），见 validate_cover_image；
+- 按内容寻址存储：文件名为内容的 SHA-256（article_covers/ab/abcd….jpg），相同图片只存一份；
+- 缩略图：按 COVER_IMAGES['WIDTHS'] 生成 WebP 与 JPEG 两种格式的变体，
+  保存在 article_covers/variants/<摘要>/<宽度>.<扩展名>。变体在后台线程池中生成，不占用请求；
+  生成后写入 Article.cover_variants，序列化器据此输出 srcset，不需要访问存储。
+
+变体尚未生成时 cover_variants 为空，前端回退到原图。
+WORKERS 为 0 时在事务提交后同步生成（测试或调试时使用）。
+"""
+import hashlib
+import io
+import logging
+import os
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db import connection, models
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'WIDTHS': (320, 640, 1280),
+    'FORMATS': ('webp', 'jpeg'),
+    'QUALITY': 80,
+    'MAX_UPLOAD_SIZE': 10 * 1024 * 1024,
+    'MAX_PIXELS': 40_000_000,
+    'WORKERS': 2,
+}
+
+ALLOWED_FORMATS = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp', 'GIF': '.gif'}
+VARIANT_EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+VARIANTS_DIR = 'variants'
+
+_executor = None
+_executor_lock = threading.Lock()
+_inflight = set()
+
+
+def get_settings():
+    return {**DEFAULTS, **getattr(settings, 'COVER_IMAGES', {})}
+
+
+def validate_cover_image(file):
+    if getattr(file, '_committed', False): # 已保存的图片（编辑文章时未重新上传）
+        return
+    options = get_settings()
+    if file.size > options['MAX_UPLOAD_SIZE']:
+        raise ValidationError(f'图片不能超过 {options["MAX_UPLOAD_SIZE"] // (1024 * 1024)} MB。')
+    position = file.tell() if hasattr(file, 'tell') else 0
+    try:
+        file.seek(0)
+        with Image.open(file) as image: # 只读取文件头
+            image_format, (width, height) = image.format, image.size
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError('无法识别的图片文件。')
+    finally:
+        file.seek(position)
+    if image_format not in ALLOWED_FORMATS:
+        raise ValidationError(f'不支持的图片格式：{image_format}。')
+    if width * height > options['MAX_PIXELS']:
+        raise ValidationError('图片分辨率过大。')
+
+
+def content_name(upload_to, file):
+    """按文件内容计算存储名"""
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    digest = digest.hexdigest()
+    extension = os.path.splitext(file.name)[1].lower()
+    extension = '.jpg' if extension == '.jpeg' else extension
+    return posixpath.join(upload_to, digest[:2], digest + extension)
+
+
+class ContentAddressedImageField(models.ImageField):
+    """
+    按内容寻址保存上传的图片，存储中已有相同内容时直接引用，不再写入。
+    variants_field 指定的字段在图片变化时清空；它必须定义在本字段之后，
+    保存时才能取到清空后的值。
+    """
+
+    def __init__(self, *args, variants_field=None, **kwargs):
+        self.variants_field = variants_field
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.variants_field:
+            kwargs['variants_field'] = self.variants_field
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        file = getattr(model_instance, self.attname)
+        if file and not file._committed:
+            name = content_name(self.upload_to, file)
+            if not self.storage.exists(name):
+                name = self.storage.save(name, file.file, max_length=self.max_length)
+            file.name = name
+            file._committed = True
+            if self.variants_field:
+                setattr(model_instance, self.variants_field, {})
+        return file
+
+
+def variant_name(source, width, image_format):
+    digest = posixpath.splitext(posixpath.basename(source))[0]
+    directory = posixpath.join(posixpath.dirname(posixpath.dirname(source)), VARIANTS_DIR, digest)
+    return posixpath.join(directory, f'{width}.{VARIANT_EXTENSIONS[image_format]}')
+
+
+def _encode(image, width, image_format, quality):
+    height = max(1, round(image.height * width / image.width))
+    resized = image.resize((width, height), Image.LANCZOS) if width != image.width else image
+    if image_format == 'jpeg' and resized.mode != 'RGB':
+        # JPEG 不支持透明通道，铺白底
+        background = Image.new('RGB', resized.size, 'white')
+        background.paste(resized, mask=resized.getchannel('A') if 'A' in resized.getbands() else None)
+        resized = background
+    buffer = io.BytesIO()
+    resized.save(buffer, image_format.upper(), quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def generate_variants(source, storage, force=False):
+    """为存储中的一张图片生成各宽度的变体，返回写入 cover_variants 的字典"""
+    options = get_settings()
+    with storage.open(source, 'rb') as file, Image.open(file) as image:
+        image = ImageOps.exif_transpose(image) # 按 EXIF 方向摆正，变体不再携带 EXIF
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+        # 不放大：宽度超过原图的档位用原图宽度代替
+        widths = sorted({min(width, image.width) for width in options['WIDTHS']})
+        for image_format in options['FORMATS']:
+            for width in widths:
+                name = variant_name(source, width, image_format)
+                if force or not storage.exists(name):
+                    if storage.exists(name):
+                        storage.delete(name)
+                    storage.save(name, ContentFile(_encode(image, width, image_format, options['QUALITY'])))
+    return {'source': source, 'widths': widths, 'formats': list(options['FORMATS'])}
+
+
+def srcset(variants, storage, build_url=None):
+    """{'webp': 'url 320w, url 640w', 'jpeg': ...}，变体未生成时返回 None"""
+    if not variants:
+        return None
+    build_url = build_url or (lambda url: url)
+    return {
+        image_format: ', '.join(
+            f'{build_url(storage.url(variant_name(variants["source"], width, image_format)))} {width}w'
+            for width in variants['widths']
+        )
+        for image_format in variants['formats']
+    }
+
+
+def process_cover(source, force=False):
+    """生成变体并更新所有引用这张图片的文章"""
+    from . import response_cache
+    from .models import Article
+
+    storage = Article._meta.get_field('cover_image').storage
+    variants = generate_variants(source, storage, force=force)
+    # 变体改变了文章的表示 (cover_srcset)，同时更新 updated_at，条件请求的 ETag 与 Last-Modified 随之变化
+    if Article.objects.filter(cover_image=source).update(cover_variants=variants, updated_at=timezone.now()):
+        response_cache.invalidate('article')
+    return variants
+
+
+def _run(source):
+    try:
+        process_cover(source)
+    except Exception:
+        logger.exception('生成封面变体失败：%s', source)
+    finally:
+        with _executor_lock:
+            _inflight.discard(source)
+        connection.close() # 工作线程自己的数据库连接
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=get_settings()['WORKERS'], thread_name_prefix='cover-image'
+                )
+    return _executor
+
+
+def schedule_variants(source):
+    """提交后台任务；同一图片正在处理时不重复提交"""
+    if not get_settings()['WORKERS']:
+        process_cover(source)
+        return
+    with _executor_lock:
+        if source in _inflight:
+            return
+        _inflight.add(source)
+    get_executor().submit(_run, source)
@@ -0,0 +1,231 @@
+# articles/instrumentation.py
+"""
+请求级耗时统计：SQL 数量与耗时、视图、序列化、渲染时间。
+
+ServerTimingMiddleware 按采样率挑选请求，在这些请求上：
+- 通过 connection.execute_wrapper 统计每条 SQL 的耗时，超过阈值的写入慢查询日志（附 SQL 与调用位置）；
+- 记录视图执行时间（process_view 到视图返回）和响应渲染时间（DRF Response 的 render）；
+- 序列化时间由 TimedSerializerMixin 记录（只计最外层序列化器，嵌套的不重复计算）；
+- 结果以 JSON 形式输出一行 INFO 日志（logger: articles.timing，默认配置下不输出）；
+  Server-Timing 响应头暴露了 SQL 数量与各阶段耗时，只在 DEBUG、EXPOSE_HEADER 开启或管理员请求时发送。
+
+未被采样的请求只多一次随机数判断，可以在生产环境按较低采样率常开。
+注意各项是包含关系：view 包含其中的 db 与 serialize 时间。
+
+中间件同时支持同步与异步调用，ASGI 下不会迫使异步视图回到线程中执行。
+SQL 统计的包装函数在每个数据库连接上只安装一次，按 contextvar 找到当前请求；
+异步 ORM 在线程中执行查询时 contextvar 会被带入线程，同样能计入。
+"""
+import contextvars
+import json
+import logging
+import random
+import time
+import traceback
+from contextlib import contextmanager
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger('articles.timing')
+
+DEFAULTS = {
+    'ENABLED': True,
+    'SAMPLE_RATE': 0.05,
+    'SLOW_QUERY_MS': 100,
+    'MAX_SQL_LENGTH': 2000,
+    'EXPOSE_HEADER': False, # 为 True 时对所有客户端发送 Server-Timing
+}
+
+_current = contextvars.ContextVar('request_timing', default=None)
+
+
+def get_settings():
+    return {**DEFAULTS, **getattr(settings, 'REQUEST_TIMING', {})}
+
+
+def _stack_hint():
+    """返回最近一个项目代码的调用位置，用于定位慢查询的来源"""
+    base_dir = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()[:-3]):
+        if frame.filename.startswith(base_dir) and frame.filename != __file__:
+            return f'{frame.filename[len(base_dir) + 1:]}:{frame.lineno} in {frame.name}'
+    return None
+
+
+class RequestTiming:
+    def __init__(self, options):
+        self.slow_query_ms = options['SLOW_QUERY_MS']
+        self.max_sql_length = options['MAX_SQL_LENGTH']
+        self.queries = 0
+        self.spans = {'db': 0.0}
+        self._depth = {}
+        self.view_started = None
+
+    def add(self, name, seconds):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    @contextmanager
+    def span(self, name):
+        # 同名计时可以嵌套（如嵌套序列化器），只统计最外层
+        depth = self._depth.get(name, 0)
+        self._depth[name] = depth + 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth[name] = depth
+            if depth == 0:
+                self.add(name, time.perf_counter() - started)
+
+    def execute(self, execute, sql, params, many, context):
+        """connection.execute_wrapper 的回调"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.add('db', elapsed)
+            if elapsed * 1000 >= self.slow_query_ms:
+                logger.warning(json.dumps({
+                    'event': 'slow_query',
+                    'duration_ms': round(elapsed * 1000, 2),
+                    'alias': context['connection'].alias,
+                    'sql': sql[:self.max_sql_length],
+                    'where': _stack_hint(),
+                }, ensure_ascii=False))
+
+    def end_view(self):
+        if self.view_started is not None and 'view' not in self.spans:
+            self.add('view', time.perf_counter() - self.view_started)
+
+    def header(self):
+        metrics = [f'db;dur={self.spans["db"] * 1000:.2f};desc="{self.queries} queries"']
+        for name in ('view', 'serialize', 'render', 'total'):
+            if name in self.spans:
+                metrics.append(f'{name};dur={self.spans[name] * 1000:.2f}')
+        return ', '.join(metrics)
+
+    def as_dict(self):
+        data = {f'{name}_ms': round(seconds * 1000, 2) for name, seconds in self.spans.items()}
+        data['queries'] = self.queries
+        return data
+
+
+def _timed_execute(execute, sql, params, many, context):
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    return timing.execute(execute, sql, params, many, context)
+
+
+def install_execute_wrapper(sender=None, connection=None, **kwargs):
+    if _timed_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_timed_execute)
+
+
+connection_created.connect(install_execute_wrapper)
+
+
+class TimedSerializerMixin:
+    """记录序列化耗时。列表序列化时逐项计时并累加"""
+
+    def to_representation(self, instance):
+        timing = _current.get()
+        if timing is None:
+            return super().to_representation(instance)
+        with timing.span('serialize'):
+            return super().to_representation(instance)
+
+
+class ServerTimingMiddleware:
+    """应放在 MIDDLEWARE 的最前面，total 才能覆盖其余中间件"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timing = self.start()
+        if timing is None:
+            return self.get_response(request)
+        token = _current.set(timing)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timing, started)
+
+    async def __acall__(self, request):
+        timing = self.start()
+        if timing is None:
+            return await self.get_response(request)
+        token = _current.set(timing)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timing, started)
+
+    @staticmethod
+    def start():
+        options = get_settings()
+        if not options['ENABLED'] or random.random() >= options['SAMPLE_RATE']:
+            return None
+        # 连接在信号注册之前就已建立时（如启动检查），在这里补装
+        for alias in connections:
+            install_execute_wrapper(connection=connections[alias])
+        return RequestTiming(options)
+
+    @staticmethod
+    def expose_header(request):
+        if settings.DEBUG or get_settings()['EXPOSE_HEADER']:
+            return True
+        # JWT 用户由 DRF 在视图中认证后写回 request.user
+        user = getattr(request, 'user', None)
+        return bool(user is not None and user.is_staff)
+
+    @classmethod
+    def finish(cls, request, response, timing, started):
+        timing.end_view() # 非模板响应（如流式下载）没有经过 process_template_response
+        timing.add('total', time.perf_counter() - started)
+
+        if cls.expose_header(request):
+            response['Server-Timing'] = timing.header()
+        logger.info(json.dumps({
+            'event': 'request',
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            **timing.as_dict(),
+        }, ensure_ascii=False))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timing = _current.get()
+        if timing is not None:
+            timing.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        timing = _current.get()
+        if timing is not None:
+            timing.end_view()
+            if response.is_rendered: # 已在视图内渲染（如响应缓存写入前），耗时计入 view
+                return response
+            render_started = time.perf_counter()
+
+            def record_render(rendered):
+                timing.add('render', time.perf_counter() - render_started)
+
+            response.add_post_render_callback(record_render)
+        return response
@@ -0,0 +1,151 @@
+# articles/management/commands/benchmark_api.py
+import datetime
+import io
+import json
+import subprocess
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from articles import benchmark
+from articles.models import Article
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks the main read endpoints and reports throughput, latency percentiles and SQL query counts. '
+        'With --scales the database is re-seeded (destructively) at each scale before measuring.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', type=int, nargs='+', help='依次用 seed_data 生成这些数量的文章后压测（会清空现有文章数据）')
+        parser.add_argument('--requests', type=int, default=200, help='每个场景的请求数')
+        parser.add_argument('--concurrency', type=int, default=1, help='并发请求数')
+        parser.add_argument('--warmup', type=int, default=5, help='每个场景正式计时前的预热请求数')
+        parser.add_argument('--scenario', action='append', dest='scenarios', help='只运行指定场景，可重复')
+        parser.add_argument('--url', help='压测运行中的服务（如 http://127.0.0.1:8000），默认在进程内调用')
+        parser.add_argument('--response-cache', action='store_true', help='进程内模式下保留匿名响应缓存（默认关闭以测量实际查询开销）')
+        parser.add_argument('--seed', type=int, default=42, help='造数的随机种子')
+        parser.add_argument('--workers', type=int, default=0, help='造数时生成文本的进程数')
+        parser.add_argument('--output', '-o', help='结果 JSON 的保存路径')
+        parser.add_argument('--baseline', help='与之比较的基线结果 JSON')
+        parser.add_argument('--threshold', type=float, default=10.0, help='判定为退化的变化百分比')
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive', help='使用 --scales 时不再确认')
+
+    def handle(self, *args, **options):
+        if options['url'] and options['scales']:
+            # 造数在当前进程的数据库上进行，必须与被压测的服务是同一个库，这里无法确认
+            self.stdout.write(self.style.WARNING('--scales seeds the database configured for this process; make sure the server uses it too.'))
+        if options['scales'] and options['interactive']:
+            answer = input('This will DELETE all articles, comments and categories. Type "yes" to continue: ')
+            if answer != 'yes':
+                raise CommandError('Benchmark cancelled.')
+
+        if options['url']:
+            transport = benchmark.HTTPTransport(options['url'])
+        else:
+            transport = benchmark.InProcessTransport()
+
+        results = {}
+        scales = options['scales'] or [None]
+        # 进程内调用需要放行测试客户端的主机名
+        overrides = {'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver']}
+        if not options['response_cache']:
+            overrides['RESPONSE_CACHE'] = {**getattr(settings, 'RESPONSE_CACHE', {}), 'ENABLED': False}
+        with override_settings(**overrides):
+            try:
+                for scale in scales:
+                    if scale is not None:
+                        self.seed(scale, options)
+                    label = str(scale if scale is not None else Article.objects.count())
+                    results[label] = self.run_scale(transport, label, options)
+            finally:
+                transport.close()
+
+        report = {
+            'meta': {
+                'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                'commit': self.git_commit(),
+                'database': connection.vendor,
+                'mode': 'http' if options['url'] else 'in-process',
+                'requests': options['requests'],
+                'concurrency': options['concurrency'],
+                'response_cache': bool(options['url'] or options['response_cache']),
+            },
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}."))
+        if options['baseline']:
+            self.report_comparison(results, options)
+
+    def seed(self, scale, options):
+        self.stdout.write(f'Seeding {scale} articles...')
+        call_command(
+            'seed_data',
+            users=max(10, scale // 100),
+            articles=scale,
+            comments=scale * 3,
+            seed=options['seed'],
+            workers=options['workers'],
+            stdout=io.StringIO() if options['verbosity'] < 2 else self.stdout,
+        )
+
+    def run_scale(self, transport, label, options):
+        scenarios = benchmark.build_scenarios()
+        if options['scenarios']:
+            unknown = set(options['scenarios']) - scenarios.keys()
+            if unknown:
+                raise CommandError(f"Unknown or unavailable scenarios: {', '.join(sorted(unknown))}")
+            scenarios = {name: scenarios[name] for name in options['scenarios']}
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Scale: {label} articles'))
+        self.stdout.write(f"  {'scenario':<24}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}{'errors':>8}")
+        results = {}
+        for name, path in scenarios.items():
+            result = benchmark.run_scenario(
+                transport, path, options['requests'], options['concurrency'], warmup=options['warmup'],
+            )
+            results[name] = result
+            queries = '-' if result['queries'] is None else f"{result['queries']:g}"
+            self.stdout.write(
+                f"  {name:<24}{result['throughput']:>10.1f}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+                f"{result['p99_ms']:>10.2f}{queries:>9}{result['errors']:>8}"
+            )
+        return results
+
+    def report_comparison(self, results, options):
+        try:
+            baseline = benchmark.load_results(options['baseline'])
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f'Cannot read baseline: {e}')
+        rows = benchmark.compare(results, baseline, options['threshold'])
+        if not rows:
+            self.stdout.write(self.style.WARNING('No matching scales/scenarios in the baseline.'))
+            return
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Compared with {options['baseline']}"))
+        regressions = 0
+        for scale, name, metric, old, new, change, regressed in rows:
+            line = f'  {scale:>8} {name:<24}{metric:<12}{old:>10g} -> {new:<10g}{change:+7.1f}%'
+            if regressed:
+                regressions += 1
+                self.stdout.write(self.style.ERROR(line + '  REGRESSION'))
+            elif options['verbosity'] >= 2:
+                self.stdout.write(line)
+        if regressions:
+            self.stdout.write(self.style.ERROR(f"{regressions} metric(s) regressed by more than {options['threshold']:g}%."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"No regressions beyond {options['threshold']:g}%."))
+
+    @staticmethod
+    def git_commit():
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
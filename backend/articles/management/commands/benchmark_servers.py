@@ -0,0 +1,166 @@
+# articles/management/commands/benchmark_servers.py
+import datetime
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from articles import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares concurrent-request throughput of the WSGI (gunicorn) and ASGI (uvicorn) deployments: '
+        'the synchronous API on both servers and the /api/async/ endpoints on the ASGI server. '
+        'Servers are started with the current settings unless --wsgi-url/--asgi-url point to running ones.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 16, 64], help='依次测试的并发数')
+        parser.add_argument('--requests', type=int, default=500, help='每个场景、每个并发数的请求数')
+        parser.add_argument('--warmup', type=int, default=10, help='正式计时前的预热请求数')
+        parser.add_argument('--scenario', action='append', dest='scenarios', help='只运行指定场景，可重复')
+        parser.add_argument('--wsgi-url', help='使用已运行的 WSGI 服务，不再启动 gunicorn')
+        parser.add_argument('--asgi-url', help='使用已运行的 ASGI 服务，不再启动 uvicorn')
+        parser.add_argument('--workers', type=int, default=2, help='两种服务各自的进程数')
+        parser.add_argument('--threads', type=int, default=4, help='gunicorn 每个进程的线程数')
+        parser.add_argument('--port', type=int, default=8100, help='启动服务使用的端口（WSGI 用该端口，ASGI 用下一个）')
+        parser.add_argument('--username', help='用于摘要场景的账号；不提供时跳过摘要场景')
+        parser.add_argument('--password', help='摘要场景账号的密码')
+        parser.add_argument('--timeout', type=float, default=60, help='单个请求的超时秒数')
+        parser.add_argument('--output', '-o', help='结果 JSON 的保存路径')
+
+    def handle(self, *args, **options):
+        scenarios = benchmark.build_scenarios()
+        if options['scenarios']:
+            unknown = set(options['scenarios']) - scenarios.keys()
+            if unknown:
+                raise CommandError(f"Unknown or unavailable scenarios: {', '.join(sorted(unknown))}")
+            scenarios = {name: scenarios[name] for name in options['scenarios']}
+
+        servers = []
+        try:
+            wsgi_url = options['wsgi_url'] or self.start_server(servers, 'gunicorn', [
+                'backend_project.wsgi:application', '--bind', f"127.0.0.1:{options['port']}",
+                '--workers', str(options['workers']), '--threads', str(options['threads']), '--log-level', 'warning',
+            ], options['port'])
+            asgi_url = options['asgi_url'] or self.start_server(servers, 'uvicorn', [
+                'backend_project.asgi:application', '--host', '127.0.0.1', '--port', str(options['port'] + 1),
+                '--workers', str(options['workers']), '--log-level', 'warning', '--no-access-log',
+            ], options['port'] + 1)
+            plan = self.build_plan(scenarios, wsgi_url, asgi_url, options)
+            results = {}
+            for concurrency in options['concurrency']:
+                results[str(concurrency)] = self.run_level(plan, concurrency, options)
+        finally:
+            for process, log in servers:
+                process.terminate()
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                log.close()
+
+        if options['output']:
+            report = {
+                'meta': {
+                    'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                    'requests': options['requests'],
+                    'workers': options['workers'],
+                    'threads': options['threads'],
+                    'wsgi_url': options['wsgi_url'],
+                    'asgi_url': options['asgi_url'],
+                },
+                'results': results,
+            }
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}."))
+
+    def start_server(self, servers, program, arguments, port):
+        executable = shutil.which(program)
+        if executable is None:
+            raise CommandError(f'{program} is not installed; install it or pass an already running server URL.')
+        log = tempfile.TemporaryFile()
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'backend_project.settings')}
+        process = subprocess.Popen(
+            [executable, *arguments], cwd=settings.BASE_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+        servers.append((process, log))
+        url = f'http://127.0.0.1:{port}'
+        self.wait_until_ready(process, log, url, program)
+        self.stdout.write(f'Started {program} at {url} (pid {process.pid}).')
+        return url
+
+    @staticmethod
+    def wait_until_ready(process, log, url, program, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                log.seek(0)
+                output = log.read().decode(errors='replace')[-2000:]
+                raise CommandError(f'{program} exited with code {process.returncode}:\n{output}')
+            try:
+                with urllib.request.urlopen(url + '/api/articles/', timeout=2):
+                    return
+            except urllib.error.HTTPError:
+                return # 已能响应
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f'{program} did not start within {timeout} seconds.')
+
+    def build_plan(self, scenarios, wsgi_url, asgi_url, options):
+        """返回 [(场景, 部署, 服务地址, 路径, 请求函数)]"""
+        plan = []
+        for name, path in scenarios.items():
+            plan.append((name, 'wsgi', wsgi_url, path, benchmark.get_operation(path)))
+            plan.append((name, 'asgi', asgi_url, path, benchmark.get_operation(path)))
+            async_path = benchmark.async_path(path)
+            if async_path:
+                plan.append((name, 'asgi-async', asgi_url, async_path, benchmark.get_operation(async_path)))
+
+        if options['username']:
+            for deployment, url, path, poll in (
+                ('wsgi', wsgi_url, '/api/generate-summary/', True),
+                ('asgi', asgi_url, '/api/generate-summary/', True),
+                ('asgi-async', asgi_url, '/api/async/generate-summary/', False),
+            ):
+                token = self.obtain_token(url, options)
+                plan.append(('summary', deployment, url, path, benchmark.summary_operation(path, token, poll=poll)))
+        else:
+            self.stdout.write(self.style.WARNING('No --username given; skipping the summary scenario.'))
+        return plan
+
+    @staticmethod
+    def obtain_token(url, options):
+        request = urllib.request.Request(
+            url + '/api/token/',
+            data=json.dumps({'username': options['username'], 'password': options['password'] or ''}).encode(),
+            headers={'Content-Type': 'application/json'},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                return json.load(response)['access']
+        except urllib.error.HTTPError as e:
+            raise CommandError(f'Cannot log in to {url}: HTTP {e.code}')
+
+    def run_level(self, plan, concurrency, options):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Concurrency: {concurrency}'))
+        self.stdout.write(f"  {'scenario':<24}{'deployment':<12}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+        results = {}
+        for name, deployment, url, path, operation in plan:
+            result = benchmark.run_http_load(
+                url, path, operation, options['requests'], concurrency,
+                warmup=options['warmup'], timeout=options['timeout'],
+            )
+            results.setdefault(name, {})[deployment] = result
+            self.stdout.write(
+                f"  {name:<24}{deployment:<12}{result['throughput']:>10.1f}{result['p50_ms']:>10.2f}"
+                f"{result['p95_ms']:>10.2f}{result['errors']:>8}"
+            )
+        return results
@@ -0,0 +1,48 @@
+# articles/management/commands/export_articles.py
+import sys
+import time
+from django.core.management.base import BaseCommand
+from articles.models import Article
+from articles.transfer import iter_ndjson, iter_records
+
+
+class Command(BaseCommand):
+    help = 'Streams all articles (with author, category path and comments) as NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', default='-', help='输出文件路径，默认输出到标准输出；以 .gz 结尾时自动压缩')
+        parser.add_argument('--gzip', action='store_true', help='使用 gzip 压缩输出')
+        parser.add_argument('--status', choices=[value for value, _ in Article.STATUS_CHOICES], help='只导出指定状态的文章')
+        parser.add_argument('--chunk-size', type=int, default=500, help='每批从数据库读取的文章数')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        compress = options['gzip'] or output.endswith('.gz')
+        queryset = Article.objects.all()
+        if options['status']:
+            queryset = queryset.filter(status=options['status'])
+
+        started = time.monotonic()
+        count = 0
+
+        def records():
+            nonlocal count
+            for record in iter_records(queryset, chunk_size=options['chunk_size']):
+                count += 1
+                yield record
+
+        stream = sys.stdout.buffer if output == '-' else open(output, 'wb')
+        try:
+            for chunk in iter_ndjson(records(), compress=compress):
+                stream.write(chunk)
+        finally:
+            if stream is not sys.stdout.buffer:
+                stream.close()
+            else:
+                stream.flush()
+
+        elapsed = time.monotonic() - started
+        rate = count / elapsed if elapsed else 0
+        # 输出到标准输出时统计信息写到 stderr，避免混入数据
+        log = self.stderr if output == '-' else self.stdout
+        log.write(self.style.SUCCESS(f'Exported {count} articles in {elapsed:.1f}s ({rate:.0f} rows/s).'))
@@ -0,0 +1,78 @@
+# articles/management/commands/generate_cover_variants.py
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from django.core.management.base import BaseCommand
+from django.db import connection
+from articles import images
+from articles.models import Article
+
+CONTENT_ADDRESSED = re.compile(r'/[0-9a-f]{2}/[0-9a-f]{64}\.\w+$')
+
+
+class Command(BaseCommand):
+    help = 'Moves existing article covers to content-addressed storage and generates their thumbnail variants.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='并行生成变体的线程数，默认取 COVER_IMAGES["WORKERS"]')
+        parser.add_argument('--force', action='store_true', help='重新生成已有的变体')
+        parser.add_argument('--skip-rename', action='store_true', help='不把旧的封面文件改为按内容寻址存储')
+
+    def handle(self, *args, **options):
+        field = Article._meta.get_field('cover_image')
+        covers = Article.objects.exclude(cover_image='').exclude(cover_image__isnull=True)
+
+        if not options['skip_rename']:
+            legacy = {
+                name for name in covers.values_list('cover_image', flat=True).distinct()
+                if not CONTENT_ADDRESSED.search(name)
+            }
+            for name in sorted(legacy):
+                self.rename(field, name)
+
+        if options['force']:
+            sources = set(covers.values_list('cover_image', flat=True).distinct())
+        else:
+            sources = {
+                name for name, variants in covers.values_list('cover_image', 'cover_variants').iterator()
+                if variants.get('source') != name
+            }
+        if not sources:
+            self.stdout.write(self.style.SUCCESS('All covers already have variants.'))
+            return
+
+        workers = options['workers'] or images.get_settings()['WORKERS'] or 1
+        started = time.perf_counter()
+        done = failed = 0
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='cover-image') as executor:
+            futures = {executor.submit(self.process, name, options['force']): name for name in sorted(sources)}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    done += 1
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f'{futures[future]}: {e}')
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated variants for {done} images in {elapsed:.1f}s ({failed} failed).'
+        ))
+
+    def process(self, name, force):
+        try:
+            images.process_cover(name, force=force)
+        finally:
+            connection.close() # 工作线程自己的数据库连接
+
+    def rename(self, field, name):
+        """按内容重新保存旧封面，并让引用它的文章指向新文件；旧文件保留"""
+        storage = field.storage
+        if not storage.exists(name):
+            self.stderr.write(f'{name}: file not found, skipped')
+            return
+        with storage.open(name, 'rb') as file:
+            new_name = images.content_name(field.upload_to, file)
+            if not storage.exists(new_name):
+                new_name = storage.save(new_name, file, max_length=field.max_length)
+        Article.objects.filter(cover_image=name).update(cover_image=new_name, cover_variants={})
+        self.stdout.write(f'{name} -> {new_name}')
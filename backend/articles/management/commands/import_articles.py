@@ -0,0 +1,72 @@
+# articles/management/commands/import_articles.py
+import gzip
+import json
+import sys
+import time
+from django.core.management.base import BaseCommand, CommandError
+from articles.transfer import ArticleImporter
+
+
+class Command(BaseCommand):
+    help = 'Imports articles from an NDJSON export (optionally gzip-compressed) using batched bulk inserts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='NDJSON 文件路径，- 表示标准输入；以 .gz 结尾时按 gzip 读取')
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批校验与写入的记录数')
+        parser.add_argument('--no-create-categories', action='store_true', help='分类不存在时拒绝该记录，而不是自动创建')
+        parser.add_argument('--max-errors', type=int, default=20, help='最多打印的错误记录数')
+
+    def _open(self, path):
+        if path == '-':
+            return sys.stdin.buffer
+        if path.endswith('.gz'):
+            return gzip.open(path, 'rb')
+        return open(path, 'rb')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        importer = ArticleImporter(
+            batch_size=batch_size,
+            create_categories=not options['no_create_categories'],
+        )
+        started = time.monotonic()
+        try:
+            stream = self._open(options['path'])
+        except OSError as e:
+            raise CommandError(str(e))
+
+        batch = []
+        lines = 0
+        with stream:
+            for lineno, line in enumerate(stream, start=1):
+                if not line.strip():
+                    continue
+                lines += 1
+                try:
+                    batch.append((lineno, json.loads(line)))
+                except ValueError as e:
+                    importer.errors.append((lineno, f'无效的 JSON: {e}'))
+                    continue
+                if len(batch) >= batch_size:
+                    importer.import_batch(batch)
+                    batch = []
+                    self._progress(importer, started)
+            if batch:
+                importer.import_batch(batch)
+        importer.finish()
+
+        for lineno, error in importer.errors[:options['max_errors']]:
+            if not isinstance(error, str):
+                error = json.dumps(error, ensure_ascii=False)
+            self.stderr.write(f'line {lineno}: {error}')
+        elapsed = time.monotonic() - started
+        rate = importer.imported / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {importer.imported} of {lines} articles ({importer.comments} comments, '
+            f'{len(importer.errors)} rejected) in {elapsed:.1f}s ({rate:.0f} rows/s).'
+        ))
+
+    def _progress(self, importer, started):
+        elapsed = time.monotonic() - started
+        rate = importer.imported / elapsed if elapsed else 0
+        self.stdout.write(f'Imported {importer.imported} articles... ({rate:.0f} rows/s)')
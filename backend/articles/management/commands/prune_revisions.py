@@ -0,0 +1,47 @@
+# articles/management/commands/prune_revisions.py
+import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from articles import revisions
+from articles.models import ArticleRevision
+
+
+class Command(BaseCommand):
+    help = (
+        'Compacts old article revision history: keeps the newest revisions of each article, '
+        'thins older ones to the last revision of each day (or drops them with --drop) and re-encodes the rest.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep', type=int, default=None, help='每篇文章保留的最新版本数，默认取 ARTICLE_REVISIONS["PRUNE_KEEP"]')
+        parser.add_argument('--days', type=int, default=None, help='只压缩早于该天数的版本，默认取 ARTICLE_REVISIONS["PRUNE_AFTER_DAYS"]')
+        parser.add_argument('--drop', action='store_true', help='删除旧版本，而不是每天保留一个')
+        parser.add_argument('--article', type=int, action='append', dest='articles', help='只处理指定文章，可重复')
+        parser.add_argument('--dry-run', action='store_true', help='只统计将删除的版本数，不修改数据')
+
+    def handle(self, *args, **options):
+        config = revisions.get_settings()
+        keep = config['PRUNE_KEEP'] if options['keep'] is None else options['keep']
+        days = config['PRUNE_AFTER_DAYS'] if options['days'] is None else options['days']
+        if keep < 1:
+            raise CommandError('--keep must be at least 1 so that the current version is preserved.')
+        before = timezone.now() - datetime.timedelta(days=days)
+
+        candidates = ArticleRevision.objects.filter(created_at__lt=before)
+        if options['articles']:
+            candidates = candidates.filter(article_id__in=options['articles'])
+        article_ids = candidates.order_by('article_id').values_list('article_id', flat=True).distinct()
+
+        compacted = removed = 0
+        for article_id in article_ids.iterator():
+            with transaction.atomic():
+                count = revisions.compact(article_id, keep, before, daily=not options['drop'])
+                if options['dry_run']:
+                    transaction.set_rollback(True)
+            if count:
+                compacted += 1
+                removed += count
+
+        verb = 'Would remove' if options['dry_run'] else 'Removed'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {removed} revisions from {compacted} articles.'))
@@ -0,0 +1,24 @@
+# articles/management/commands/rebuild_search_index.py
+import time
+from django.core.management.base import BaseCommand
+from articles.models import Article
+from articles.search import index_article
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search documents for all articles.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='每批从数据库读取的文章数')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = 0
+        articles = Article.objects.only('id', 'title', 'excerpt', 'content').order_by('pk')
+        for article in articles.iterator(chunk_size=options['chunk_size']):
+            index_article(article)
+            count += 1
+            if count % 1000 == 0:
+                self.stdout.write(f'Indexed {count} articles...')
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} articles in {elapsed:.1f}s.'))
@@ -0,0 +1,30 @@
+# articles/management/commands/repair_comment_counters.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min, OuterRef
+from articles.models import Article, comment_counter_updates
+
+
+class Command(BaseCommand):
+    help = 'Recomputes Article.comment_count and Article.last_commented_at from the comments table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='每个事务处理的文章 ID 区间大小')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        bounds = Article.objects.aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['low'] is None:
+            self.stdout.write(self.style.WARNING('No articles found.'))
+            return
+
+        updated = 0
+        start = bounds['low']
+        while start <= bounds['high']:
+            # 按主键区间分批执行 UPDATE ... SET ... = (SELECT ...)，避免长事务锁住整张表
+            with transaction.atomic():
+                updated += Article.objects.filter(pk__gte=start, pk__lt=start + batch_size).update(
+                    **comment_counter_updates(OuterRef('pk'))
+                )
+            start += batch_size
+        self.stdout.write(self.style.SUCCESS(f'Recomputed comment counters for {updated} articles.'))
@@ -1,30 +1,128 @@
 # articles/management/commands/seed_data.py
+import datetime
 import random
+import time
+from array import array
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
+from django.db import models, transaction
 from django.utils import timezone
-from django.contrib.auth import get_user_model
-from articles.models import Category, Article, Comment
-from faker import Faker # 用于生成伪数据，需要安装: pip install Faker
+from articles import category_tree, response_cache
+from articles.fake_data import make_faker, article_texts, comment_texts, generate
+from articles.models import (
+    COMMENT_MAX_DEPTH, Article, Category, CategoryClosure, Comment, bulk_create_comments,
+)
+from articles.search import index_articles
 
 User = get_user_model()
-fake = Faker('zh_CN') # 使用中文伪数据
+
+SEED_USER_PREFIX = 'seed_user_'
+SEED_PASSWORD = 'testpassword123'
+# 三级分类结构
+CATEGORIES_DATA = [
+    {'name': '技术', 'children': [
+        {'name': '编程语言', 'children': [
+            {'name': 'Python'}, {'name': 'JavaScript'}, {'name': 'Java'}
+        ]},
+        {'name': '数据库', 'children': [
+            {'name': 'PostgreSQL'}, {'name': 'MySQL'}, {'name': 'MongoDB'}
+        ]},
+        {'name': 'Web开发'}
+    ]},
+    {'name': '生活', 'children': [
+        {'name': '美食', 'children': [
+            {'name': '中餐'}, {'name': '西餐'}
+        ]},
+        {'name': '旅行'}
+    ]},
+    {'name': '哲学'}
+]
+HISTORY_DAYS = 365 # 文章创建时间分布在过去一年内
+REPLY_RATIO = 0.3  # 评论中回复所占比例
+
+
+def cascade_order(*roots):
+    """
+    roots 及所有经 CASCADE 外键依赖它们的模型，依赖方排在前面。
+    按 _meta.related_objects 推导，新增的级联模型无需在这里登记。
+    """
+    order, seen = [], set()
+
+    def visit(model):
+        if model in seen:
+            return
+        seen.add(model)
+        for relation in model._meta.related_objects:
+            if getattr(relation, 'on_delete', None) is models.CASCADE:
+                visit(relation.related_model)
+        order.append(model)
+
+    for root in roots:
+        visit(root)
+    return order
+
 
 class Command(BaseCommand):
-    help = 'Seeds the database with sample data for articles, categories, and comments.'
+    help = 'Seeds the database with a deterministic dataset of users, categories, articles and comments.'
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5, help='普通用户数')
+        parser.add_argument('--articles', type=int, default=25, help='文章数')
+        parser.add_argument('--comments', type=int, default=50, help='评论数（只评论已发布的文章）')
+        parser.add_argument('--seed', type=int, default=42, help='随机种子，相同参数与种子生成相同的数据')
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批生成与写入的行数')
+        parser.add_argument('--workers', type=int, default=0, help='并行生成伪文本的进程数，0 表示在当前进程生成')
+        parser.add_argument('--skip-search-index', action='store_true', help='不生成检索文档（之后可运行 rebuild_search_index）')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.batch_size = options['batch_size']
+        self.rng = random.Random(options['seed'])
+        self.now = timezone.now()
+        started = time.monotonic()
         self.stdout.write(self.style.SUCCESS('Starting to seed data...'))
 
-        # 清理旧数据 (可选，但方便重复执行脚本)
+        self.clear()
+        user_ids = self.create_users(options['users'])
+        category_ids = self.create_categories()
+        published = self.create_articles(options['articles'], user_ids, category_ids)
+        self.create_comments(options['comments'], user_ids, published)
+
+        response_cache.invalidate('article')
+        response_cache.invalidate('comment')
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Successfully seeded data in {elapsed:.1f}s!'))
+
+    def _job_seed(self, kind, index):
+        # 每个数据块的文本种子只取决于 --seed、数据类型和块序号
+        return (self.options['seed'] * 1_000_003 + index) * 2 + kind
+
+    def _batches(self, total):
+        return [
+            (index, min(self.batch_size, total - start))
+            for index, start in enumerate(range(0, total, self.batch_size))
+        ]
+
+    def _progress(self, label, done, total, started):
+        elapsed = time.monotonic() - started
+        rate = done / elapsed if elapsed else 0
+        self.stdout.write(f'  {label}: {done}/{total} ({rate:.0f} rows/s)')
+
+    def clear(self):
         self.stdout.write('Clearing old data...')
-        Comment.objects.all().delete()
-        Article.objects.all().delete()
-        Category.objects.all().delete()
-        # User.objects.filter(is_superuser=False).delete() # 清除非超级用户，谨慎操作
+        with transaction.atomic():
+            # 直接按表删除：Comment 等模型注册了删除信号，QuerySet.delete() 会逐行加载对象，数据量大时非常慢。
+            # 依赖这些信号的缓存在下面统一失效。
+            for model in cascade_order(Article, Category):
+                model._base_manager.all()._raw_delete(model._base_manager.db)
+            User.objects.filter(username__startswith=SEED_USER_PREFIX).delete()
+        category_tree.invalidate()
+        response_cache.invalidate('category')
 
-        # --- 创建用户 ---
+    def create_users(self, count):
         self.stdout.write('Creating users...')
-        users = []
         # 创建一个管理员用户 (如果还没有)
         admin_user, created = User.objects.get_or_create(
             username='admin_seed',
@@ -39,126 +137,127 @@ class Command(BaseCommand):
             admin_user.set_password('adminpassword')
             admin_user.save()
             self.stdout.write(self.style.SUCCESS(f'Created admin user: {admin_user.username}'))
-        users.append(admin_user)
-
-
-        for i in range(5): # 创建 5 个普通用户
-            username = fake.user_name()
-            while User.objects.filter(username=username).exists(): # 确保用户名唯一
-                username = fake.user_name() + str(random.randint(1,100))
 
-            user, created = User.objects.get_or_create(
+        # 密码哈希很慢，所有造数用户共用同一个哈希值
+        password = make_password(SEED_PASSWORD)
+        fake = make_faker(self.options['seed'])
+        users = []
+        for i in range(1, count + 1):
+            username = f'{SEED_USER_PREFIX}{i:06d}'
+            users.append(User(
                 username=username,
-                defaults={
-                    'email': fake.email(),
-                    'first_name': fake.first_name(),
-                    'last_name': fake.last_name(),
-                    'is_frozen': random.choice([True, False, False]), # 随机冻结一些
-                }
-            )
-            if created:
-                user.set_password('testpassword123')
-                user.save()
-            users.append(user)
-        self.stdout.write(self.style.SUCCESS(f'Created {len(users)} users.'))
-
-
-        # --- 创建分类 (三级结构) ---
-        self.stdout.write('Creating categories...')
-        categories_data = [
-            {'name': '技术', 'children': [
-                {'name': '编程语言', 'children': [
-                    {'name': 'Python'}, {'name': 'JavaScript'}, {'name': 'Java'}
-                ]},
-                {'name': '数据库', 'children': [
-                    {'name': 'PostgreSQL'}, {'name': 'MySQL'}, {'name': 'MongoDB'}
-                ]},
-                {'name': 'Web开发'}
-            ]},
-            {'name': '生活', 'children': [
-                {'name': '美食', 'children': [
-                    {'name': '中餐'}, {'name': '西餐'}
-                ]},
-                {'name': '旅行'}
-            ]},
-            {'name': '哲学'}
-        ]
-
-        created_categories = {} # 用于存储创建的分类对象，方便后续查找
-
-        def create_categories_recursive(data_list, parent=None):
-            for cat_data in data_list:
-                category, created = Category.objects.get_or_create(
-                    name=cat_data['name'],
-                    defaults={'parent': parent}
-                )
-                created_categories[cat_data['name']] = category # 存储对象
-                if 'children' in cat_data:
-                    create_categories_recursive(cat_data['children'], parent=category)
-
-        create_categories_recursive(categories_data)
-        all_categories = list(Category.objects.all()) # 获取所有创建的分类
-        self.stdout.write(self.style.SUCCESS(f'Created {Category.objects.count()} categories.'))
-
-        if not all_categories:
-            self.stdout.write(self.style.WARNING('No categories created, articles might not have categories.'))
-            # 可以创建一个默认分类
-            default_cat, _ = Category.objects.get_or_create(name='未分类')
-            all_categories.append(default_cat)
+                email=f'{username}@example.com',
+                first_name=fake.first_name(),
+                last_name=fake.last_name(),
+                password=password,
+                is_frozen=self.rng.random() < 1 / 3, # 随机冻结一些
+            ))
+        User.objects.bulk_create(users, batch_size=self.batch_size)
+        user_ids = [admin_user.pk] + list(
+            User.objects.filter(username__startswith=SEED_USER_PREFIX).order_by('username').values_list('pk', flat=True)
+        )
+        self.stdout.write(self.style.SUCCESS(f'Created {count} users.'))
+        return user_ids
 
+    def create_categories(self):
+        """逐层 bulk_create，每层一条 INSERT；闭包表最后整体重建"""
+        self.stdout.write('Creating categories...')
+        level = [(data, None) for data in CATEGORIES_DATA]
+        total = 0
+        while level:
+            categories = [Category(name=data['name'], parent=parent) for data, parent in level]
+            Category.objects.bulk_create(categories)
+            total += len(categories)
+            level = [
+                (child, category)
+                for (data, _), category in zip(level, categories)
+                for child in data.get('children', [])
+            ]
+        CategoryClosure.objects.rebuild()
+        category_tree.invalidate()
+        response_cache.invalidate('category')
+        self.stdout.write(self.style.SUCCESS(f'Created {total} categories.'))
+        return list(Category.objects.order_by('pk').values_list('pk', flat=True))
 
-        # --- 创建文章 ---
+    def create_articles(self, total, user_ids, category_ids):
+        """返回已发布文章的 (主键数组, 创建时间戳数组)，用于生成评论"""
         self.stdout.write('Creating articles...')
-        num_articles = 25
-        for i in range(num_articles):
-            author = random.choice(users)
-            category = random.choice(all_categories) if all_categories else None
-            status = random.choice([Article.STATUS_CHOICES[0][0], Article.STATUS_CHOICES[1][0], Article.STATUS_CHOICES[1][0]]) # 更多已发布
-
-            title = fake.sentence(nb_words=random.randint(4, 10)).rstrip('.')
-            # 确保标题唯一性 (简单处理，对于大量数据可能需要更健壮的方法)
-            original_title = title
-            count = 0
-            while Article.objects.filter(title=title).exists():
-                count += 1
-                title = f"{original_title} ({count})"
-
+        with_segments = not self.options['skip_search_index']
+        batches = self._batches(total)
+        jobs = [(self._job_seed(0, index), count, with_segments) for index, count in batches]
+        statuses = [Article.STATUS_CHOICES[0][0], Article.STATUS_CHOICES[1][0], Article.STATUS_CHOICES[1][0]] # 更多已发布
+        published_ids, published_times = array('q'), array('d')
+        started = time.monotonic()
+        done = 0
+        for rows in generate(article_texts, jobs, self.options['workers']):
+            articles = []
+            for row in rows:
+                created_at = self.now - datetime.timedelta(seconds=self.rng.randrange(HISTORY_DAYS * 86400))
+                articles.append(Article(
+                    title=row['title'],
+                    content=row['content'],
+                    excerpt=row['excerpt'],
+                    author_id=self.rng.choice(user_ids),
+                    category_id=self.rng.choice(category_ids) if category_ids else None,
+                    status=self.rng.choice(statuses),
+                    created_at=created_at,
+                    updated_at=created_at,
+                ))
+            with transaction.atomic():
+                Article.objects.bulk_create(articles, batch_size=self.batch_size)
+                if with_segments:
+                    index_articles(articles, batch_size=self.batch_size, segments=[row['segments'] for row in rows])
+            for article in articles:
+                if article.status == 'published':
+                    published_ids.append(article.pk)
+                    published_times.append(article.created_at.timestamp())
+            done += len(articles)
+            self._progress('articles', done, total, started)
+        self.stdout.write(self.style.SUCCESS(f'Created {total} articles.'))
+        return published_ids, published_times
 
-            article_content_paragraphs = [fake.paragraph(nb_sentences=random.randint(5,15)) for _ in range(random.randint(3,7))]
-            article_content = "\n\n".join(article_content_paragraphs)
-
-            excerpt_sentences = random.sample(article_content_paragraphs[0].split('. '), k=min(2, len(article_content_paragraphs[0].split('. '))))
-            excerpt = ". ".join(excerpt_sentences) + "." if excerpt_sentences else ""
-
-
-            Article.objects.create(
-                title=title,
-                content=article_content,
-                excerpt=excerpt,
-                author=author,
-                category=category,
-                status=status,
-                # cover_image 稍后可以考虑添加
-            )
-        self.stdout.write(self.style.SUCCESS(f'Created {num_articles} articles.'))
-
-
-        # --- 创建评论 ---
+    def create_comments(self, total, user_ids, published):
         self.stdout.write('Creating comments...')
-        all_articles = list(Article.objects.filter(status='published')) # 只对已发布的文章评论
-        num_comments_total = 50
-        if all_articles:
-            for _ in range(num_comments_total):
-                article = random.choice(all_articles)
-                author = random.choice(users)
-                Comment.objects.create(
-                    article=article,
-                    author=author,
-                    content=fake.sentence(nb_words=random.randint(5, 25))
-                )
-            self.stdout.write(self.style.SUCCESS(f'Created {num_comments_total} comments.'))
-        else:
+        published_ids, published_times = published
+        if not published_ids:
             self.stdout.write(self.style.WARNING('No published articles to comment on.'))
-
-
-        self.stdout.write(self.style.SUCCESS('Successfully seeded data!'))
\ No newline at end of file
+            return
+        now = self.now.timestamp()
+        batches = self._batches(total)
+        jobs = [(self._job_seed(1, index), count) for index, count in batches]
+        started = time.monotonic()
+        done = 0
+        for texts in generate(comment_texts, jobs, self.options['workers']):
+            comments = []
+            by_article = {} # 本批内每篇文章的评论，用于挑选回复对象
+            for content in texts:
+                index = self.rng.randrange(len(published_ids))
+                article_id = published_ids[index]
+                siblings = by_article.setdefault(article_id, [])
+                parent = None
+                if siblings and self.rng.random() < REPLY_RATIO:
+                    parent = self.rng.choice(siblings)
+                    if parent.depth + 1 >= COMMENT_MAX_DEPTH:
+                        parent = None
+                earliest = parent.created_at.timestamp() if parent else published_times[index]
+                created_at = datetime.datetime.fromtimestamp(
+                    self.rng.uniform(earliest, min(now, earliest + 30 * 86400)), tz=datetime.timezone.utc
+                )
+                comment = Comment(
+                    article_id=article_id,
+                    author_id=self.rng.choice(user_ids),
+                    content=content,
+                    parent_comment=parent,
+                    depth=parent.depth + 1 if parent else 0,
+                    created_at=created_at,
+                    updated_at=created_at,
+                )
+                siblings.append(comment)
+                comments.append(comment)
+            with transaction.atomic():
+                bulk_create_comments(comments, batch_size=self.batch_size)
+            done += len(comments)
+            self._progress('comments', done, total, started)
+        self.stdout.write(self.style.SUCCESS(f'Created {total} comments.'))
+        # bulk_create 不经过 CommentViewSet，评论计数统一按区间回填
+        call_command('repair_comment_counters', batch_size=self.batch_size * 10, stdout=self.stdout)
@@ -0,0 +1,171 @@
+# articles/media.py
+"""
+生产环境下的封面图片 (MEDIA_ROOT/article_covers/) 下载。
+
+django.conf.urls.static 只在 DEBUG 下生效，逐块经 Python 读写且没有缓存头。这里的 serve_cover：
+- 按内容寻址的文件（原图与变体，见 articles.images）内容不会变化，返回强 ETag 与
+  Cache-Control: immutable，浏览器和 CDN 可以长期缓存；旧的非内容寻址文件缓存 MUTABLE_MAX_AGE 秒；
+- 处理 If-None-Match / If-Modified-Since（304）与单段 Range 请求（206 / 416），支持 If-Range；
+- MEDIA_DELIVERY['BACKEND'] 决定字节由谁发送：
+    'django'            由 FileResponse 发送，WSGI 服务器支持 wsgi.file_wrapper 时（如 gunicorn）
+                        使用 sendfile 零拷贝，Range 请求同样适用；
+    'x-accel-redirect'  交给 nginx（X-Accel-Redirect 指向 internal location，Range 由 nginx 处理）；
+    'x-sendfile'        交给 Apache mod_xsendfile / lighttpd。
+
+只适用于 FileSystemStorage。
+"""
+import mimetypes
+import os
+import re
+import stat
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+DEFAULTS = {
+    'BACKEND': 'django',
+    'X_ACCEL_PREFIX': '/protected-media/',
+    'MAX_AGE': 365 * 24 * 3600,
+    'MUTABLE_MAX_AGE': 3600,
+    'BLOCK_SIZE': 64 * 1024,
+}
+
+COVER_DIR = 'article_covers'
+# 原图 ab/<sha256>.ext 与变体 variants/<sha256>/<宽度>.ext
+CONTENT_ADDRESSED = re.compile(r'^(?:[0-9a-f]{2}/(?P<digest>[0-9a-f]{64})\.\w+|variants/[0-9a-f]{64}/\d+\.\w+)$')
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def get_settings():
+    return {**DEFAULTS, **getattr(settings, 'MEDIA_DELIVERY', {})}
+
+
+class FileRange:
+    """
+    只读出文件中 [start, start + length) 的部分。
+    保留 fileno()，WSGI 服务器的 sendfile 从当前偏移量开始发送 Content-Length 个字节
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """解析单段 Range，返回 (start, end)（含 end）；多段或无法解析时返回 None，按整个文件响应"""
+    match = RANGE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '': # 后缀形式：bytes=-500 表示最后 500 字节
+        if int(last) == 0:
+            raise RangeNotSatisfiable
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+def _etag(relative_path, stat_result):
+    match = CONTENT_ADDRESSED.match(relative_path)
+    if match and match.group('digest'):
+        return f'"{match.group("digest")}"'
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+@require_safe
+def serve_cover(request, path):
+    options = get_settings()
+    try:
+        full_path = safe_join(os.path.join(settings.MEDIA_ROOT, COVER_DIR), path)
+        stat_result = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404('文件不存在')
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise Http404('文件不存在')
+
+    etag = _etag(path, stat_result)
+    last_modified = int(stat_result.st_mtime)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = _file_response(request, options, path, full_path, stat_result.st_size, etag, last_modified)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if CONTENT_ADDRESSED.match(path):
+        response['Cache-Control'] = f'public, max-age={options["MAX_AGE"]}, immutable'
+    else:
+        response['Cache-Control'] = f'public, max-age={options["MUTABLE_MAX_AGE"]}'
+    return response
+
+
+def _file_response(request, options, path, full_path, size, etag, last_modified):
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    backend = options['BACKEND']
+    if backend in ('x-accel-redirect', 'x-sendfile'):
+        response = HttpResponse(content_type=content_type)
+        if backend == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = options['X_ACCEL_PREFIX'].rstrip('/') + f'/{COVER_DIR}/{path}'
+        else:
+            response['X-Sendfile'] = full_path
+        return response
+
+    byte_range = None
+    header = request.META.get('HTTP_RANGE')
+    if header and _if_range_matches(request, etag, last_modified):
+        try:
+            byte_range = parse_range(header, size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416, content_type=content_type)
+            response['Content-Range'] = f'bytes */{size}'
+            response['Accept-Ranges'] = 'bytes'
+            return response
+
+    start, end = byte_range or (0, size - 1)
+    length = end - start + 1
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+    else:
+        response = FileResponse(FileRange(open(full_path, 'rb'), start, length), content_type=content_type)
+        response.block_size = options['BLOCK_SIZE']
+    if byte_range is not None:
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = length
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def _if_range_matches(request, etag, last_modified):
+    """If-Range 与当前文件一致（或未提供）时才按 Range 返回部分内容"""
+    value = request.META.get('HTTP_IF_RANGE')
+    if not value:
+        return True
+    if value.startswith('"') or value.startswith('W/'):
+        return value == etag # 强比较，弱 ETag 不匹配
+    return parse_http_date_safe(value) == last_modified
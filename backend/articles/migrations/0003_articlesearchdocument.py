@@ -0,0 +1,141 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:51
+
+import re
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+# SQLite 下的 FTS5 外部内容表，由触发器与 articles_articlesearchdocument 保持同步
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE articles_article_fts USING fts5(
+        title, excerpt, content,
+        content='articles_articlesearchdocument', content_rowid='article_id',
+        tokenize='unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER articles_article_fts_ai AFTER INSERT ON articles_articlesearchdocument BEGIN
+        INSERT INTO articles_article_fts(rowid, title, excerpt, content)
+        VALUES (new.article_id, new.title, new.excerpt, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER articles_article_fts_ad AFTER DELETE ON articles_articlesearchdocument BEGIN
+        INSERT INTO articles_article_fts(articles_article_fts, rowid, title, excerpt, content)
+        VALUES ('delete', old.article_id, old.title, old.excerpt, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER articles_article_fts_au AFTER UPDATE ON articles_articlesearchdocument BEGIN
+        INSERT INTO articles_article_fts(articles_article_fts, rowid, title, excerpt, content)
+        VALUES ('delete', old.article_id, old.title, old.excerpt, old.content);
+        INSERT INTO articles_article_fts(rowid, title, excerpt, content)
+        VALUES (new.article_id, new.title, new.excerpt, new.content);
+    END
+    """,
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS articles_article_fts_au",
+    "DROP TRIGGER IF EXISTS articles_article_fts_ad",
+    "DROP TRIGGER IF EXISTS articles_article_fts_ai",
+    "DROP TABLE IF EXISTS articles_article_fts",
+]
+
+POSTGRES_FORWARD = [
+    "CREATE INDEX articles_search_vector_gin ON articles_articlesearchdocument USING GIN (vector)",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS articles_search_vector_gin",
+]
+
+
+def _run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+create_search_structures = _run_for_vendor({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD})
+drop_search_structures = _run_for_vendor({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD})
+
+BACKFILL_BATCH_SIZE = 500
+
+# 回填时使用的分词规则，为本迁移冻结的副本（与编写时的 articles.search.tokenize 索引模式相同），
+# 之后修改检索模块不影响全新数据库上的迁移
+_CJK_RUN = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+')
+_WORD = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+|[^\W_]+')
+
+# SQLite 由上面的触发器同步 FTS 表；PostgreSQL 一次算出全部检索向量（与 search.PostgresSearchBackend 相同的权重）
+POSTGRES_BACKFILL_VECTORS = """
+    UPDATE articles_articlesearchdocument SET vector =
+        setweight(to_tsvector('simple', COALESCE(title, '')), 'A')
+        || setweight(to_tsvector('simple', COALESCE(excerpt, '')), 'B')
+        || setweight(to_tsvector('simple', COALESCE(content, '')), 'C')
+"""
+
+
+def _segment(text):
+    if not text:
+        return ''
+    try:
+        import jieba
+    except ImportError:
+        jieba = None
+    if jieba is not None:
+        return ' '.join(w.lower() for w in jieba.cut_for_search(text) if _WORD.search(w))
+    tokens = []
+    for word in _WORD.findall(text):
+        if _CJK_RUN.fullmatch(word):
+            tokens.extend([word] if len(word) == 1 else [word[i:i + 2] for i in range(len(word) - 1)])
+        else:
+            tokens.append(word.lower())
+    return ' '.join(tokens)
+
+
+def backfill_documents(apps, schema_editor):
+    """为已有文章生成检索文档（在建好 FTS 表与触发器之后执行）"""
+    Article = apps.get_model('articles', 'Article')
+    ArticleSearchDocument = apps.get_model('articles', 'ArticleSearchDocument')
+    using = schema_editor.connection.alias
+    articles = Article.objects.using(using).values_list('id', 'title', 'excerpt', 'content').order_by('pk')
+    batch = []
+    for article_id, title, excerpt, content in articles.iterator(chunk_size=BACKFILL_BATCH_SIZE):
+        batch.append(ArticleSearchDocument(
+            article_id=article_id, title=_segment(title), excerpt=_segment(excerpt), content=_segment(content),
+        ))
+        if len(batch) >= BACKFILL_BATCH_SIZE:
+            ArticleSearchDocument.objects.using(using).bulk_create(batch)
+            batch = []
+    if batch:
+        ArticleSearchDocument.objects.using(using).bulk_create(batch)
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(POSTGRES_BACKFILL_VECTORS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0002_categoryclosure'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleSearchDocument',
+            fields=[
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='articles.article', verbose_name='文章')),
+                ('title', models.TextField(blank=True, verbose_name='标题分词')),
+                ('excerpt', models.TextField(blank=True, verbose_name='摘要分词')),
+                ('content', models.TextField(blank=True, verbose_name='内容分词')),
+                ('vector', django.contrib.postgres.search.SearchVectorField(null=True, verbose_name='检索向量')),
+            ],
+            options={
+                'verbose_name': '文章检索文档',
+                'verbose_name_plural': '文章检索文档',
+            },
+        ),
+        migrations.RunPython(create_search_structures, drop_search_structures),
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
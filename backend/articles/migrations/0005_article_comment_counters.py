@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:55
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Article = apps.get_model('articles', 'Article')
+    Comment = apps.get_model('articles', 'Comment')
+    comments = Comment.objects.filter(article_id=OuterRef('pk')).order_by()
+    Article.objects.update(
+        comment_count=Coalesce(
+            Subquery(comments.values('article_id').annotate(total=Count('id')).values('total')), 0
+        ),
+        last_commented_at=Subquery(comments.order_by('-created_at').values('created_at')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0004_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='评论数'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='last_commented_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='最后评论时间'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['comment_count', 'id'], name='article_comments_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['last_commented_at', 'id'], name='article_activity_keyset_idx'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:25
+
+import articles.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0007_comment_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='cover_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='封面变体'),
+        ),
+        migrations.AlterField(
+            model_name='article',
+            name='cover_image',
+            field=articles.images.ContentAddressedImageField(blank=True, null=True, upload_to='article_covers/', validators=[articles.images.validate_cover_image], variants_field='cover_variants', verbose_name='封面图片'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0008_cover_image_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField(verbose_name='版本号')),
+                ('title', models.CharField(max_length=200, verbose_name='标题')),
+                ('excerpt', models.TextField(blank=True, verbose_name='摘要')),
+                ('is_snapshot', models.BooleanField(default=False, verbose_name='完整快照')),
+                ('content', models.TextField(blank=True, verbose_name='内容快照')),
+                ('delta', models.JSONField(blank=True, null=True, verbose_name='内容差异')),
+                ('content_hash', models.CharField(max_length=40, verbose_name='内容哈希')),
+                ('size', models.PositiveIntegerField(default=0, verbose_name='内容长度')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='articles.article', verbose_name='文章')),
+                ('author', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='article_revisions', to=settings.AUTH_USER_MODEL, verbose_name='修改者')),
+            ],
+            options={
+                'verbose_name': '文章版本',
+                'verbose_name_plural': '文章版本',
+                'ordering': ['-number'],
+                'constraints': [models.UniqueConstraint(fields=('article', 'number'), name='article_revision_number_unique')],
+            },
+        ),
+    ]
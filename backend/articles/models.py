@@ -1,5 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings # 用于关联 User 模型
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models.functions import Cast, Coalesce, Concat, LPad
+from django.utils import timezone
+from .images import ContentAddressedImageField, validate_cover_image
 
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True, verbose_name='分类名称')
@@ -19,13 +23,113 @@ class Category(models.Model):
         ordering = ['name']
 
     def __str__(self):
-        # 显示层级关系
-        path = [self.name]
-        p = self.parent
-        while p is not None:
-            path.append(p.name)
-            p = p.parent
-        return ' -> '.join(reversed(path))
+        # 显示层级关系，路径取自进程内缓存的分类树，避免逐级查询父分类
+        from .category_tree import get_category_path
+        return get_category_path(self.pk) or self.name
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 记录从数据库加载时的父分类，保存时据此判断是否发生了移动
+        if 'parent_id' in instance.__dict__:
+            instance._loaded_parent_id = instance.parent_id
+        return instance
+
+
+class CategoryClosureQuerySet(models.QuerySet):
+    """
+    闭包表的维护操作。所有方法都假定调用方已处于事务中（由信号处理器保证）。
+    """
+
+    def descendant_ids(self, category_id):
+        """返回给定分类及其所有子孙分类 ID 的子查询（单条 SQL）。"""
+        return self.filter(ancestor_id=category_id).values('descendant_id')
+
+    def insert_node(self, node):
+        """新建分类：写入自身路径，并挂到父分类的所有祖先下。"""
+        self.create(ancestor_id=node.pk, descendant_id=node.pk, depth=0)
+        if node.parent_id is not None:
+            self._attach_subtree(node.pk, node.parent_id)
+
+    def move_subtree(self, node):
+        """分类更换父级：先断开旧祖先，再连接到新父分类的祖先链上。"""
+        self.detach_subtree(node.pk)
+        if node.parent_id is not None:
+            self._attach_subtree(node.pk, node.parent_id)
+
+    def detach_subtree(self, node_id):
+        """
+        删除“外部祖先 -> 子树内节点”的路径，子树内部路径保持不变。
+        分类被删除时（子分类 parent 被 SET_NULL）也调用此方法，使子分类成为新的根。
+        """
+        subtree = self.filter(ancestor_id=node_id).values('descendant_id')
+        ancestors = self.filter(descendant_id=node_id).exclude(ancestor_id=node_id).values('ancestor_id')
+        self.filter(descendant_id__in=subtree, ancestor_id__in=ancestors).delete()
+
+    def _attach_subtree(self, node_id, parent_id):
+        ancestors = list(self.filter(descendant_id=parent_id).values_list('ancestor_id', 'depth'))
+        subtree = list(self.filter(ancestor_id=node_id).values_list('descendant_id', 'depth'))
+        self.bulk_create(
+            [
+                self.model(ancestor_id=a_id, descendant_id=d_id, depth=a_depth + d_depth + 1)
+                for a_id, a_depth in ancestors
+                for d_id, d_depth in subtree
+            ],
+            batch_size=1000,
+        )
+
+    def rebuild(self):
+        """根据 parent 指针整体重建闭包表（批量导入分类后使用）。"""
+        parents = dict(Category.objects.values_list('id', 'parent_id'))
+        rows = []
+        for node_id in parents:
+            depth, current, seen = 0, node_id, set()
+            while current is not None and current not in seen:
+                seen.add(current)
+                rows.append(self.model(ancestor_id=current, descendant_id=node_id, depth=depth))
+                depth += 1
+                current = parents.get(current)
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create(rows, batch_size=1000)
+        return len(rows)
+
+
+class CategoryClosure(models.Model):
+    """
+    分类层级的闭包表：每一对 (祖先, 子孙) 存一行，包括节点到自身 (depth=0)。
+    查询某分类的全部子孙只需一次按 ancestor 的索引扫描，无需逐层递归。
+    """
+    ancestor = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='descendant_links',
+        db_index=False, # 由 (ancestor, descendant) 唯一约束的索引覆盖
+        verbose_name='祖先分类'
+    )
+    descendant = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='ancestor_links',
+        db_index=False,
+        verbose_name='子孙分类'
+    )
+    depth = models.PositiveIntegerField(default=0, verbose_name='层级距离')
+
+    objects = CategoryClosureQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = '分类层级'
+        verbose_name_plural = verbose_name
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='category_closure_unique_path'),
+        ]
+        indexes = [
+            models.Index(fields=['descendant', 'depth'], name='category_closure_desc_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.ancestor_id} -> {self.descendant_id} ({self.depth})'
 
 
 class Article(models.Model):
@@ -37,7 +141,12 @@ class Article(models.Model):
     title = models.CharField(max_length=200, verbose_name='标题')
     content = models.TextField(verbose_name='内容')
     excerpt = models.TextField(blank=True, verbose_name='摘要') # 可选摘要
-    cover_image = models.ImageField(upload_to='article_covers/', null=True, blank=True, verbose_name='封面图片') # 可选封面
+    cover_image = ContentAddressedImageField(
+        upload_to='article_covers/', null=True, blank=True, verbose_name='封面图片',
+        validators=[validate_cover_image], variants_field='cover_variants',
+    ) # 可选封面，按内容寻址存储
+    # 封面的缩略图变体 {'source': 封面文件名, 'widths': [...], 'formats': [...]}，由 articles.images 在后台生成
+    cover_variants = models.JSONField(default=dict, blank=True, editable=False, verbose_name='封面变体')
 
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -59,17 +168,108 @@ class Article(models.Model):
         default='draft',
         verbose_name='状态'
     )
-    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
-    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+    # 不用 auto_now / auto_now_add：bulk_create（导入、造数）时才能保留预先设定的时间，
+    # updated_at 在 save() 中更新
+    created_at = models.DateTimeField(default=timezone.now, editable=False, verbose_name='创建时间')
+    updated_at = models.DateTimeField(default=timezone.now, editable=False, verbose_name='更新时间')
+    # 冗余计数，由 CommentViewSet 在增删评论时于同一事务内维护，
+    # 可用 manage.py repair_comment_counters 批量修复
+    comment_count = models.PositiveIntegerField(default=0, verbose_name='评论数')
+    last_commented_at = models.DateTimeField(null=True, blank=True, verbose_name='最后评论时间')
 
     class Meta:
         verbose_name = '文章'
         verbose_name_plural = verbose_name
         ordering = ['-created_at'] # 默认按创建时间降序
+        # 与游标分页的复合键 (排序字段, id) 对应的索引
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='article_created_keyset_idx'),
+            models.Index(fields=['updated_at', 'id'], name='article_updated_keyset_idx'),
+            models.Index(fields=['title', 'id'], name='article_title_keyset_idx'),
+            models.Index(fields=['status', 'created_at', 'id'], name='article_status_created_idx'),
+            models.Index(fields=['comment_count', 'id'], name='article_comments_keyset_idx'),
+            models.Index(fields=['last_commented_at', 'id'], name='article_activity_keyset_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.updated_at = timezone.now()
+        super().save(*args, **kwargs)
+
+
+class ArticleSearchDocument(models.Model):
+    """
+    文章的预计算检索文档：各字段为分词后以空格分隔的词序列。
+    PostgreSQL 上额外维护带权重的 tsvector（GIN 索引）；
+    SQLite 上由触发器同步到 FTS5 虚拟表，见 articles.search。
+    """
+    article = models.OneToOneField(
+        Article,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document',
+        verbose_name='文章'
+    )
+    title = models.TextField(blank=True, verbose_name='标题分词')
+    excerpt = models.TextField(blank=True, verbose_name='摘要分词')
+    content = models.TextField(blank=True, verbose_name='内容分词')
+    vector = SearchVectorField(null=True, verbose_name='检索向量') # 仅 PostgreSQL 使用
+
+    class Meta:
+        verbose_name = '文章检索文档'
+        verbose_name_plural = verbose_name
+
+    def __str__(self):
+        return f'SearchDocument({self.article_id})'
+
+
+class ArticleRevision(models.Model):
+    """
+    文章的历史版本，由 articles.revisions 在保存时写入。
+    标题、摘要每个版本完整保存；正文每隔若干版本保存一次完整快照，
+    其余版本只保存相对上一版本的差异 (delta)，还原时从最近的快照依次应用。
+    """
+    article = models.ForeignKey(
+        Article,
+        on_delete=models.CASCADE,
+        related_name='revisions',
+        verbose_name='文章'
+    )
+    number = models.PositiveIntegerField(verbose_name='版本号') # 同一文章内递增，修剪后可能不连续
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='article_revisions',
+        verbose_name='修改者'
+    ) # 为空表示未经接口的修改（如后台直接编辑）
+    title = models.CharField(max_length=200, verbose_name='标题')
+    excerpt = models.TextField(blank=True, verbose_name='摘要')
+    is_snapshot = models.BooleanField(default=False, verbose_name='完整快照')
+    content = models.TextField(blank=True, verbose_name='内容快照') # 仅快照版本
+    delta = models.JSONField(null=True, blank=True, verbose_name='内容差异') # 仅差异版本
+    content_hash = models.CharField(max_length=40, verbose_name='内容哈希')
+    size = models.PositiveIntegerField(default=0, verbose_name='内容长度')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+
+    class Meta:
+        verbose_name = '文章版本'
+        verbose_name_plural = verbose_name
+        ordering = ['-number']
+        constraints = [
+            models.UniqueConstraint(fields=['article', 'number'], name='article_revision_number_unique'),
+        ]
+
+    def __str__(self):
+        return f'Revision {self.number} of article {self.article_id}'
+
+
+COMMENT_PATH_SEGMENT_WIDTH = 12 # path 中每级 ID 的定宽位数
+COMMENT_MAX_DEPTH = 16 # 受 path 长度限制的最大回复层级
+
 
 class Comment(models.Model):
     article = models.ForeignKey(
@@ -85,14 +285,136 @@ class Comment(models.Model):
         verbose_name='评论者'
     )
     content = models.TextField(verbose_name='评论内容')
-    created_at = models.DateTimeField(auto_now_add=True, verbose_name='评论时间')
-    # 可以添加父评论，实现评论回复功能
-    # parent_comment = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='replies')
+    # 与 Article 相同，不用 auto_now / auto_now_add，updated_at 在 save() 中更新
+    created_at = models.DateTimeField(default=timezone.now, editable=False, verbose_name='评论时间')
+    updated_at = models.DateTimeField(default=timezone.now, editable=False, verbose_name='更新时间') # 用于条件请求的校验
+    # 父评论，实现评论回复功能
+    parent_comment = models.ForeignKey(
+        'self',
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='replies',
+        verbose_name='父评论'
+    )
+    # 楼层的根评论（根评论指向自身），用于按楼层批量加载回复
+    thread = models.ForeignKey(
+        'self',
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=False, # 由 (thread, path) 复合索引覆盖
+        on_delete=models.CASCADE,
+        related_name='thread_comments',
+        verbose_name='所属楼层'
+    )
+    # 物化路径：各级评论 ID 定宽补零后用 '.' 连接，按 path 排序即为楼层内的深度优先顺序
+    path = models.CharField(max_length=255, blank=True, editable=False, verbose_name='评论路径')
+    depth = models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='回复层级')
 
     class Meta:
         verbose_name = '评论'
         verbose_name_plural = verbose_name
         ordering = ['created_at'] # 默认按评论时间升序
+        indexes = [
+            models.Index(fields=['article', 'created_at', 'id'], name='comment_article_keyset_idx'),
+            models.Index(fields=['article', 'depth', 'created_at', 'id'], name='comment_thread_root_idx'),
+            models.Index(fields=['thread', 'path'], name='comment_thread_path_idx'),
+        ]
 
     def __str__(self):
-        return f'Comment by {self.author.username} on {self.article.title}'
\ No newline at end of file
+        return f'Comment by {self.author.username} on {self.article.title}'
+
+    def save(self, *args, **kwargs):
+        self.updated_at = timezone.now()
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+        # 路径中包含自身 ID，只能在插入之后计算
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            segment = str(self.pk).zfill(COMMENT_PATH_SEGMENT_WIDTH)
+            parent = self.parent_comment
+            if parent is None:
+                self.path, self.depth, self.thread_id = segment, 0, self.pk
+            else:
+                self.path = f'{parent.path}.{segment}'
+                self.depth = parent.depth + 1
+                self.thread_id = parent.thread_id
+            Comment.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth, thread_id=self.thread_id)
+
+    def subtree(self):
+        """该评论及其所有回复（同一楼层内按路径前缀匹配）"""
+        return Comment.objects.filter(thread_id=self.thread_id, path__startswith=self.path)
+
+
+def comment_counter_updates(article_ref):
+    """
+    返回用于重新计算文章评论计数的表达式（单条 UPDATE 内完成）。
+    article_ref 为文章主键的表达式，如 OuterRef('pk')。
+    """
+    comments = Comment.objects.filter(article_id=article_ref).order_by()
+    return {
+        'comment_count': Coalesce(
+            models.Subquery(
+                comments.values('article_id').annotate(total=models.Count('id')).values('total')
+            ),
+            0,
+        ),
+        'last_commented_at': models.Subquery(
+            comments.order_by('-created_at').values('created_at')[:1]
+        ),
+    }
+
+
+
+
+def bulk_create_comments(comments, batch_size=1000):
+    """
+    批量插入评论并补全 path / depth / thread（bulk_create 不会调用 Comment.save）。
+    回复的 parent_comment 可以是同一列表中的未保存实例，但父评论必须排在回复之前。
+    按层级逐层处理：每层一次 bulk_create 拿到主键，再用一条 UPDATE 从父评论的路径
+    推算本层路径（与 0006 迁移的回填方式相同），不逐行更新。
+    """
+    levels = []
+    depth_of = {}
+    for comment in comments:
+        parent = comment.parent_comment
+        if parent is None:
+            depth = 0
+        elif id(parent) in depth_of:
+            depth = depth_of[id(parent)] + 1
+        else: # 已存在于数据库中的父评论
+            depth = parent.depth + 1
+        depth_of[id(comment)] = depth
+        while len(levels) <= depth:
+            levels.append([])
+        levels[depth].append(comment)
+
+    segment = LPad(Cast('id', models.CharField()), COMMENT_PATH_SEGMENT_WIDTH, models.Value('0'))
+    parent = Comment.objects.filter(pk=models.OuterRef('parent_comment_id'))
+    for depth, level in enumerate(levels):
+        if not level:
+            continue
+        Comment.objects.bulk_create(level, batch_size=batch_size)
+        if depth == 0:
+            updates = {'path': segment, 'depth': 0, 'thread_id': models.F('id')}
+        else:
+            updates = {
+                'path': Concat(models.Subquery(parent.values('path')), models.Value('.'), segment),
+                'depth': depth,
+                'thread_id': models.Subquery(parent.values('thread_id')),
+            }
+        for start in range(0, len(level), batch_size):
+            ids = [comment.pk for comment in level[start:start + batch_size]]
+            Comment.objects.filter(pk__in=ids).update(**updates)
+        # 同步内存中的实例，供调用方继续使用
+        for comment in level:
+            parent_comment = comment.parent_comment
+            comment_segment = str(comment.pk).zfill(COMMENT_PATH_SEGMENT_WIDTH)
+            if parent_comment is None:
+                comment.path, comment.depth, comment.thread_id = comment_segment, 0, comment.pk
+            else:
+                comment.path = f'{parent_comment.path}.{comment_segment}'
+                comment.depth = depth
+                comment.thread_id = parent_comment.thread_id
+    return comments
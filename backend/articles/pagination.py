@@ -0,0 +1,290 @@
+# articles/pagination.py
+"""
+分页方式：
+
+- 页码分页（默认）：与全局 PageNumberPagination 相同，供管理后台等需要总数和跳页的场景使用。
+- 游标分页（按请求选择）：?pagination=cursor 或携带 ?cursor= 时启用。按排序字段 + id
+  组成的复合键做 keyset 查询 (WHERE (created_at, id) < (...))，不执行 COUNT(*)，
+  也不使用 OFFSET，深度翻页与首页同样快。
+"""
+import base64
+import datetime
+import decimal
+import json
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import InvalidPage
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+MAX_PAGE_SIZE = 100
+
+
+def _json_default(value):
+    # 不使用 DjangoJSONEncoder：它会把时间截断到毫秒，导致游标边界比较出错
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    raise TypeError(f'Cannot encode {type(value).__name__} in cursor')
+
+
+class StandardPageNumberPagination(PageNumberPagination):
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset 的异步版本，供 articles.async_views 使用（计数与取数使用异步 ORM）"""
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount() # count 是 cached_property，预先填入后不再同步计数
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        self.page.object_list = [row async for row in self.page.object_list]
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return list(self.page)
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    基于复合键的游标分页。
+
+    排序取自 queryset 当前的 order_by（即 OrderingFilter 的结果，否则为模型默认排序），
+    并自动追加 id 作为唯一的决胜键。游标中记录了边界行的各键值和排序方式，
+    排序改变后旧游标失效。可为空的字段统一按 NULL 排在最后处理。
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = MAX_PAGE_SIZE
+    invalid_cursor_message = '无效的游标'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self._set_page(list(self._page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self._set_page([row async for row in self._page_queryset(queryset, request)])
+
+    def _page_queryset(self, queryset, request):
+        """构造当前页的查询（多取一行用于判断是否还有更多），不执行"""
+        self.request = request
+        self.model = queryset.model
+        self.base_url = request.build_absolute_uri()
+        self.limit = self.get_page_size(request)
+        self.keys = self.get_keys(queryset)
+
+        self.cursor = self.decode_cursor(request)
+        self.reverse = False
+        if self.cursor is not None:
+            self.reverse = self.cursor['reverse']
+            condition = self._boundary_condition(self.cursor['values'], before=self.reverse)
+            queryset = queryset.filter(condition)
+        return queryset.order_by(*self._order_by(self.reverse))[:self.limit + 1]
+
+    def _set_page(self, rows):
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+        if self.reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_keys(self, queryset):
+        """返回 [(字段名, 是否降序, 是否可为空)]，末尾保证有 id"""
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        keys = []
+        for item in ordering:
+            if not isinstance(item, str) or '__' in item or item in ('?', 'pk'):
+                continue
+            descending = item.startswith('-')
+            name = item.lstrip('-')
+            try:
+                nullable = queryset.model._meta.get_field(name).null
+            except FieldDoesNotExist: # annotate 出来的字段，如 search_rank
+                nullable = False
+            keys.append((name, descending, nullable))
+        if not any(name == 'id' for name, _, _ in keys):
+            descending = keys[0][1] if keys else False
+            keys.append(('id', descending, False))
+        return keys
+
+    def _order_by(self, reverse):
+        ordering = []
+        for name, descending, nullable in self.keys:
+            if reverse:
+                descending = not descending
+            if nullable:
+                # 正向时 NULL 始终在最后，反向时在最前
+                expression = F(name).desc if descending else F(name).asc
+                ordering.append(expression(nulls_first=True) if reverse else expression(nulls_last=True))
+            else:
+                ordering.append(f'-{name}' if descending else name)
+        return ordering
+
+    def _boundary_condition(self, values, before):
+        """
+        构造按字典序“严格在游标之后（或之前）”的条件：
+        (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ...
+        """
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (name, descending, nullable), value in zip(self.keys, values):
+            step = self._step(name, descending, nullable, value, before)
+            if step is not None:
+                condition |= equal & step
+            equal &= Q(**{f'{name}__isnull': True}) if value is None else Q(**{name: value})
+        return condition
+
+    @staticmethod
+    def _step(name, descending, nullable, value, before):
+        if value is None:
+            # NULL 排在最后：其后没有更大的值，其前是所有非 NULL 值
+            return Q(**{f'{name}__isnull': False}) if before else None
+        lookup = 'gt' if descending == before else 'lt'
+        step = Q(**{f'{name}__{lookup}': value})
+        if nullable and not before:
+            step |= Q(**{f'{name}__isnull': True})
+        return step
+
+    def _key_values(self, instance):
+        return [getattr(instance, name) for name, _, _ in self.keys]
+
+    def _ordering_signature(self):
+        return [f"{'-' if descending else ''}{name}" for name, descending, _ in self.keys]
+
+    def encode_cursor(self, instance, reverse):
+        payload = {'o': self._ordering_signature(), 'v': self._key_values(instance), 'r': int(reverse)}
+        raw = json.dumps(payload, default=_json_default, separators=(',', ':'))
+        token = base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8'))
+            if payload['o'] != self._ordering_signature() or len(payload['v']) != len(self.keys):
+                raise ValueError
+            values = [self._to_python(name, value) for (name, _, _), value in zip(self.keys, payload['v'])]
+            return {'values': values, 'reverse': bool(payload['r'])}
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _to_python(self, name, value):
+        if value is None:
+            return None
+        try:
+            return self.model._meta.get_field(name).to_python(value)
+        except FieldDoesNotExist:
+            return value
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+
+class CursorOrPageNumberPagination(BasePagination):
+    """
+    每个请求自行选择分页方式：默认页码分页，?pagination=cursor 或带 ?cursor= 时使用游标分页。
+    两种方式的 page_size 均受 MAX_PAGE_SIZE 限制。
+    """
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+
+    def __init__(self):
+        self.page_number = StandardPageNumberPagination()
+        self.keyset = KeysetCursorPagination()
+        self.active = self.page_number
+
+    def use_cursor(self, request):
+        params = request.query_params
+        return (
+            params.get(self.mode_query_param) == self.cursor_mode
+            or self.keyset.cursor_query_param in params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.active = self.keyset
+        else:
+            self.active = self.page_number
+        return self.active.paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.active = self.keyset if self.use_cursor(request) else self.page_number
+        return await self.active.apaginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.active.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number.get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return self.page_number.get_schema_operation_parameters(view) + [
+            {
+                'name': self.mode_query_param,
+                'required': False,
+                'in': 'query',
+                'description': '设为 cursor 时使用游标分页',
+                'schema': {'type': 'string', 'enum': [self.cursor_mode]},
+            },
+            {
+                'name': self.keyset.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': '游标分页的位置',
+                'schema': {'type': 'string'},
+            },
+        ]
@@ -11,9 +11,8 @@ class IsAuthorOrReadOnly(permissions.BasePermission):
             return True
 
         # 写入权限授予对象的所有者或管理员用户
-        # obj.author 是文章的作者
-        # request.user 是当前发出请求的用户
-        return obj.author == request.user or request.user.is_staff
+        # 比较外键 ID，不需要加载 obj.author
+        return obj.author_id == request.user.id or request.user.is_staff
 
 
 class IsAdminOrReadOnly(permissions.BasePermission):
@@ -0,0 +1,183 @@
+# articles/response_cache.py
+"""
+匿名只读请求的响应缓存。
+
+- 只缓存未登录用户的 GET/HEAD 请求（登录用户能看到草稿等个人数据，不缓存）；
+- 缓存键 = 视图 + action + URL 参数 + 规范化后的查询参数 + 渲染格式 + 相关模型的“代数”；
+- Article / Category / Comment 保存或删除时递增对应模型的代数（见 signals.py），
+  旧代数的缓存键从此不会再被访问，等待 TTL 过期即可，不需要扫描删除；
+- 存储使用 settings.RESPONSE_CACHE['CACHE'] 指定的 Django cache，
+  可以是进程内存 (LocMemCache)、文件 (FileBasedCache) 或共享的 Redis/Memcached。
+  代数与响应存放在同一个 cache 中，多进程部署时必须共享，否则其它进程看不到递增（check --deploy: articles.E003）。
+"""
+import hashlib
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from backend_project import db_routing
+
+DEFAULTS = {
+    'CACHE': 'default',
+    'TIMEOUT': 300,
+    'ENABLED': True,
+}
+GENERATION_KEY = 'articles:response_cache:generation:{}'
+CACHED_HEADERS = ('ETag', 'Last-Modified', 'Vary')
+
+
+def get_settings():
+    return {**DEFAULTS, **getattr(settings, 'RESPONSE_CACHE', {})}
+
+
+def get_store():
+    return caches[get_settings()['CACHE']]
+
+
+class CacheStats:
+    """当前进程的命中统计"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.invalidations = 0
+
+    def incr(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def as_dict(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'stores': self.stores,
+                'invalidations': self.invalidations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+stats = CacheStats()
+
+
+def get_generations(names):
+    store = get_store()
+    keys = [GENERATION_KEY.format(name) for name in names]
+    values = store.get_many(keys)
+    generations = []
+    for key in keys:
+        if key not in values:
+            # 用时间戳作为初始值：代数键被淘汰后重新生成的值不会与旧值重复，避免命中过期内容
+            store.add(key, time.time_ns(), timeout=None)
+            values[key] = store.get(key)
+        generations.append(values[key])
+    return generations
+
+
+def bump_generation(name):
+    store = get_store()
+    key = GENERATION_KEY.format(name)
+    try:
+        store.incr(key)
+    except ValueError: # 键不存在
+        store.add(key, time.time_ns(), timeout=None)
+    stats.incr('invalidations')
+    db_routing.note_write(name)
+
+
+def invalidate(name):
+    # 与分类树缓存相同：立即递增一次，事务提交后再递增一次
+    bump_generation(name)
+    transaction.on_commit(lambda: bump_generation(name))
+
+
+class ResponseCacheMixin:
+    """
+    为 ViewSet 的只读 action 提供响应缓存。
+    cache_actions：需要缓存的 action；cache_dependencies：响应内容依赖的模型代数名称。
+    """
+    cache_actions = ('list', 'retrieve')
+    cache_dependencies = ()
+
+    def is_response_cacheable(self, request):
+        return (
+            get_settings()['ENABLED']
+            and self.action in self.cache_actions
+            and request.method in ('GET', 'HEAD')
+            and not request.user.is_authenticated
+        )
+
+    def get_response_cache_key(self, request):
+        params = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values
+            if value != ''
+        )
+        kwargs = sorted(self.kwargs.items())
+        renderer = getattr(request, 'accepted_renderer', None)
+        raw = repr([
+            self.basename, self.action, kwargs, params,
+            getattr(renderer, 'format', None), get_generations(self.cache_dependencies),
+        ])
+        return 'articles:response_cache:' + hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._response_cache_key = None
+        if self.is_response_cacheable(request):
+            self._response_cache_key = self.get_response_cache_key(request)
+
+    def _cached_response(self, request, handler, *args, **kwargs):
+        key = getattr(self, '_response_cache_key', None)
+        if key is None:
+            return handler(request, *args, **kwargs)
+        entry = get_store().get(key)
+        if entry is None:
+            stats.incr('misses')
+            return handler(request, *args, **kwargs)
+
+        stats.incr('hits')
+        self._response_cache_key = None # 命中时不再回写
+        headers = entry['headers']
+        last_modified = parse_http_date_safe(headers['Last-Modified']) if 'Last-Modified' in headers else None
+        response = get_conditional_response(request, etag=headers.get('ETag'), last_modified=last_modified)
+        if response is None:
+            response = HttpResponse(entry['content'], content_type=entry['content_type'])
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(request, super().retrieve, *args, **kwargs)
+
+    def _may_store(self):
+        # 依赖的数据刚变化过时副本可能还没有同步，从副本读出的响应不写入新代数下的缓存
+        return not (db_routing.read_from_replica() and db_routing.written_recently(self.cache_dependencies))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, '_response_cache_key', None)
+        if key is not None and response.status_code == 200 and hasattr(response, 'render') and self._may_store():
+            response.render()
+            headers = {name: response[name] for name in CACHED_HEADERS if response.has_header(name)}
+            get_store().set(key, {
+                'content': response.content,
+                'content_type': response['Content-Type'],
+                'headers': headers,
+            }, timeout=get_settings()['TIMEOUT'])
+            stats.incr('stores')
+        return response
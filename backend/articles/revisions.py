@@ -0,0 +1,262 @@
+# articles/revisions.py
+"""
+文章的历史版本（差异压缩存储）。
+
+每次通过接口创建或修改文章时 record() 写入一个 ArticleRevision（标题、摘要、正文都未变化时不写入）：
+- 正文按行和句末标点切分成片段，用 difflib 计算相对上一版本的差异，保存为紧凑的 delta 列表：
+    正整数 n  复制上一版本接下来的 n 个片段
+    负整数 -n 跳过上一版本接下来的 n 个片段
+    字符串    插入的文本
+  大段改写导致 delta 不比全文小时直接保存快照；
+- 距上一个快照满 SNAPSHOT_INTERVAL 个版本时保存完整快照，还原任一版本最多读取 SNAPSHOT_INTERVAL 行；
+- 文章经其它途径（如后台）修改过、或在启用版本记录之前就已存在时，先把保存前的状态记为一个快照。
+
+manage.py prune_revisions 压缩旧的历史，见 compact()。
+"""
+import difflib
+import hashlib
+import json
+import re
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import Article, ArticleRevision
+
+DEFAULTS = {
+    'SNAPSHOT_INTERVAL': 10,
+    'PRUNE_KEEP': 50,
+    'PRUNE_AFTER_DAYS': 90,
+}
+
+# 在换行与句末标点之后切分，中文长段落也能得到较小的差异
+_TOKEN_END = re.compile(r'(?<=[\n。！？!?；;])')
+
+
+def get_settings():
+    return {**DEFAULTS, **getattr(settings, 'ARTICLE_REVISIONS', {})}
+
+
+def tokenize(text):
+    return [token for token in _TOKEN_END.split(text) if token]
+
+
+def content_hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def _push(delta, op):
+    # 相邻的同类操作合并
+    if delta and type(op) is type(delta[-1]) and (isinstance(op, str) or (op > 0) == (delta[-1] > 0)):
+        delta[-1] += op
+    else:
+        delta.append(op)
+
+
+def make_delta(old, new):
+    old_tokens, new_tokens = tokenize(old), tokenize(new)
+    # 修改通常集中在局部：相同的首尾片段直接复制，只比较中间部分。
+    # SequenceMatcher 对大量重复片段（空行、相同段落）接近平方复杂度，autojunk 保持开启，
+    # 差异因此不是最小时由 encode 改存快照
+    limit = min(len(old_tokens), len(new_tokens))
+    prefix = 0
+    while prefix < limit and old_tokens[prefix] == new_tokens[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old_tokens[-1 - suffix] == new_tokens[-1 - suffix]:
+        suffix += 1
+    old_middle = old_tokens[prefix:len(old_tokens) - suffix]
+    new_middle = new_tokens[prefix:len(new_tokens) - suffix]
+
+    delta = []
+    if prefix:
+        _push(delta, prefix)
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, old_middle, new_middle).get_opcodes():
+        if tag == 'equal':
+            _push(delta, i2 - i1)
+            continue
+        if i2 > i1:
+            _push(delta, i1 - i2)
+        if j2 > j1:
+            _push(delta, ''.join(new_middle[j1:j2]))
+    if suffix:
+        _push(delta, suffix)
+    return delta
+
+
+def apply_delta(old, delta):
+    old_tokens = tokenize(old)
+    position = 0
+    parts = []
+    for op in delta:
+        if isinstance(op, str):
+            parts.append(op)
+        elif op > 0:
+            parts.extend(old_tokens[position:position + op])
+            position += op
+        else:
+            position -= op
+    return ''.join(parts)
+
+
+def encode(previous_content, content, snapshot):
+    """返回保存正文所需的字段；不强制快照时，delta 不比全文小也改为快照"""
+    if not snapshot:
+        delta = make_delta(previous_content, content)
+        if len(json.dumps(delta, ensure_ascii=False, separators=(',', ':'))) < len(content):
+            return {'is_snapshot': False, 'content': '', 'delta': delta}
+    return {'is_snapshot': True, 'content': content, 'delta': None}
+
+
+def _same_version(revision, article):
+    return (
+        revision.title == article.title
+        and revision.excerpt == article.excerpt
+        and revision.content_hash == content_hash(article.content)
+    )
+
+
+def _create(article, number, author, previous_content=None, snapshot=False):
+    return ArticleRevision.objects.create(
+        article_id=article.pk,
+        number=number,
+        author=author,
+        title=article.title,
+        excerpt=article.excerpt,
+        content_hash=content_hash(article.content),
+        size=len(article.content),
+        **encode(previous_content, article.content, snapshot or previous_content is None),
+    )
+
+
+def record(article, previous=None, author=None):
+    """
+    在保存文章的事务中、文章行加锁后调用。previous 为保存前的文章（只需标题、摘要与正文），新建时为 None。
+    返回新写入的版本，内容未变化时返回 None。
+    """
+    if author is not None and not author.is_authenticated:
+        author = None
+    latest = (
+        ArticleRevision.objects.filter(article_id=article.pk)
+        .only('number', 'title', 'excerpt', 'content_hash', 'is_snapshot')
+        .order_by('-number').first()
+    )
+    if previous is not None and (latest is None or not _same_version(latest, previous)):
+        latest = _create(previous, latest.number + 1 if latest else 1, None, snapshot=True)
+    if latest is None:
+        return _create(article, 1, author, snapshot=True)
+    if _same_version(latest, article):
+        return None
+
+    number = latest.number + 1
+    if latest.is_snapshot:
+        last_snapshot = latest.number
+    else:
+        last_snapshot = (
+            ArticleRevision.objects.filter(article_id=article.pk, is_snapshot=True)
+            .order_by('-number').values_list('number', flat=True).first()
+        ) or 0
+    previous_content = previous.content if previous is not None else get_content(article.pk, latest.number)
+    return _create(
+        article, number, author, previous_content,
+        snapshot=number - last_snapshot >= get_settings()['SNAPSHOT_INTERVAL'],
+    )
+
+
+def get_content(article_id, number):
+    """还原指定版本的正文：最近的快照加之后的差异。版本不存在时抛出 ArticleRevision.DoesNotExist"""
+    revisions = ArticleRevision.objects.filter(article_id=article_id)
+    base = (
+        revisions.filter(number__lte=number, is_snapshot=True)
+        .order_by('-number').values_list('number', 'content').first()
+    )
+    if base is None:
+        raise ArticleRevision.DoesNotExist
+    found, content = base
+    deltas = revisions.filter(number__gt=found, number__lte=number).order_by('number').values_list('number', 'delta')
+    for found, delta in deltas:
+        content = apply_delta(content, delta)
+    if found != number:
+        raise ArticleRevision.DoesNotExist
+    return content
+
+
+def get_revision(article_id, number):
+    """带完整正文（revision.full_content）的版本"""
+    revision = ArticleRevision.objects.select_related('author').defer('content', 'delta').get(
+        article_id=article_id, number=number,
+    )
+    revision.full_content = get_content(article_id, number)
+    return revision
+
+
+def unified_diff(old, new, from_label, to_label):
+    lines = difflib.unified_diff(
+        old.splitlines(keepends=True), new.splitlines(keepends=True), fromfile=from_label, tofile=to_label,
+    )
+    # 最后一行没有换行符时补上，保证输出逐行对齐
+    return ''.join(line if line.endswith('\n') else line + '\n' for line in lines)
+
+
+def compare(article_id, from_number, to_number):
+    old, new = get_revision(article_id, from_number), get_revision(article_id, to_number)
+    diff = unified_diff(old.full_content, new.full_content, f'r{from_number}', f'r{to_number}')
+    lines = diff.splitlines()
+    return old, new, {
+        'title_changed': old.title != new.title,
+        'excerpt_changed': old.excerpt != new.excerpt,
+        'added': sum(1 for line in lines if line.startswith('+') and not line.startswith('+++')),
+        'removed': sum(1 for line in lines if line.startswith('-') and not line.startswith('---')),
+        'diff': diff,
+    }
+
+
+def compact(article_id, keep, before, daily=True):
+    """
+    压缩一篇文章的旧历史：最新的 keep (>= 1) 个版本与 before 之后的版本保持不变，
+    更早的版本按天只保留每天最后一个（daily=False 时全部删除）。
+    保留下来的旧版本按快照间隔重新编码，第一个不变的版本改存为快照，之后的差异链不受影响。
+    返回删除的版本数。
+    """
+    with transaction.atomic():
+        # 与保存文章互斥，避免压缩期间写入新版本
+        list(Article.objects.select_for_update().filter(pk=article_id).values_list('pk', flat=True))
+        revisions = ArticleRevision.objects.filter(article_id=article_id)
+        numbers = list(revisions.order_by('-number').values_list('number', flat=True)[:keep + 1])
+        if len(numbers) <= keep:
+            return 0
+        boundary = numbers[keep - 1]
+        recent = revisions.filter(created_at__gte=before).order_by('number').values_list('number', flat=True).first()
+        if recent is not None:
+            boundary = min(boundary, recent)
+
+        old = list(revisions.filter(number__lt=boundary).order_by('number'))
+        if not old:
+            return 0
+        first_kept = revisions.get(number=boundary)
+        content = ''
+        for revision in old + [first_kept]:
+            content = revision.content if revision.is_snapshot else apply_delta(content, revision.delta)
+            revision.full_content = content
+
+        if daily:
+            last_of_day = {timezone.localdate(revision.created_at): revision for revision in old}
+            survivors = sorted(last_of_day.values(), key=lambda revision: revision.number)
+        else:
+            survivors = []
+        if len(survivors) == len(old):
+            return 0
+        survivor_ids = {revision.pk for revision in survivors}
+        removed, _ = revisions.filter(pk__in=[r.pk for r in old if r.pk not in survivor_ids]).delete()
+
+        interval = get_settings()['SNAPSHOT_INTERVAL']
+        previous_content = None
+        since_snapshot = 0
+        rewritten = survivors + [first_kept]
+        for revision in rewritten:
+            force = previous_content is None or revision is first_kept or since_snapshot + 1 >= interval
+            for field, value in encode(previous_content, revision.full_content, force).items():
+                setattr(revision, field, value)
+            since_snapshot = 0 if revision.is_snapshot else since_snapshot + 1
+            previous_content = revision.full_content
+        ArticleRevision.objects.bulk_update(rewritten, ['is_snapshot', 'content', 'delta'])
+        return removed
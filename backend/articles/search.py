@@ -0,0 +1,196 @@
+# articles/search.py
+"""
+文章全文检索。
+
+- 保存文章时对标题/摘要/内容进行中文分词，写入 ArticleSearchDocument（增量更新）。
+- PostgreSQL：维护带权重的 tsvector（标题 A > 摘要 B > 内容 C），GIN 索引 + ts_rank 排序。
+- SQLite：通过 FTS5 虚拟表检索，bm25 按字段加权排序（本地开发与测试使用）。
+- 其他数据库：退化为对分词文本的 icontains 查询。
+
+分词优先使用 jieba；未安装时对连续的中文字符使用二元切分（bigram），
+索引与查询使用同一分词器，因此结果仍然一致。
+"""
+import re
+from django.db import connections
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import BaseFilterBackend
+from .models import ArticleSearchDocument
+
+try:
+    import jieba
+except ImportError: # 可选依赖
+    jieba = None
+
+SEARCHABLE_FIELDS = ('title', 'excerpt', 'content')
+
+# 字段权重：标题 > 摘要 > 内容
+FIELD_WEIGHTS = {'title': 'A', 'excerpt': 'B', 'content': 'C'}
+SQLITE_BM25_WEIGHTS = (10.0, 4.0, 1.0)
+
+_CJK_RUN = re.compile(r'[㐀-䶿一-鿿豈-﫿]+')
+_WORD = re.compile(r'[㐀-䶿一-鿿豈-﫿]+|[^\W_]+')
+
+
+def _bigrams(run):
+    if len(run) == 1:
+        return [run]
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def tokenize(text, for_query=False):
+    """
+    把文本切分为小写词列表（去除标点与空白）。
+    索引时使用 jieba 的搜索引擎模式（长词再细分，提高召回），查询时使用精确模式。
+    """
+    if not text:
+        return []
+    if jieba is not None:
+        words = jieba.cut(text) if for_query else jieba.cut_for_search(text)
+        return [w.lower() for w in words if _WORD.search(w)]
+    tokens = []
+    for word in _WORD.findall(text):
+        if _CJK_RUN.fullmatch(word):
+            tokens.extend(_bigrams(word))
+        else:
+            tokens.append(word.lower())
+    return tokens
+
+
+def segment(text):
+    """分词后以空格连接，作为检索文档中存储的文本"""
+    return ' '.join(tokenize(text))
+
+
+class BaseSearchBackend:
+    vendor = None
+
+    def update_document(self, document):
+        """检索文档行写入后的额外处理（如计算 tsvector）"""
+        self.update_documents(ArticleSearchDocument.objects.using(document._state.db).filter(pk=document.pk))
+
+    def update_documents(self, queryset):
+        """批量版本：对 queryset 中的检索文档做额外处理"""
+
+    def search(self, queryset, tokens):
+        """返回过滤后的 queryset，并标注相关度 search_rank（越大越相关）"""
+        raise NotImplementedError
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    vendor = 'postgresql'
+    config = 'simple' # 已在应用层完成中文分词，数据库侧不再做词干处理
+
+    def update_documents(self, queryset):
+        from django.contrib.postgres.search import SearchVector
+        vector = None
+        for field in SEARCHABLE_FIELDS:
+            part = SearchVector(field, weight=FIELD_WEIGHTS[field], config=self.config)
+            vector = part if vector is None else vector + part
+        queryset.update(vector=vector)
+
+    def search(self, queryset, tokens):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+        query = SearchQuery(' '.join(tokens), config=self.config, search_type='plain')
+        return queryset.filter(search_document__vector=query).annotate(
+            search_rank=SearchRank(F('search_document__vector'), query)
+        )
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    vendor = 'sqlite'
+    table = 'articles_article_fts'
+
+    @staticmethod
+    def match_expression(tokens):
+        # 每个词加引号作为短语，空格连接表示 AND
+        return ' '.join('"%s"' % token.replace('"', '""') for token in tokens)
+
+    def search(self, queryset, tokens):
+        match = self.match_expression(tokens)
+        table = self.table
+        weights = ', '.join(str(w) for w in SQLITE_BM25_WEIGHTS)
+        alias = queryset.model._meta.db_table
+        return queryset.filter(
+            id__in=RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [match])
+        ).annotate(
+            # bm25 越小越相关，取负值使其与 PostgreSQL 的 rank 方向一致
+            search_rank=RawSQL(
+                f'SELECT -bm25({table}, {weights}) FROM {table} '
+                f'WHERE {table} MATCH %s AND rowid = "{alias}"."id"',
+                [match],
+                output_field=FloatField(),
+            )
+        )
+
+
+class BasicSearchBackend(BaseSearchBackend):
+    """没有全文索引支持的数据库：在分词文本上做 icontains"""
+
+    def search(self, queryset, tokens):
+        for token in tokens:
+            condition = Q()
+            for field in SEARCHABLE_FIELDS:
+                condition |= Q(**{f'search_document__{field}__icontains': token})
+            queryset = queryset.filter(condition)
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+_BACKENDS = {backend.vendor: backend() for backend in (PostgresSearchBackend, SQLiteSearchBackend)}
+
+
+def get_backend(using='default'):
+    return _BACKENDS.get(connections[using].vendor) or BasicSearchBackend()
+
+
+def index_article(article, using='default'):
+    """为单篇文章（重新）生成检索文档"""
+    document, _ = ArticleSearchDocument.objects.using(using).update_or_create(
+        article_id=article.pk,
+        defaults={field: segment(getattr(article, field)) for field in SEARCHABLE_FIELDS},
+    )
+    get_backend(using).update_document(document)
+    return document
+
+
+def index_articles(articles, using='default', batch_size=500, segments=None):
+    """
+    为一批新插入的文章生成检索文档（bulk_create 不触发 post_save，导入/造数后调用）。
+    文章必须尚无检索文档。segments 可传入与 articles 一一对应的 {字段: 分词文本}，
+    用于在其他进程中预先完成分词的场景。
+    """
+    if segments is None:
+        segments = ({field: segment(getattr(article, field)) for field in SEARCHABLE_FIELDS} for article in articles)
+    documents = [
+        ArticleSearchDocument(article_id=article.pk, **fields)
+        for article, fields in zip(articles, segments)
+    ]
+    ArticleSearchDocument.objects.using(using).bulk_create(documents, batch_size=batch_size)
+    get_backend(using).update_documents(
+        ArticleSearchDocument.objects.using(using).filter(pk__in=[document.article_id for document in documents])
+    )
+    return len(documents)
+
+
+def search_articles(queryset, query):
+    """对 queryset 执行全文检索，结果按相关度降序、创建时间降序排列"""
+    tokens = tokenize(query, for_query=True)
+    if not tokens:
+        return queryset
+    queryset = get_backend(queryset.db).search(queryset, tokens)
+    return queryset.order_by('-search_rank', '-created_at')
+
+
+class ArticleSearchFilter(BaseFilterBackend):
+    """
+    替代 SearchFilter 的全文检索过滤器，参数名同样为 ?search=。
+    与其他过滤条件（状态、作者、分类）叠加使用；若同时指定 ?ordering=，
+    由后续的 OrderingFilter 覆盖相关度排序。
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        return search_articles(queryset, query)
@@ -1,6 +1,42 @@
 from rest_framework import serializers
-from .models import Article, Comment, Category
+from .models import Article, ArticleRevision, Comment, Category, CategoryClosure, COMMENT_MAX_DEPTH
 from accounts.serializers import UserSimpleSerializer # 引入简化的用户序列化器
+from .instrumentation import TimedSerializerMixin
+from . import images
+
+class DynamicFieldsMixin:
+    """
+    支持按需裁剪输出字段的序列化器：
+    fields=['id', 'title'] 只保留这些字段，omit=['content'] 去掉这些字段。
+    由视图根据请求参数 ?fields= / ?omit= 传入。
+    """
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        omit = kwargs.pop('omit', None)
+        super().__init__(*args, **kwargs)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        if omit:
+            for name in set(omit) & set(self.fields):
+                self.fields.pop(name)
+
+
+class CoverSrcsetField(serializers.Field):
+    """
+    封面缩略图的 srcset：{"webp": "url 320w, url 640w", "jpeg": "..."}，变体尚未生成时为 null。
+    只读取 cover_variants 列，不访问存储
+    """
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        kwargs.setdefault('source', 'cover_variants')
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        storage = Article._meta.get_field('cover_image').storage
+        return images.srcset(value, storage, build_url=request.build_absolute_uri if request else None)
+
 
 class RecursiveCategorySerializer(serializers.Serializer):
     """用于递归显示子分类 (辅助，实际可能不用这么复杂)"""
@@ -8,7 +44,7 @@ class RecursiveCategorySerializer(serializers.Serializer):
         serializer = self.parent.parent.__class__(value, context=self.context)
         return serializer.data
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     # 用于接收前端传来的 parent_id (创建/更新时)
     # source='parent' 意味着它会作用于模型的 'parent' 字段
     parent = serializers.PrimaryKeyRelatedField(
@@ -30,22 +66,39 @@ class CategorySerializer(serializers.ModelSerializer):
             'children_count'
         ]
 
+    def validate_parent(self, value):
+        # 不允许把分类移动到自身或其子孙分类下，否则会形成环
+        if value is not None and self.instance is not None:
+            if CategoryClosure.objects.filter(ancestor=self.instance, descendant=value).exists():
+                raise serializers.ValidationError('不能将分类移动到其自身或其子分类下。')
+        return value
+
     def get_parent_details(self, obj):
         if obj.parent:
             return {'id': obj.parent.id, 'name': obj.parent.name}
         return None
 
     def get_children_count(self, obj):
-        return obj.children.count()
+        # 列表查询已通过 annotate 计算好，其余场景（如新建后返回）再查询
+        count = getattr(obj, 'children_count', None)
+        return count if count is not None else obj.children.count()
+
 
+class CategorySimpleSerializer(serializers.ModelSerializer):
+    """用于文章列表中显示分类信息，不涉及父分类和子分类数量，无需额外查询"""
+    class Meta:
+        model = Category
+        fields = ('id', 'name', 'parent')
 
-class ArticleSerializer(serializers.ModelSerializer):
+
+class ArticleSerializer(TimedSerializerMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     author = UserSimpleSerializer(read_only=True)
     # category = CategorySerializer(read_only=True) # 读取时显示分类详情
     # category_id = serializers.PrimaryKeyRelatedField(
     #     queryset=Category.objects.all(), source='category', write_only=True, allow_null=True, required=False
     # )
     category_details = CategorySerializer(source='category', read_only=True)
+    cover_srcset = CoverSrcsetField()
     category = serializers.PrimaryKeyRelatedField(
         queryset=Category.objects.all(), write_only=True, allow_null=True, required=False
     )
@@ -54,11 +107,13 @@ class ArticleSerializer(serializers.ModelSerializer):
     class Meta:
         model = Article
         fields = [
-            'id', 'title', 'content', 'excerpt', 'cover_image',
+            'id', 'title', 'content', 'excerpt', 'cover_image', 'cover_srcset',
             'author', 'category', 'category_details', 'status',
-            'created_at', 'updated_at'
+            'comment_count', 'last_commented_at', 'created_at', 'updated_at'
         ]
-        read_only_fields = ('author', 'created_at', 'updated_at', 'category_details')
+        read_only_fields = (
+            'author', 'created_at', 'updated_at', 'category_details', 'comment_count', 'last_commented_at'
+        )
 
     # 如果需要自定义创建或更新逻辑，可以重写 create/update 方法
     # 例如，在前端没有传 excerpt 时自动生成
@@ -68,11 +123,83 @@ class ArticleSerializer(serializers.ModelSerializer):
     #     return super().create(validated_data)
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class ArticleListSerializer(ArticleSerializer):
+    """
+    文章列表的轻量表示：不包含完整的 content（查询时 defer 该列），
+    改为返回数据库端截取的 content_preview，分类只返回基本信息。
+    """
+    category_details = CategorySimpleSerializer(source='category', read_only=True)
+    content_preview = serializers.CharField(read_only=True, default='')
+
+    class Meta(ArticleSerializer.Meta):
+        fields = [
+            'id', 'title', 'excerpt', 'content_preview', 'cover_image', 'cover_srcset',
+            'author', 'category', 'category_details', 'status',
+            'comment_count', 'last_commented_at', 'created_at', 'updated_at'
+        ]
+
+
+class ArticleRevisionSerializer(serializers.ModelSerializer):
+    """历史版本列表：不含正文"""
+    author = UserSimpleSerializer(read_only=True)
+
+    class Meta:
+        model = ArticleRevision
+        fields = ['number', 'title', 'excerpt', 'author', 'size', 'is_snapshot', 'created_at']
+        read_only_fields = fields
+
+
+class ArticleRevisionDetailSerializer(ArticleRevisionSerializer):
+    """单个历史版本：正文由 articles.revisions 还原后放在 full_content 上"""
+    content = serializers.CharField(source='full_content', read_only=True)
+
+    class Meta(ArticleRevisionSerializer.Meta):
+        fields = ArticleRevisionSerializer.Meta.fields + ['content']
+        read_only_fields = fields
+
+
+class ArticleAutosaveSerializer(serializers.Serializer):
+    """增量自动保存的请求：patch 与 content 二选一（都不提供时只修改标题或摘要），见 articles.autosave"""
+    version = serializers.CharField()
+    patch = serializers.JSONField(required=False)
+    # 补丁按字符偏移应用，正文不能去掉首尾空白
+    content = serializers.CharField(required=False, allow_blank=True, trim_whitespace=False)
+    title = serializers.CharField(required=False, max_length=Article._meta.get_field('title').max_length)
+    excerpt = serializers.CharField(required=False, allow_blank=True)
+    flush = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if 'patch' in attrs and 'content' in attrs:
+            raise serializers.ValidationError('patch 与 content 只能提供一个。')
+        return attrs
+
+
+class CommentSerializer(TimedSerializerMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     author = UserSimpleSerializer(read_only=True)
     article = serializers.PrimaryKeyRelatedField(queryset=Article.objects.all()) # 写入时关联文章ID
+    # 回复时传入父评论ID，顶层评论为 null
+    parent_comment = serializers.PrimaryKeyRelatedField(
+        queryset=Comment.objects.all(), allow_null=True, required=False
+    )
 
     class Meta:
         model = Comment
-        fields = ['id', 'article', 'author', 'content', 'created_at']
-        read_only_fields = ('author', 'created_at')
\ No newline at end of file
+        fields = ['id', 'article', 'parent_comment', 'depth', 'author', 'content', 'created_at']
+        read_only_fields = ('author', 'created_at', 'depth')
+
+    def validate(self, attrs):
+        # 楼层路径在创建时确定，之后不允许修改所属文章或父评论
+        if self.instance is not None:
+            if attrs.get('article', self.instance.article) != self.instance.article:
+                raise serializers.ValidationError({'article': '不能修改评论所属的文章。'})
+            if attrs.get('parent_comment', self.instance.parent_comment) != self.instance.parent_comment:
+                raise serializers.ValidationError({'parent_comment': '不能修改父评论。'})
+            return attrs
+
+        parent = attrs.get('parent_comment')
+        if parent is not None:
+            if parent.article_id != attrs['article'].id:
+                raise serializers.ValidationError({'parent_comment': '父评论不属于该文章。'})
+            if parent.depth + 1 >= COMMENT_MAX_DEPTH:
+                raise serializers.ValidationError({'parent_comment': '回复层级过深。'})
+        return attrs
\ No newline at end of file
@@ -0,0 +1,83 @@
+# articles/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from . import category_tree, images, response_cache, search
+from .models import Article, Category, CategoryClosure, Comment
+
+_UNKNOWN = object()
+
+
+@receiver(post_save, sender=Category)
+def maintain_closure_on_save(sender, instance, created, raw=False, **kwargs):
+    """新建或移动分类时同步维护闭包表。"""
+    if raw: # loaddata 导入时由 rebuild() 统一处理
+        return
+    with transaction.atomic():
+        if created:
+            CategoryClosure.objects.insert_node(instance)
+        else:
+            old_parent_id = getattr(instance, '_loaded_parent_id', _UNKNOWN)
+            if old_parent_id is _UNKNOWN:
+                # 实例不是从数据库加载的，无法得知旧父级，只能从闭包表中查
+                old_parent_id = (
+                    CategoryClosure.objects.filter(descendant_id=instance.pk, depth=1)
+                    .values_list('ancestor_id', flat=True).first()
+                )
+            if old_parent_id != instance.parent_id:
+                CategoryClosure.objects.move_subtree(instance)
+    instance._loaded_parent_id = instance.parent_id
+
+
+@receiver(pre_delete, sender=Category)
+def detach_closure_on_delete(sender, instance, **kwargs):
+    """
+    分类删除时，子分类的 parent 会被 SET_NULL 成为根分类，
+    因此需要在删除前断开“被删节点的祖先 -> 其子树”的路径。
+    被删节点自身相关的路径由外键 CASCADE 删除。
+    """
+    CategoryClosure.objects.detach_subtree(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_tree(sender, **kwargs):
+    category_tree.invalidate()
+
+
+@receiver(post_save, sender=Article)
+def update_search_document(sender, instance, raw=False, update_fields=None, using='default', **kwargs):
+    """增量更新检索文档；只更新了与检索无关的字段时跳过"""
+    if raw:
+        return
+    if update_fields is not None and not set(update_fields) & set(search.SEARCHABLE_FIELDS):
+        return
+    search.index_article(instance, using=using)
+
+
+@receiver(post_save, sender=Article)
+def schedule_cover_variants(sender, instance, raw=False, **kwargs):
+    """封面变化后（cover_variants 被清空或与封面不符），提交事务后在后台生成缩略图"""
+    if raw or not instance.cover_image:
+        return
+    source = instance.cover_image.name
+    if instance.cover_variants.get('source') != source:
+        transaction.on_commit(lambda: images.schedule_variants(source))
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def invalidate_article_responses(sender, **kwargs):
+    response_cache.invalidate('article')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_responses(sender, **kwargs):
+    response_cache.invalidate('category')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_responses(sender, **kwargs):
+    response_cache.invalidate('comment')
@@ -0,0 +1,87 @@
+# articles/summary/__init__.py
+import threading
+from django.conf import settings
+from django.utils.module_loading import import_string
+from .backends import (
+    BaseSummaryBackend, LocalStubBackend, SummaryConfigurationError, SummaryError, ZhipuAIBackend,
+)
+from .cache import SummaryCache
+from .jobs import (
+    FAILED, FINISHED_STATES, PENDING, RUNNING, SUCCEEDED, AsyncSummaryRunner, QueueFull, SummaryJobQueue,
+)
+from .pipeline import SummaryPipeline
+
+DEFAULTS = {
+    'BACKEND': 'articles.summary.backends.ZhipuAIBackend',
+    'OPTIONS': {},
+    'WORKERS': 4,
+    'QUEUE_SIZE': 32,
+    'MAX_RETRIES': 2,
+    'RETRY_BACKOFF': 1.0,
+    'JOB_TTL': 3600,
+    'CACHE_MAX_ENTRIES': 1024,
+    'CACHE_TTL': 86400,
+    'CHUNK_THRESHOLD': 8000,
+    'CHUNK_SIZE': 4000,
+    'CHUNK_WORKERS': 4,
+}
+
+_queue = None
+_runner = None
+_queue_lock = threading.Lock()
+
+
+def get_summary_settings():
+    return {**DEFAULTS, **getattr(settings, 'SUMMARY_SERVICE', {})}
+
+
+def get_backend():
+    config = get_summary_settings()
+    return import_string(config['BACKEND'])(**config['OPTIONS'])
+
+
+def get_pipeline(config=None):
+    config = config or get_summary_settings()
+    return SummaryPipeline(
+        get_backend(),
+        cache=SummaryCache(max_entries=config['CACHE_MAX_ENTRIES'], ttl=config['CACHE_TTL']),
+        chunk_threshold=config['CHUNK_THRESHOLD'],
+        chunk_size=config['CHUNK_SIZE'],
+        chunk_workers=config['CHUNK_WORKERS'],
+    )
+
+
+def get_job_queue():
+    """进程内唯一的摘要任务队列，首次使用时按 settings.SUMMARY_SERVICE 创建"""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                config = get_summary_settings()
+                _queue = SummaryJobQueue(
+                    get_pipeline(config),
+                    workers=config['WORKERS'],
+                    queue_size=config['QUEUE_SIZE'],
+                    max_retries=config['MAX_RETRIES'],
+                    retry_backoff=config['RETRY_BACKOFF'],
+                    job_ttl=config['JOB_TTL'],
+                )
+    return _queue
+
+
+def get_summary_runner():
+    """异步视图使用的摘要执行器，与任务队列共用同一条流水线（及其缓存）"""
+    global _runner
+    if _runner is None:
+        pipeline = get_job_queue().pipeline
+        with _queue_lock:
+            if _runner is None:
+                config = get_summary_settings()
+                _runner = AsyncSummaryRunner(
+                    pipeline,
+                    workers=config['WORKERS'],
+                    queue_size=config['QUEUE_SIZE'],
+                    max_retries=config['MAX_RETRIES'],
+                    retry_backoff=config['RETRY_BACKOFF'],
+                )
+    return _runner
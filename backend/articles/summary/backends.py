@@ -0,0 +1,165 @@
+# articles/summary/backends.py
+"""
+摘要生成的模型后端。后端只负责“提示词 -> 模型输出文本”，
+提示词构造、分块与 <think> 标签清理等后处理在 pipeline.SummaryPipeline 中完成。
+
+异步视图使用 acomplete：默认放到线程中执行 complete；ZhipuAIBackend 直接用 httpx.AsyncClient 调用 HTTP 接口，
+等待模型输出期间不占用线程。
+"""
+import asyncio
+import re
+import time
+import weakref
+import httpx
+from asgiref.sync import sync_to_async
+
+THINK_TAG_PATTERN = re.compile(r'<think>.*?</think>', re.DOTALL)
+
+
+class SummaryError(Exception):
+    """摘要生成失败；retryable 表示是否值得重试（超时、限流等临时错误）"""
+    retryable = True
+
+
+class SummaryConfigurationError(SummaryError):
+    """后端配置错误（如缺少 API 密钥），重试无意义"""
+    retryable = False
+
+
+def _status_error(status_code, detail):
+    error = SummaryError(f'API调用失败: HTTP {status_code} {detail}')
+    # 限流与服务端错误可以重试，其余（如密钥无效）重试无意义
+    error.retryable = status_code == 429 or status_code >= 500
+    return error
+
+
+def clean_summary(text):
+    # 移除推理模型输出的 <think> 标签及其内容
+    return THINK_TAG_PATTERN.sub('', text or '').strip()
+
+
+class BaseSummaryBackend:
+    def __init__(self, model=None, max_tokens=1000, temperature=0.2, timeout=60, **options):
+        self.model = model
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.timeout = timeout
+        self.options = options
+
+    def complete(self, prompt):
+        """调用模型，返回原始输出文本。失败时抛出 SummaryError。"""
+        raise NotImplementedError
+
+    async def acomplete(self, prompt):
+        """complete 的异步版本；没有原生异步实现的后端在线程中执行"""
+        return await sync_to_async(self.complete, thread_sensitive=False)(prompt)
+
+    def cache_namespace(self):
+        """影响输出结果的后端参数，作为摘要缓存键的一部分"""
+        return f'{type(self).__name__}:{self.model}:{self.max_tokens}:{self.temperature}'
+
+
+class ZhipuAIBackend(BaseSummaryBackend):
+    """智谱 AI 官方 SDK。客户端在进程内复用，以保持 HTTP 连接。"""
+
+    def __init__(self, api_key='', model='glm-z1-flash', base_url='https://open.bigmodel.cn/api/paas/v4',
+                 max_connections=20, **options):
+        if not api_key:
+            raise SummaryConfigurationError('API密钥未配置')
+        super().__init__(model=model, **options)
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self._client = None
+        # httpx.AsyncClient 绑定创建它的事件循环，每个循环各用一个，循环内复用连接
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    @property
+    def client(self):
+        if self._client is None:
+            from zhipuai import ZhipuAI
+            # 重试由任务队列统一控制，SDK 自身不再重试
+            self._client = ZhipuAI(api_key=self.api_key, timeout=self.timeout, max_retries=0)
+        return self._client
+
+    def complete(self, prompt):
+        from zhipuai import APIConnectionError, APIStatusError, ZhipuAIError
+        # 与 acomplete 相同的分类：限流、服务端错误与连接/超时可以重试；SDK 以外的异常原样抛出，由任务队列按不可重试处理
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+            )
+        except APIStatusError as e:
+            raise _status_error(e.status_code, str(e)[:200]) from e
+        except (APIConnectionError, httpx.TransportError) as e:
+            raise SummaryError(f'API调用异常: {e}') from e
+        except ZhipuAIError as e:
+            error = SummaryError(f'API调用异常: {e}')
+            error.retryable = False
+            raise error from e
+        if response.choices and response.choices[0].message.content:
+            return response.choices[0].message.content
+        raise SummaryError('摘要生成失败')
+
+    def async_client(self):
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_clients[loop] = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={'Authorization': f'Bearer {self.api_key}'},
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            )
+        return client
+
+    async def acomplete(self, prompt):
+        try:
+            response = await self.async_client().post('/chat/completions', json={
+                'model': self.model,
+                'messages': [{'role': 'user', 'content': prompt}],
+                'max_tokens': self.max_tokens,
+                'temperature': self.temperature,
+            })
+        except httpx.HTTPError as e:
+            raise SummaryError(f'API调用异常: {e}') from e
+        if response.status_code >= 400:
+            raise _status_error(response.status_code, response.text[:200])
+        choices = response.json().get('choices') or [{}]
+        content = (choices[0].get('message') or {}).get('content')
+        if content:
+            return content
+        raise SummaryError('摘要生成失败')
+
+
+class LocalStubBackend(BaseSummaryBackend):
+    """
+    离线的确定性后端：取正文开头的若干句作为摘要，用于本地开发与测试。
+    输出中带有 <think> 段落，以便同样经过后处理流程。
+    """
+    SENTENCE_END = re.compile(r'(?<=[。！？.!?])\s*')
+
+    def __init__(self, model='local-stub', max_sentences=2, max_chars=200, latency=0, **options):
+        super().__init__(model=model, **options)
+        self.max_sentences = max_sentences
+        self.max_chars = max_chars
+        self.latency = latency # 模拟模型调用的网络等待（秒），用于压测
+
+    def complete(self, prompt):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._summarize(prompt)
+
+    async def acomplete(self, prompt):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._summarize(prompt)
+
+    def _summarize(self, prompt):
+        content = prompt.split('：', 1)[-1].strip()
+        sentences = [s for s in self.SENTENCE_END.split(content) if s.strip()]
+        summary = ''.join(sentences[:self.max_sentences])[:self.max_chars]
+        return f'<think>local stub</think>{summary}'
@@ -0,0 +1,173 @@
+# articles/summary/jobs.py
+"""
+摘要任务队列：POST 请求只登记任务并立即返回任务 ID，模型调用在有界的线程池中执行。
+
+- 并发：最多 WORKERS 个任务同时调用模型；
+- 背压：排队 + 执行中的任务总数超过 WORKERS + QUEUE_SIZE 时拒绝新任务 (QueueFull)；
+- 超时与重试：单次调用的超时由后端的 HTTP 客户端控制，临时错误按指数退避重试；
+- 任务状态保存在 Django 的 default cache 中（带 TTL），客户端按 Retry-After 短轮询。
+  多进程部署时 default 必须是共享缓存，否则查询落到其它进程会返回 404（见 articles.checks）。
+
+AsyncSummaryRunner 是异步视图使用的同步返回版本：在事件循环中等待模型，不创建任务，
+并发上限、排队上限与重试规则与队列相同。
+"""
+import asyncio
+import threading
+import time
+import uuid
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from django.core.cache import cache
+from .backends import SummaryError
+
+PENDING = 'pending'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+FINISHED_STATES = (SUCCEEDED, FAILED)
+
+
+class QueueFull(Exception):
+    pass
+
+
+class SummaryJobQueue:
+    cache_key_prefix = 'articles:summary_job:'
+
+    def __init__(self, pipeline, workers=4, queue_size=32, max_retries=2, retry_backoff=1.0, job_ttl=3600):
+        self.pipeline = pipeline
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.job_ttl = job_ttl
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='summary-worker')
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def _key(self, job_id):
+        return f'{self.cache_key_prefix}{job_id}'
+
+    def _save(self, job):
+        cache.set(self._key(job['id']), dict(job), timeout=self.job_ttl)
+
+    def get(self, job_id):
+        return cache.get(self._key(job_id))
+
+    def _new_job(self, owner_id, **fields):
+        return {
+            'id': uuid.uuid4().hex,
+            'status': PENDING,
+            'owner_id': owner_id,
+            'summary': None,
+            'error': None,
+            'attempts': 0,
+            'cached': False,
+            'created_at': time.time(),
+            'finished_at': None,
+            **fields,
+        }
+
+    def submit(self, content, owner_id=None):
+        # 相同内容（及模型参数）的摘要已缓存时直接完成，不占用工作线程
+        summary = self.pipeline.lookup(content)
+        if summary is not None:
+            now = time.time()
+            job = self._new_job(owner_id, status=SUCCEEDED, summary=summary, cached=True, finished_at=now)
+            self._save(job)
+            return job
+
+        if not self._slots.acquire(blocking=False):
+            raise QueueFull('摘要任务过多，请稍后重试')
+        job = self._new_job(owner_id)
+        snapshot = dict(job) # 返回快照，之后 job 由工作线程修改
+        self._save(job)
+        try:
+            self._executor.submit(self._run, job, content)
+        except RuntimeError: # 线程池已关闭
+            self._slots.release()
+            raise QueueFull('摘要服务正在停止')
+        return snapshot
+
+    def _run(self, job, content):
+        try:
+            job['status'] = RUNNING
+            self._save(job)
+            self._execute(job, content)
+        finally:
+            job['finished_at'] = time.time()
+            self._save(job)
+            self._slots.release()
+
+    def _execute(self, job, content):
+        for attempt in range(self.max_retries + 1):
+            job['attempts'] = attempt + 1
+            try:
+                job['summary'] = self.generate(content)
+                job['status'] = SUCCEEDED
+                return
+            except SummaryError as e:
+                job['error'] = str(e)
+                if not e.retryable or attempt == self.max_retries:
+                    break
+                time.sleep(self.retry_backoff * (2 ** attempt))
+            except Exception as e: # 未预期的错误不重试
+                job['error'] = f'摘要生成失败: {e}'
+                break
+        job['status'] = FAILED
+
+    def generate(self, content):
+        return self.pipeline.generate(content)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+class AsyncSummaryRunner:
+    """
+    在事件循环中生成摘要。信号量与计数按事件循环分别保存（asyncio 原语不能跨循环使用），
+    uvicorn 等 ASGI 服务器每个进程只有一个循环。
+    """
+
+    def __init__(self, pipeline, workers=4, queue_size=32, max_retries=2, retry_backoff=1.0):
+        self.pipeline = pipeline
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._states = weakref.WeakKeyDictionary() # 事件循环 -> _LoopState
+
+    def _state(self):
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            state = self._states[loop] = _LoopState(self.workers)
+        return state
+
+    async def run(self, content):
+        """返回 (摘要, 是否命中缓存)；排队已满时抛出 QueueFull，最终失败时抛出 SummaryError"""
+        summary = self.pipeline.lookup(content)
+        if summary is not None:
+            return summary, True
+
+        state = self._state()
+        if state.active >= self.workers + self.queue_size:
+            raise QueueFull('摘要任务过多，请稍后重试')
+        state.active += 1
+        try:
+            async with state.semaphore:
+                return await self._execute(content), False
+        finally:
+            state.active -= 1
+
+    async def _execute(self, content):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self.pipeline.agenerate(content)
+            except SummaryError as e:
+                if not e.retryable or attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(self.retry_backoff * (2 ** attempt))
+
+
+class _LoopState:
+    def __init__(self, workers):
+        self.semaphore = asyncio.Semaphore(workers)
+        self.active = 0 # 排队 + 执行中的请求数
@@ -0,0 +1,148 @@
+# articles/summary/pipeline.py
+"""
+摘要流水线：内容哈希缓存 -> （长文）分块并行摘要 -> 合并 -> 后处理。
+
+- 缓存键 = 规范化内容的 SHA-256 + 后端/模型/参数，同一草稿重复点击不再调用模型；
+- 超过 chunk_threshold 字符的内容按段落/句子切成不超过 chunk_size 的块，
+  各块并行摘要（块摘要同样缓存，修改长文的一部分时其余块可复用），再合并为一篇摘要；
+- 所有模型输出都经过 clean_summary（移除 <think> 段落）。
+
+agenerate / asummarize 是供异步视图使用的版本：调用后端的 acomplete，各块用 asyncio.gather 并发，
+同样最多 chunk_workers 个同时进行。两种版本共用同一个缓存。
+"""
+import asyncio
+import hashlib
+import re
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from .backends import SummaryError, clean_summary
+from .cache import SummaryCache
+
+PROMPT_VERSION = 1 # 修改提示词时递增，使旧缓存失效
+SUMMARY_PROMPT = '生成这段内容的摘要，不要输出任何多余文字：{content}'
+CHUNK_PROMPT = '这是一篇长文中的一个片段，生成这段内容的要点摘要，不要输出任何多余文字：{content}'
+MERGE_PROMPT = '以下是一篇长文各部分的摘要，将它们合并为一篇连贯的摘要，不要输出任何多余文字：{content}'
+
+_WHITESPACE = re.compile(r'\s+')
+_PARAGRAPH_BREAK = re.compile(r'\n\s*\n|\n')
+_SENTENCE_END = re.compile(r'(?<=[。！？.!?；;])')
+
+
+def normalize_content(content):
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFKC', content)).strip()
+
+
+def split_into_chunks(content, chunk_size):
+    """按段落、再按句子切分，必要时硬切，使每块不超过 chunk_size 个字符"""
+    pieces = []
+    for paragraph in _PARAGRAPH_BREAK.split(content):
+        if len(paragraph) <= chunk_size:
+            pieces.append(paragraph)
+            continue
+        for sentence in _SENTENCE_END.split(paragraph):
+            pieces.extend(sentence[i:i + chunk_size] for i in range(0, len(sentence), chunk_size))
+
+    chunks, current = [], ''
+    for piece in pieces:
+        piece = piece.strip()
+        if not piece:
+            continue
+        if current and len(current) + len(piece) + 1 > chunk_size:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f'{current}\n{piece}' if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class SummaryPipeline:
+    def __init__(self, backend, cache=None, chunk_threshold=8000, chunk_size=4000, chunk_workers=4):
+        self.backend = backend
+        self.cache = cache if cache is not None else SummaryCache()
+        self.chunk_threshold = chunk_threshold
+        self.chunk_size = min(chunk_size, chunk_threshold)
+        self.chunk_workers = chunk_workers
+        # 与任务队列的线程池分开，避免任务线程等待分块任务时互相占满
+        self._executor = ThreadPoolExecutor(max_workers=chunk_workers, thread_name_prefix='summary-chunk')
+
+    def cache_key(self, content, kind='summary'):
+        digest = hashlib.sha256(normalize_content(content).encode('utf-8')).hexdigest()
+        return f'{kind}:v{PROMPT_VERSION}:{self.backend.cache_namespace()}:{digest}'
+
+    def lookup(self, content):
+        """只查缓存（计入命中统计），未命中返回 None"""
+        return self.cache.get(self.cache_key(content))
+
+    def generate(self, content):
+        """调用模型生成摘要并写入缓存（不先查缓存，调用方应已 lookup 过）"""
+        if len(content) > self.chunk_threshold:
+            summary = self._map_reduce(content)
+        else:
+            summary = self._complete(SUMMARY_PROMPT, content)
+        self.cache.set(self.cache_key(content), summary)
+        return summary
+
+    def summarize(self, content):
+        summary = self.lookup(content)
+        return summary if summary is not None else self.generate(content)
+
+    def _complete(self, prompt, text):
+        summary = clean_summary(self.backend.complete(prompt.format(content=text)))
+        if not summary:
+            raise SummaryError('摘要生成失败')
+        return summary
+
+    def _summarize_chunk(self, chunk):
+        key = self.cache_key(chunk, kind='chunk')
+        summary = self.cache.get(key)
+        if summary is None:
+            summary = self._complete(CHUNK_PROMPT, chunk)
+            self.cache.set(key, summary)
+        return summary
+
+    def _map_reduce(self, content):
+        partials = list(self._executor.map(self._summarize_chunk, split_into_chunks(content, self.chunk_size)))
+        merged = '\n'.join(partials)
+        # 各块摘要合起来仍然过长时，再做一轮分块摘要（内容必须在缩短，否则直接合并）
+        if len(merged) > self.chunk_threshold and len(merged) < len(content):
+            return self._map_reduce(merged)
+        return self._complete(MERGE_PROMPT, merged)
+
+    async def agenerate(self, content):
+        if len(content) > self.chunk_threshold:
+            summary = await self._amap_reduce(content)
+        else:
+            summary = await self._acomplete(SUMMARY_PROMPT, content)
+        self.cache.set(self.cache_key(content), summary)
+        return summary
+
+    async def asummarize(self, content):
+        summary = self.lookup(content)
+        return summary if summary is not None else await self.agenerate(content)
+
+    async def _acomplete(self, prompt, text):
+        summary = clean_summary(await self.backend.acomplete(prompt.format(content=text)))
+        if not summary:
+            raise SummaryError('摘要生成失败')
+        return summary
+
+    async def _asummarize_chunk(self, chunk, limit):
+        key = self.cache_key(chunk, kind='chunk')
+        summary = self.cache.get(key)
+        if summary is None:
+            async with limit:
+                summary = await self._acomplete(CHUNK_PROMPT, chunk)
+            self.cache.set(key, summary)
+        return summary
+
+    async def _amap_reduce(self, content):
+        limit = asyncio.Semaphore(self.chunk_workers)
+        partials = await asyncio.gather(
+            *(self._asummarize_chunk(chunk, limit) for chunk in split_into_chunks(content, self.chunk_size))
+        )
+        merged = '\n'.join(partials)
+        if len(merged) > self.chunk_threshold and len(merged) < len(content):
+            return await self._amap_reduce(merged)
+        return await self._acomplete(MERGE_PROMPT, merged)
@@ -1,3 +1,630 @@
-from django.test import TestCase
+import datetime
+import io
+import httpx
+import importlib.util
+import unittest
+from urllib.parse import parse_qs, urlsplit
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import call_command
+from django.conf import settings
+from django.db import connection, connections
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from backend_project import db_routing
+from . import autosave, checks, images, response_cache, revisions
+from .summary import SummaryError, ZhipuAIBackend
+from .models import COMMENT_MAX_DEPTH, Article, ArticleRevision, Category, CategoryClosure, Comment
+from .transfer import ArticleRecordSerializer
 
-# Create your tests here.
+User = get_user_model()
+
+
+@override_settings(RESPONSE_CACHE={'ENABLED': False})
+class ArticleDetailQueryBudgetTests(APITestCase):
+    """文章详情是访问量最大的接口：取对象、权限判断、序列化合计只允许一条 SQL"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', 'author@example.com', 'password')
+        cls.other = User.objects.create_user('other', 'other@example.com', 'password')
+        cls.parent = Category.objects.create(name='技术')
+        cls.category = Category.objects.create(name='数据库', parent=cls.parent)
+        Category.objects.create(name='PostgreSQL', parent=cls.category)
+        Category.objects.create(name='MySQL', parent=cls.category)
+        cls.published = Article.objects.create(
+            title='已发布', content='内容', author=cls.author, category=cls.category, status='published'
+        )
+        cls.draft = Article.objects.create(
+            title='草稿', content='内容', author=cls.author, category=cls.parent, status='draft'
+        )
+
+    def retrieve(self, article):
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/articles/{article.pk}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_anonymous_retrieve_is_one_query(self):
+        data = self.retrieve(self.published)
+        self.assertEqual(data['author']['username'], 'author')
+        self.assertEqual(data['category_details']['parent_details'], {'id': self.parent.pk, 'name': '技术'})
+        self.assertEqual(data['category_details']['children_count'], 2)
+
+    def test_author_retrieve_of_draft_is_one_query(self):
+        self.client.force_authenticate(self.author)
+        data = self.retrieve(self.draft)
+        self.assertIsNone(data['category_details']['parent_details'])
+        self.assertEqual(data['category_details']['children_count'], 1)
+
+    def test_retrieve_without_category_is_one_query(self):
+        self.published.category = None
+        self.published.save()
+        self.assertIsNone(self.retrieve(self.published)['category_details'])
+
+    def test_draft_is_hidden_from_other_users(self):
+        self.client.force_authenticate(self.other)
+        response = self.client.get(f'/api/articles/{self.draft.pk}/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_only_author_can_update(self):
+        self.client.force_authenticate(self.other)
+        response = self.client.patch(f'/api/articles/{self.published.pk}/', {'title': '改'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(self.author)
+        response = self.client.patch(f'/api/articles/{self.published.pk}/', {'title': '改'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['title'], '改')
+
+
+@override_settings(RESPONSE_CACHE={'ENABLED': False})
+class CategoryClosureTests(APITestCase):
+    """分类的新建、移动、移到根与删除后，闭包表与按 parent 指针推出的祖先关系一致"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', 'admin@example.com', 'password', is_staff=True)
+
+    def setUp(self):
+        self.tech = Category.objects.create(name='技术')
+        self.db = Category.objects.create(name='数据库', parent=self.tech)
+        self.pg = Category.objects.create(name='PostgreSQL', parent=self.db)
+        self.life = Category.objects.create(name='生活')
+
+    def assertClosureMatchesParents(self):
+        parents = dict(Category.objects.values_list('id', 'parent_id'))
+        expected = set()
+        for node_id in parents:
+            depth, current = 0, node_id
+            while current is not None:
+                expected.add((current, node_id, depth))
+                depth, current = depth + 1, parents[current]
+        actual = set(CategoryClosure.objects.values_list('ancestor_id', 'descendant_id', 'depth'))
+        self.assertEqual(actual, expected)
+
+    def descendants(self, category):
+        return set(Category.objects.filter(pk__in=CategoryClosure.objects.descendant_ids(category.pk)))
+
+    def test_create(self):
+        self.assertClosureMatchesParents()
+        self.assertEqual(self.descendants(self.tech), {self.tech, self.db, self.pg})
+        self.assertEqual(self.descendants(self.life), {self.life})
+
+    def test_move_subtree(self):
+        self.db.parent = self.life
+        self.db.save()
+        self.assertClosureMatchesParents()
+        self.assertEqual(self.descendants(self.tech), {self.tech})
+        self.assertEqual(self.descendants(self.life), {self.life, self.db, self.pg})
+
+    def test_move_instance_not_loaded_from_database(self):
+        # 没有加载时的父分类记录，由闭包表查出旧父分类
+        Category(pk=self.db.pk, name=self.db.name, parent=self.life).save()
+        self.assertClosureMatchesParents()
+        self.assertEqual(self.descendants(self.life), {self.life, self.db, self.pg})
+
+    def test_move_to_root(self):
+        self.db.parent = None
+        self.db.save()
+        self.assertClosureMatchesParents()
+        self.assertEqual(self.descendants(self.tech), {self.tech})
+        self.assertEqual(self.descendants(self.db), {self.db, self.pg})
+
+    def test_delete_makes_children_roots(self):
+        self.db.delete()
+        self.assertClosureMatchesParents()
+        self.assertIsNone(Category.objects.get(pk=self.pg.pk).parent_id)
+        self.assertEqual(self.descendants(self.tech), {self.tech})
+
+    def test_rebuild(self):
+        CategoryClosure.objects.all().delete()
+        CategoryClosure.objects.rebuild()
+        self.assertClosureMatchesParents()
+
+    def test_cycle_is_rejected(self):
+        self.client.force_authenticate(self.admin)
+        for parent in (self.db, self.pg):
+            response = self.client.patch(f'/api/categories/{self.db.pk}/', {'parent': parent.pk}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('parent', response.data)
+        response = self.client.patch(f'/api/categories/{self.db.pk}/', {'parent': self.life.pk}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertClosureMatchesParents()
+
+    def test_category_filter_follows_moves(self):
+        author = User.objects.create_user('author', 'author@example.com', 'password')
+        article = Article.objects.create(title='索引', content='内容', author=author, category=self.pg, status='published')
+
+        def listed(category):
+            response = self.client.get('/api/articles/', {'category': category.pk})
+            return [item['id'] for item in response.data['results']]
+
+        self.assertEqual(listed(self.tech), [article.pk])
+        self.db.parent = self.life
+        self.db.save()
+        self.assertEqual(listed(self.tech), [])
+        self.assertEqual(listed(self.life), [article.pk])
+
+
+@override_settings(RESPONSE_CACHE={'ENABLED': False})
+class KeysetPaginationTests(APITestCase):
+    """游标分页：排序键相同的行按 id 决胜，前后翻页都不重复、不遗漏"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user('author', 'author@example.com', 'password')
+        base = timezone.now().replace(microsecond=0)
+        for i in range(11):
+            article = Article.objects.create(title=f'文章{i}', content='内容', author=author, status='published')
+            # 每三篇共用一个创建时间；约一半没有评论（last_commented_at 为 NULL）
+            Article.objects.filter(pk=article.pk).update(
+                created_at=base - datetime.timedelta(minutes=i // 3),
+                last_commented_at=base - datetime.timedelta(minutes=i % 4) if i % 2 else None,
+            )
+        cls.articles = list(Article.objects.all())
+
+    def expected(self, ordering):
+        name = ordering.lstrip('-')
+        descending = ordering.startswith('-')
+        present = [a for a in self.articles if getattr(a, name) is not None]
+        missing = [a for a in self.articles if getattr(a, name) is None]
+        present.sort(key=lambda a: (getattr(a, name), a.pk), reverse=descending)
+        missing.sort(key=lambda a: a.pk, reverse=descending)
+        return [a.pk for a in present + missing] # NULL 总在最后
+
+    def walk(self, ordering, page_size=3):
+        """沿 next 翻到最后一页，再沿 previous 翻回第一页"""
+        url = f'/api/articles/?pagination=cursor&page_size={page_size}&ordering={ordering}'
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append([item['id'] for item in response.data['results']])
+            url, previous = response.data['next'], response.data['previous']
+        self.assertEqual(previous is None, len(pages) == 1)
+        backwards = [pages[-1]]
+        while previous:
+            response = self.client.get(previous)
+            backwards.insert(0, [item['id'] for item in response.data['results']])
+            previous = response.data['previous']
+        self.assertEqual(backwards, pages)
+        return [pk for page in pages for pk in page]
+
+    def test_orderings(self):
+        for ordering in ('-created_at', 'created_at', '-last_commented_at', 'last_commented_at', 'comment_count'):
+            with self.subTest(ordering=ordering):
+                self.assertEqual(self.walk(ordering), self.expected(ordering))
+
+    def test_default_ordering(self):
+        response = self.client.get('/api/articles/', {'pagination': 'cursor', 'page_size': 100})
+        self.assertEqual([item['id'] for item in response.data['results']], self.expected('-created_at'))
+        self.assertIsNone(response.data['next'])
+        self.assertIsNone(response.data['previous'])
+
+    def test_malformed_cursor(self):
+        for cursor in ('not-base64!', 'eyJvIjpbXX0=', 'bnVsbA=='):
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/api/articles/', {'cursor': cursor})
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_from_other_ordering_is_rejected(self):
+        response = self.client.get('/api/articles/', {'pagination': 'cursor', 'page_size': 3, 'ordering': 'created_at'})
+        cursor = parse_qs(urlsplit(response.data['next']).query)['cursor'][0]
+        response = self.client.get('/api/articles/', {'cursor': cursor, 'ordering': '-created_at'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(RESPONSE_CACHE={'ENABLED': False}, REQUEST_TIMING={'SAMPLE_RATE': 1.0})
+class ServerTimingTests(APITestCase):
+    """Server-Timing 头只发给管理员或显式开启时；耗时日志对所有被采样请求照常输出"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('user', 'user@example.com', 'password')
+        cls.admin = User.objects.create_user('admin', 'admin@example.com', 'password', is_staff=True)
+
+    def get(self, user=None):
+        self.client.force_authenticate(user)
+        with self.assertLogs('articles.timing', 'INFO') as logs:
+            response = self.client.get('/api/articles/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(any('"event": "request"' in line for line in logs.output))
+        return response
+
+    def test_header_hidden_from_anonymous_and_regular_users(self):
+        self.assertNotIn('Server-Timing', self.get())
+        self.assertNotIn('Server-Timing', self.get(self.user))
+
+    def test_header_sent_to_staff(self):
+        self.assertIn('db;dur=', self.get(self.admin)['Server-Timing'])
+
+    def test_header_sent_when_exposed(self):
+        with override_settings(REQUEST_TIMING={'SAMPLE_RATE': 1.0, 'EXPOSE_HEADER': True}):
+            self.assertIn('Server-Timing', self.get())
+
+
+@override_settings(RESPONSE_CACHE={'ENABLED': False})
+class CoverVariantValidatorTests(APITestCase):
+    """后台生成封面变体后，文章的条件请求校验值随之变化"""
+
+    def test_generated_variants_change_etag(self):
+        author = User.objects.create_user('author', 'author@example.com', 'password')
+        article = Article.objects.create(title='封面', content='内容', author=author, status='published')
+        source = 'article_covers/ab/abcd.jpg'
+        Article.objects.filter(pk=article.pk).update(cover_image=source)
+        url = f'/api/articles/{article.pk}/'
+        etag = self.client.get(url)['ETag']
+
+        variants = {'source': source, 'widths': [320], 'formats': ['webp']}
+        with mock.patch.object(images, 'generate_variants', return_value=variants):
+            images.process_cover(source)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(response.data['cover_srcset'])
+
+
+@override_settings(DATABASE_ROUTING={'REPLICAS': {'replica1': 3, 'replica2': 1}, 'STICKY_SECONDS': 10})
+class ReplicaRoutingTests(SimpleTestCase):
+    """路由决策本身不访问副本：probe 被替换，只检查 db_for_read 的选择"""
+
+    def setUp(self):
+        cache.clear()
+        db_routing.replica_set.reset()
+        patcher = mock.patch.object(db_routing.replica_set, 'probe', return_value=True)
+        self.probe = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.router = db_routing.ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def route(self, method='get', before_read=None):
+        """在一次请求中执行 db_for_read，返回选中的别名（None 表示主库）"""
+        def view(request):
+            if before_read:
+                before_read()
+            return self.router.db_for_read(Article)
+        middleware = db_routing.ReplicaRoutingMiddleware(view)
+        return middleware(getattr(self.factory, method)('/api/articles/'))
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertIsNone(self.router.db_for_read(Article))
+
+    def test_unsafe_requests_use_primary(self):
+        self.assertIsNone(self.route('post'))
+
+    def test_weighted_selection(self):
+        with mock.patch('random.choices', wraps=db_routing.random.choices) as choices:
+            self.assertIn(self.route(), ('replica1', 'replica2'))
+        self.assertEqual(choices.call_args.kwargs['weights'], [3, 1])
+
+    def test_ejected_replica_is_skipped_and_all_ejected_falls_back(self):
+        db_routing.replica_set.eject('replica1', 'test')
+        self.assertEqual({self.route() for _ in range(10)}, {'replica2'})
+        db_routing.replica_set.eject('replica2', 'test')
+        self.assertEqual(self.route(), 'default')
+
+    def test_failed_probe_ejects_replica(self):
+        def probe(alias, options):
+            if alias == 'replica1':
+                db_routing.replica_set.eject(alias, 'connection refused', options)
+                return False
+            return True
+
+        self.probe.side_effect = probe
+        self.assertEqual({self.route() for _ in range(10)}, {'replica2'})
+        self.assertFalse(db_routing.replica_set.as_dict()['replicas']['replica1']['healthy'])
+
+    def test_writer_sticks_to_primary(self):
+        writer = User(pk=1)
+        other = User(pk=2)
+        db_routing.pin_to_primary(writer)
+        self.assertIsNone(self.route(before_read=lambda: db_routing.identify(writer)))
+        self.assertIsNotNone(self.route(before_read=lambda: db_routing.identify(other)))
+        self.assertIsNotNone(self.route(before_read=lambda: db_routing.identify(AnonymousUser())))
+
+
+@unittest.skipUnless('replica1' in settings.DATABASES, "需要在 DATABASES 中配置 replica1（default 的测试镜像）")
+@override_settings(DATABASE_ROUTING={'REPLICAS': {'replica1': 1}, 'STICKY_SECONDS': 10, 'MAX_LAG': None})
+class ReplicaDatabaseTests(TransactionTestCase):
+    """副本是真实的第二个数据库连接（测试时镜像 default）：连接检查、摘除与回退都实际执行"""
+    databases = {'default', 'replica1'}
+
+    def setUp(self):
+        cache.clear()
+        response_cache.get_store().clear()
+        db_routing.replica_set.reset()
+        self.addCleanup(db_routing.replica_set.reset)
+        author = User.objects.create_user('author', 'author@example.com', 'password')
+        self.article = Article.objects.create(title='副本', content='内容', author=author, status='published')
+        self.url = f'/api/articles/{self.article.pk}/'
+        self.client = APIClient()
+
+    def get(self):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica1']) as replica:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(primary), len(replica)
+
+    def test_anonymous_reads_use_replica(self):
+        primary, replica = self.get()
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+        self.assertEqual(db_routing.replica_set.as_dict()['replicas']['replica1']['reads'], 1)
+
+    def test_unreachable_replica_is_ejected_and_reads_fall_back(self):
+        # 测试库是 SQLite 内存库，close() 不会真正断开，直接换下连接对象并指向不可打开的文件
+        replica = connections['replica1']
+        saved = replica.connection, replica.settings_dict['NAME']
+        replica.connection = None
+        replica.settings_dict['NAME'] = '/nonexistent/dir/replica1.sqlite3'
+        try:
+            with self.assertLogs('backend_project.db_routing', 'WARNING'), \
+                    CaptureQueriesContext(connections['default']) as primary:
+                response = self.client.get(self.url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertGreater(len(primary), 0)
+            self.assertIsNone(replica.connection)
+        finally:
+            replica.connection, replica.settings_dict['NAME'] = saved
+        stats = db_routing.replica_set.as_dict()
+        self.assertFalse(stats['replicas']['replica1']['healthy'])
+        self.assertEqual((stats['replicas']['replica1']['reads'], stats['ejections']), (0, 1))
+        # 摘除期间即使副本已恢复也不会被选中
+        cache.clear()
+        response_cache.get_store().clear()
+        self.assertEqual(self.get()[1], 0)
+
+    def test_recent_write_keeps_replica_reads_but_skips_response_cache(self):
+        self.article.title = '修改后'
+        self.article.save() # 信号递增文章代数并记录写入
+        stores = response_cache.stats.stores
+        self.assertEqual(self.get()[0], 0)
+        self.assertEqual(response_cache.stats.stores, stores)
+
+        cache.delete(db_routing.RECENT_WRITE_KEY.format('article'))
+        self.get()
+        self.assertEqual(response_cache.stats.stores, stores + 1)
+
+
+@override_settings(RESPONSE_CACHE={'ENABLED': False})
+class ConditionalListTests(APITestCase):
+    """列表只用 ETag 校验：移出列表的文章不会推进最大修改时间，不能依靠 Last-Modified"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', 'author@example.com', 'password')
+        cls.first = Article.objects.create(title='一', content='内容', author=cls.author, status='published')
+        cls.second = Article.objects.create(title='二', content='内容', author=cls.author, status='published')
+
+    def test_list_has_no_last_modified(self):
+        response = self.client.get('/api/articles/')
+        self.assertIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+        self.assertIn('Last-Modified', self.client.get(f'/api/articles/{self.first.pk}/'))
+
+    def test_unpublished_article_invalidates_list(self):
+        etag = self.client.get('/api/articles/')['ETag']
+        Article.objects.filter(pk=self.second.pk).update(status='draft')
+        response = self.client.get('/api/articles/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data['results']], [self.first.pk])
+
+
+@override_settings(RESPONSE_CACHE={'ENABLED': False})
+class CommentCounterTests(APITestCase):
+    """发表评论时文章的评论数与最后评论时间同步更新，最后评论时间不会倒退"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('author', 'author@example.com', 'password')
+        cls.article = Article.objects.create(title='文章', content='内容', author=cls.user, status='published')
+
+    def comment(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post('/api/comments/', {'article': self.article.pk, 'content': '评论'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Comment.objects.get(pk=response.data['id'])
+
+    def test_first_comment_sets_activity(self):
+        comment = self.comment()
+        self.article.refresh_from_db()
+        self.assertEqual((self.article.comment_count, self.article.last_commented_at), (1, comment.created_at))
+
+    def test_activity_never_moves_backwards(self):
+        # 模拟创建时间更晚的并发评论先提交了 UPDATE
+        later = timezone.now() + datetime.timedelta(minutes=5)
+        Article.objects.filter(pk=self.article.pk).update(last_commented_at=later)
+        self.comment()
+        self.article.refresh_from_db()
+        self.assertEqual((self.article.comment_count, self.article.last_commented_at), (1, later))
+
+
+class DeployCheckTests(SimpleTestCase):
+    """依赖缓存在进程间共享的功能，在进程内缓存上部署时 check --deploy 报错"""
+    SHARED = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp/textmanager-checks'}
+    LOCAL = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+
+    def error_ids(self, **caches):
+        with override_settings(CACHES={'default': self.SHARED, **caches}):
+            return {error.id for error in checks.check_shared_caches(None)}
+
+    def test_process_local_response_cache(self):
+        with override_settings(RESPONSE_CACHE={'CACHE': 'responses', 'ENABLED': True}):
+            self.assertEqual(self.error_ids(responses=self.LOCAL), {'articles.E003'})
+            self.assertEqual(self.error_ids(responses=self.SHARED), set())
+        with override_settings(RESPONSE_CACHE={'CACHE': 'responses', 'ENABLED': False}):
+            self.assertEqual(self.error_ids(responses=self.LOCAL), set())
+
+
+class ImportRecordTests(SimpleTestCase):
+    """导入记录的回复层级限制与 CommentSerializer 一致"""
+
+    def record(self, depth):
+        comments = [{'id': i, 'parent': i - 1 if i else None, 'author': 'bob', 'content': '回复'} for i in range(depth + 1)]
+        return {'title': '标题', 'content': '正文', 'author': 'alice', 'comments': comments}
+
+    def test_comment_depth_limit(self):
+        self.assertTrue(ArticleRecordSerializer(data=self.record(COMMENT_MAX_DEPTH - 1)).is_valid())
+        serializer = ArticleRecordSerializer(data=self.record(COMMENT_MAX_DEPTH))
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('comments', serializer.errors)
+
+
+@unittest.skipUnless(importlib.util.find_spec('zhipuai'), '需要安装 zhipuai')
+class SummaryBackendErrorTests(SimpleTestCase):
+    """同步调用与 acomplete 相同：只有限流、服务端错误与连接错误值得重试"""
+
+    def complete(self, exception):
+        backend = ZhipuAIBackend(api_key='key')
+        backend._client = mock.Mock()
+        backend._client.chat.completions.create.side_effect = exception
+        return backend.complete('提示词')
+
+    def status_error(self, status_code):
+        from zhipuai import APIStatusError
+        response = httpx.Response(status_code, request=httpx.Request('POST', 'https://example.com/chat/completions'))
+        return APIStatusError('error', response=response)
+
+    def test_retryable_classification(self):
+        from zhipuai import APITimeoutError
+        cases = [
+            (self.status_error(401), False),
+            (self.status_error(400), False),
+            (self.status_error(429), True),
+            (self.status_error(503), True),
+            (APITimeoutError(request=httpx.Request('POST', 'https://example.com')), True),
+        ]
+        for exception, retryable in cases:
+            with self.subTest(exception=type(exception).__name__), self.assertRaises(SummaryError) as raised:
+                self.complete(exception)
+            self.assertIs(raised.exception.retryable, retryable)
+
+    def test_unexpected_errors_propagate(self):
+        with self.assertRaises(TypeError):
+            self.complete(TypeError('bug'))
+
+
+@override_settings(RESPONSE_CACHE={'ENABLED': False}, ARTICLE_REVISIONS={'SNAPSHOT_INTERVAL': 3})
+class ArticleRevisionTests(APITestCase):
+    """通过接口保存文章时记录差异版本，任一版本都能还原"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', 'author@example.com', 'password')
+        cls.other = User.objects.create_user('other', 'other@example.com', 'password')
+        cls.paragraphs = [f'第{i}段。' + '正文' * 40 + '\n' for i in range(20)]
+
+    def setUp(self):
+        self.client.force_authenticate(self.author)
+        response = self.client.post(
+            '/api/articles/', {'title': '标题', 'content': ''.join(self.paragraphs), 'status': 'published'}, format='json'
+        )
+        self.article_id = response.data['id']
+        self.versions = [response.data['content']]
+        for i in range(1, 7):
+            self.paragraphs[i] = f'修改{i}。\n'
+            response = self.client.patch(
+                f'/api/articles/{self.article_id}/', {'content': ''.join(self.paragraphs)}, format='json'
+            )
+            self.versions.append(response.data['content'])
+
+    def test_deltas_between_snapshots_and_reconstruction(self):
+        rows = ArticleRevision.objects.filter(article_id=self.article_id).order_by('number')
+        self.assertEqual([row.is_snapshot for row in rows], [True, False, False, True, False, False, True])
+        self.assertLess(len(str(rows[1].delta)), len(self.versions[1]) // 10)
+        for number, content in enumerate(self.versions, start=1):
+            with self.assertNumQueries(2):
+                self.assertEqual(revisions.get_content(self.article_id, number), content)
+
+    def test_unchanged_save_records_nothing(self):
+        self.client.patch(f'/api/articles/{self.article_id}/', {'content': self.versions[-1]}, format='json')
+        self.assertEqual(ArticleRevision.objects.filter(article_id=self.article_id).count(), len(self.versions))
+
+    def test_revision_endpoints(self):
+        response = self.client.get(f'/api/articles/{self.article_id}/revisions/2/')
+        self.assertEqual(response.data['content'], self.versions[1])
+        response = self.client.get(f'/api/articles/{self.article_id}/revisions/compare/?from=1&to=2')
+        self.assertEqual((response.data['added'], response.data['removed']), (1, 1))
+
+        self.client.force_authenticate(self.other)
+        response = self.client.get(f'/api/articles/{self.article_id}/revisions/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_seed_data_clears_revisions(self):
+        for _ in range(2):
+            call_command('seed_data', users=2, articles=3, comments=3, stdout=io.StringIO())
+            connection.check_constraints()
+        self.assertFalse(ArticleRevision.objects.exists())
+
+
+@override_settings(RESPONSE_CACHE={'ENABLED': False}, ARTICLE_AUTOSAVE={'FLUSH_INTERVAL': 3600})
+class ArticleAutosaveTests(APITestCase):
+    """增量自动保存：按版本号应用补丁，连续的自动保存合并后再写入"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', 'author@example.com', 'password')
+        cls.article = Article.objects.create(title='草稿', content='第一段。\n第二段。', author=cls.author)
+
+    def setUp(self):
+        self.addCleanup(cache.clear)
+        self.client.force_authenticate(self.author)
+        self.url = f'/api/articles/{self.article.pk}/autosave/'
+
+    def autosave(self, version, **data):
+        return self.client.post(self.url, {'version': version, **data}, format='json')
+
+    def test_patches_are_coalesced_until_flush(self):
+        version = self.client.get(self.url).data['version']
+        # 每次只查询文章做权限检查，第一次另外读取正文，合并期间没有写入
+        with self.assertNumQueries(3):
+            response = self.autosave(version, patch=[3, '（改）'])
+            response = self.autosave(response.data['version'], patch=[-1, '首'])
+        self.assertFalse(response.data['saved'])
+        self.assertEqual(self.client.get(self.url).data['content'], '首一段（改）。\n第二段。')
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.content, '第一段。\n第二段。')
+
+        response = self.autosave(response.data['version'], title='新标题', flush=True)
+        self.assertTrue(response.data['saved'])
+        self.article.refresh_from_db()
+        self.assertEqual((self.article.title, self.article.content), ('新标题', '首一段（改）。\n第二段。'))
+
+    def test_stale_version_conflicts(self):
+        version = self.client.get(self.url).data['version']
+        current = self.autosave(version, patch=['前言。']).data['version']
+        response = self.autosave(version, patch=['另一个前言。'])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['version'], current)
+
+    def test_invalid_patch_is_rejected(self):
+        version = self.client.get(self.url).data['version']
+        response = self.autosave(version, patch=[1000])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(autosave.apply_patch('abcdef', [2, -2, 'X']), 'abXef')
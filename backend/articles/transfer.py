@@ -0,0 +1,262 @@
+# articles/transfer.py
+"""
+文章的 NDJSON 导出与批量导入。
+
+每行一篇文章（JSON 对象），包含作者用户名、分类路径和全部评论：
+
+    {"id": 1, "title": "...", "content": "...", "excerpt": "...", "status": "published",
+     "author": "alice", "category": "技术 -> 数据库", "created_at": "...", "updated_at": "...",
+     "comments": [{"id": 7, "parent": null, "author": "bob", "content": "...", "created_at": "...", ...}]}
+
+- 导出：按主键顺序分块迭代（评论随每块一起预取），逐行生成，可选 gzip 压缩，内存占用与总量无关；
+- 导入：按批校验，作者和分类通过内存映射解析，文章与评论使用 bulk_create 写入。
+  导出中的 id 只用于关联评论的回复关系，导入时会分配新的主键。
+"""
+import datetime
+import json
+import zlib
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import OuterRef, Prefetch
+from rest_framework import serializers
+from . import category_tree, response_cache
+from .models import (
+    COMMENT_MAX_DEPTH, Article, Category, Comment, bulk_create_comments, comment_counter_updates,
+)
+from .search import index_articles
+
+GZIP_WBITS = zlib.MAX_WBITS | 16 # 生成带 gzip 头的数据流
+FLUSH_BYTES = 64 * 1024
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    raise TypeError(f'Cannot encode {type(value).__name__} in export')
+
+
+def export_queryset(queryset=None):
+    """导出使用的 queryset：作者一并查出，评论按楼层路径顺序预取（父评论总在回复之前）"""
+    if queryset is None:
+        queryset = Article.objects.all()
+    comments = Comment.objects.select_related('author').order_by('thread_id', 'path')
+    return queryset.select_related('author').prefetch_related(
+        Prefetch('comments', queryset=comments)
+    ).order_by('pk')
+
+
+def article_record(article):
+    return {
+        'id': article.pk,
+        'title': article.title,
+        'content': article.content,
+        'excerpt': article.excerpt,
+        'status': article.status,
+        'author': article.author.username,
+        'category': category_tree.get_category_path(article.category_id) if article.category_id else None,
+        'created_at': article.created_at,
+        'updated_at': article.updated_at,
+        'comments': [
+            {
+                'id': comment.pk,
+                'parent': comment.parent_comment_id,
+                'author': comment.author.username,
+                'content': comment.content,
+                'created_at': comment.created_at,
+                'updated_at': comment.updated_at,
+            }
+            for comment in article.comments.all()
+        ],
+    }
+
+
+def iter_records(queryset=None, chunk_size=500):
+    for article in export_queryset(queryset).iterator(chunk_size=chunk_size):
+        yield article_record(article)
+
+
+def iter_ndjson(records, compress=False):
+    """把记录编码为 NDJSON 字节块；compress 为 True 时输出 gzip 流"""
+    compressor = zlib.compressobj(wbits=GZIP_WBITS) if compress else None
+    buffer = []
+    size = 0
+    for record in records:
+        line = json.dumps(record, ensure_ascii=False, default=_json_default, separators=(',', ':'))
+        data = line.encode('utf-8') + b'\n'
+        buffer.append(data)
+        size += len(data)
+        if size >= FLUSH_BYTES:
+            chunk = b''.join(buffer)
+            buffer, size = [], 0
+            chunk = compressor.compress(chunk) if compressor else chunk
+            if chunk:
+                yield chunk
+    chunk = b''.join(buffer)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+class CommentRecordSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    parent = serializers.IntegerField(allow_null=True, required=False, default=None)
+    author = serializers.CharField(max_length=150)
+    content = serializers.CharField(trim_whitespace=False)
+    created_at = serializers.DateTimeField(required=False)
+    updated_at = serializers.DateTimeField(required=False)
+
+
+class ArticleRecordSerializer(serializers.Serializer):
+    """导入记录的结构校验（不查询数据库）"""
+    title = serializers.CharField(max_length=200)
+    content = serializers.CharField(trim_whitespace=False)
+    excerpt = serializers.CharField(allow_blank=True, required=False, default='', trim_whitespace=False)
+    status = serializers.ChoiceField(choices=Article.STATUS_CHOICES, default='draft')
+    author = serializers.CharField(max_length=150)
+    category = serializers.CharField(allow_null=True, required=False, default=None)
+    created_at = serializers.DateTimeField(required=False)
+    updated_at = serializers.DateTimeField(required=False)
+    comments = CommentRecordSerializer(many=True, required=False, default=list)
+
+    def validate_comments(self, comments):
+        depths = {}
+        for comment in comments:
+            if comment['id'] in depths:
+                raise serializers.ValidationError(f"评论 ID {comment['id']} 重复")
+            parent = comment['parent']
+            if parent is None:
+                depths[comment['id']] = 0
+            elif parent not in depths:
+                raise serializers.ValidationError(f"评论 {comment['id']} 的父评论 {parent} 必须出现在它之前")
+            elif depths[parent] + 1 >= COMMENT_MAX_DEPTH: # 与 CommentSerializer 相同
+                raise serializers.ValidationError(f"评论 {comment['id']} 超过最大回复层级 {COMMENT_MAX_DEPTH}")
+            else:
+                depths[comment['id']] = depths[parent] + 1
+        return comments
+
+
+def _timestamps(item):
+    # 记录中带有的创建、修改时间原样写入，缺少时由字段默认值取当前时间
+    return {name: item[name] for name in ('created_at', 'updated_at') if name in item}
+
+
+class ArticleImporter:
+    """
+    按批导入文章记录。作者与分类通过内存映射解析：
+    分类一次性全部载入（按名称，分类名全局唯一）；作者按每批出现的新用户名查询一次。
+    不存在的分类会按路径逐级创建；不存在的作者会使该条记录被拒绝。
+    """
+
+    def __init__(self, batch_size=1000, create_categories=True):
+        self.batch_size = batch_size
+        self.create_categories = create_categories
+        self.users = {}
+        self.categories = dict(Category.objects.values_list('name', 'id'))
+        self.imported = 0
+        self.comments = 0
+        self.errors = []
+
+    def _load_users(self, usernames):
+        missing = set(usernames) - self.users.keys()
+        if not missing:
+            return
+        found = dict(get_user_model().objects.filter(username__in=missing).values_list('username', 'id'))
+        for username in missing:
+            self.users[username] = found.get(username)
+
+    def _resolve_category(self, path):
+        parent_id = None
+        for name in path.split(category_tree.PATH_SEPARATOR):
+            pk = self.categories.get(name)
+            if pk is None:
+                if not self.create_categories:
+                    raise serializers.ValidationError({'category': f'分类不存在: {name}'})
+                # 走 save()，闭包表与分类树缓存由信号维护
+                pk = Category.objects.create(name=name, parent_id=parent_id).pk
+                self.categories[name] = pk
+            parent_id = pk
+        return parent_id
+
+    def validate(self, lineno, record):
+        serializer = ArticleRecordSerializer(data=record)
+        if not serializer.is_valid():
+            self.errors.append((lineno, serializer.errors))
+            return None
+        return serializer.validated_data
+
+    def import_batch(self, items):
+        """items 为 [(行号, 原始记录)]，返回本批成功导入的文章数"""
+        valid = []
+        for lineno, record in items:
+            data = self.validate(lineno, record)
+            if data is not None:
+                valid.append((lineno, data))
+
+        self._load_users(
+            username
+            for _, data in valid
+            for username in [data['author'], *(c['author'] for c in data['comments'])]
+        )
+
+        rows = []
+        for lineno, data in valid:
+            usernames = [data['author'], *(c['author'] for c in data['comments'])]
+            unknown = sorted({name for name in usernames if self.users.get(name) is None})
+            if unknown:
+                self.errors.append((lineno, {'author': [f"用户不存在: {', '.join(unknown)}"]}))
+                continue
+            try:
+                category_id = self._resolve_category(data['category']) if data['category'] else None
+            except serializers.ValidationError as e:
+                self.errors.append((lineno, e.detail))
+                continue
+            rows.append((data, category_id))
+
+        if rows:
+            with transaction.atomic():
+                self._write(rows)
+        return len(rows)
+
+    def _write(self, rows):
+        articles = []
+        for data, category_id in rows:
+            articles.append(Article(
+                title=data['title'],
+                content=data['content'],
+                excerpt=data['excerpt'],
+                status=data['status'],
+                author_id=self.users[data['author']],
+                category_id=category_id,
+                **_timestamps(data),
+            ))
+        Article.objects.bulk_create(articles, batch_size=self.batch_size)
+        index_articles(articles, batch_size=self.batch_size)
+
+        comments = []
+        for article, (data, _) in zip(articles, rows):
+            by_source_id = {}
+            for item in data['comments']:
+                comment = Comment(
+                    article_id=article.pk,
+                    author_id=self.users[item['author']],
+                    content=item['content'],
+                    parent_comment=by_source_id.get(item['parent']),
+                    **_timestamps(item),
+                )
+                by_source_id[item['id']] = comment
+                comments.append(comment)
+        bulk_create_comments(comments, batch_size=self.batch_size)
+        # 评论计数一次 UPDATE 回填
+        Article.objects.filter(pk__in=[article.pk for article in articles]).update(
+            **comment_counter_updates(OuterRef('pk'))
+        )
+
+        self.imported += len(articles)
+        self.comments += len(comments)
+
+    def finish(self):
+        # bulk_create 不触发 post_save，手动让匿名响应缓存失效
+        if self.imported:
+            response_cache.invalidate('article')
+            response_cache.invalidate('comment')
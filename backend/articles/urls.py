@@ -1,6 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ArticleViewSet, CommentViewSet, CategoryViewSet, GenerateSummaryAPIView
+from .views import (
+    ArticleViewSet, CommentViewSet, CategoryViewSet, GenerateSummaryAPIView, SummaryJobAPIView,
+    SummaryStatsAPIView, ResponseCacheStatsAPIView, ArticleExportAPIView,
+)
+from .async_views import AsyncArticleView, AsyncCommentView, AsyncGenerateSummaryView
 
 router = DefaultRouter()
 router.register(r'articles', ArticleViewSet, basename='article')
@@ -10,4 +14,14 @@ router.register(r'categories', CategoryViewSet, basename='category')
 urlpatterns = [
     path('', include(router.urls)),
     path('generate-summary/', GenerateSummaryAPIView.as_view(), name='generate-summary'),
+    path('generate-summary/stats/', SummaryStatsAPIView.as_view(), name='summary-stats'),
+    path('generate-summary/jobs/<str:job_id>/', SummaryJobAPIView.as_view(), name='summary-job'),
+    path('export/articles/', ArticleExportAPIView.as_view(), name='article-export'),
+    path('response-cache/stats/', ResponseCacheStatsAPIView.as_view(), name='response-cache-stats'),
+    # 异步只读接口与同步返回的摘要接口，在 ASGI 部署下使用
+    path('async/articles/', AsyncArticleView.as_view(), name='async-article-list'),
+    path('async/articles/<int:pk>/', AsyncArticleView.as_view(), name='async-article-detail'),
+    path('async/comments/', AsyncCommentView.as_view(), name='async-comment-list'),
+    path('async/comments/<int:pk>/', AsyncCommentView.as_view(), name='async-comment-detail'),
+    path('async/generate-summary/', AsyncGenerateSummaryView.as_view(), name='async-generate-summary'),
 ]
\ No newline at end of file
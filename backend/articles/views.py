@@ -1,16 +1,50 @@
 from rest_framework import viewsets, permissions, filters, generics
+from django_filters import rest_framework as django_filters
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Article, Comment, Category
-from .serializers import ArticleSerializer, CommentSerializer, CategorySerializer
+from .models import Article, ArticleRevision, Comment, Category, CategoryClosure
+from .serializers import (
+    ArticleSerializer, ArticleListSerializer, ArticleRevisionSerializer, ArticleRevisionDetailSerializer,
+    ArticleAutosaveSerializer, CommentSerializer, CategorySerializer,
+)
 from .permissions import IsAuthorOrReadOnly, IsAdminOrReadOnly
+from . import autosave, category_tree, response_cache, revisions
+from .category_tree import get_category_tree
+from .search import ArticleSearchFilter
+from .pagination import CursorOrPageNumberPagination, MAX_PAGE_SIZE
+from .response_cache import ResponseCacheMixin
+from .transfer import iter_ndjson, iter_records
 from rest_framework.permissions import IsAuthenticated,  AllowAny
 from rest_framework.views import APIView
+from rest_framework.decorators import action
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Sum, Value, Window
+from django.db.models.functions import Coalesce, Greatest, Left, RowNumber
 from rest_framework.response import Response
-from rest_framework import status
-import re
-from zhipuai import ZhipuAI
+from rest_framework import exceptions, status
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+import hashlib
+from backend_project import db_routing
+from .summary import FAILED, FINISHED_STATES, SUCCEEDED, QueueFull, SummaryConfigurationError, get_job_queue
+
+CONTENT_PREVIEW_LENGTH = 150
+SUMMARY_POLL_INTERVAL = 2 # 任务未结束时建议客户端再次查询的间隔（Retry-After，秒）
+SUMMARY_RETRY_AFTER = 5
+
+
+class AutosaveBusy(exceptions.APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = '该文章正在保存，请稍后重试。'
+    wait = 1 # Retry-After
+
 
 class GenerateSummaryAPIView(APIView):
+    """
+    提交摘要生成任务。模型调用在后台任务队列中执行，这里立即返回 202 和任务 ID，
+    客户端按 Retry-After 的间隔轮询 SummaryJobAPIView 获取结果。
+    """
     permission_classes = [IsAuthenticated]
 
     def post(self, request, *args, **kwargs):
@@ -18,89 +52,303 @@ class GenerateSummaryAPIView(APIView):
         if not content:
             return Response({'error': '文章内容不能为空'}, status=status.HTTP_400_BAD_REQUEST)
 
-        api_key = '5313f3660c534a2b97eb83ba02906a05.pyYdht4IRrzxQAaL'
-        if not api_key:
-            return Response({'error': 'API密钥未配置'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
         try:
-            # 使用官方SDK调用
-            client = ZhipuAI(api_key=api_key)
-            response = client.chat.completions.create(
-                model="glm-z1-flash",
-                messages=[
-                    {"role": "user", "content": f"生成这段内容的摘要，不要输出任何多余文字：{content}"}
-                ],
-                max_tokens=1000,
-                temperature=0.2
+            job = get_job_queue().submit(content, owner_id=request.user.id)
+        except SummaryConfigurationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        except QueueFull as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={'Retry-After': str(SUMMARY_RETRY_AFTER)},
             )
-            
-            if response.choices and response.choices[0].message.content:
-                summary = response.choices[0].message.content
+        # 命中摘要缓存时任务已直接完成
+        if job['status'] == SUCCEEDED:
+            return Response(summary_job_payload(job, request))
+        return summary_job_pending_response(job, request, status.HTTP_202_ACCEPTED)
 
-                # 使用正则表达式移除 <think> 标签及其内容
-                summary = re.sub(r'<think>.*?</think>', '', summary, flags=re.DOTALL).strip()
 
-                return Response({'summary': summary}, status=status.HTTP_200_OK)
-            else:
-                return Response({'error': '摘要生成失败'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+class SummaryJobAPIView(APIView):
+    """
+    查询摘要任务状态，立即返回；任务未结束时带 Retry-After。
+    不在这里等待任务结束：同步 worker 在等待期间不能处理其它请求。
+    """
+    permission_classes = [IsAuthenticated]
 
-        except Exception as e:
-            print(f'API调用异常: {str(e)}')
-            return Response({'error': f'摘要生成失败: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
-class ArticleViewSet(viewsets.ModelViewSet):
+    def get(self, request, job_id, *args, **kwargs):
+        try:
+            queue = get_job_queue()
+        except SummaryConfigurationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        job = queue.get(job_id)
+        # 只能查看自己提交的任务
+        if job is None or job['owner_id'] != request.user.id:
+            return Response({'error': '任务不存在或已过期'}, status=status.HTTP_404_NOT_FOUND)
+        if job['status'] in FINISHED_STATES:
+            return Response(summary_job_payload(job, request))
+        return summary_job_pending_response(job, request)
+
+
+class SummaryStatsAPIView(APIView):
+    """摘要缓存的命中率等统计（当前进程），仅管理员可见"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            queue = get_job_queue()
+        except SummaryConfigurationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response({'cache': queue.pipeline.cache.stats()})
+
+
+class ArticleExportAPIView(APIView):
+    """
+    以 NDJSON 流式导出文章（含作者、分类路径、评论），仅管理员可用。
+    ?status= 按状态过滤，?gzip=1 压缩输出。
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        queryset = Article.objects.all()
+        status_filter = request.query_params.get('status')
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        compress = request.query_params.get('gzip') in ('1', 'true')
+        filename = 'articles.ndjson.gz' if compress else 'articles.ndjson'
+        response = StreamingHttpResponse(
+            iter_ndjson(iter_records(queryset), compress=compress),
+            content_type='application/gzip' if compress else 'application/x-ndjson',
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class ResponseCacheStatsAPIView(APIView):
+    """匿名响应缓存的命中率统计（当前进程），仅管理员可见"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(response_cache.stats.as_dict())
+
+
+def summary_job_payload(job, request):
+    return {
+        'job_id': job['id'],
+        'status': job['status'],
+        'summary': job['summary'],
+        'error': job['error'] if job['status'] == FAILED else None,
+        'attempts': job['attempts'],
+        'cached': job['cached'],
+        'status_url': request.build_absolute_uri(reverse('summary-job', args=[job['id']])),
+    }
+
+
+def summary_job_pending_response(job, request, response_status=status.HTTP_200_OK):
+    return Response(
+        summary_job_payload(job, request),
+        status=response_status,
+        headers={'Retry-After': str(SUMMARY_POLL_INTERVAL)},
+    )
+
+
+class SparseFieldsetMixin:
+    """
+    读请求支持 ?fields=a,b 或 ?omit=c 裁剪返回字段，
+    并据此在 SQL 层 defer 不需要的列、去掉不需要的 select_related 连接。
+    """
+    fields_query_param = 'fields'
+    omit_query_param = 'omit'
+
+    def _split_param(self, name):
+        value = self.request.query_params.get(name, '')
+        return [item.strip() for item in value.split(',') if item.strip()]
+
+    def get_sparse_fieldset(self):
+        if self.request is None or self.request.method not in permissions.SAFE_METHODS:
+            return {}
+        return {
+            'fields': self._split_param(self.fields_query_param) or None,
+            'omit': self._split_param(self.omit_query_param) or None,
+        }
+
+    def get_serializer(self, *args, **kwargs):
+        for key, value in self.get_sparse_fieldset().items():
+            kwargs.setdefault(key, value)
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method not in permissions.SAFE_METHODS:
+            return queryset
+        return self.apply_projection(queryset)
+
+    def apply_projection(self, queryset):
+        """只查询序列化器实际输出的列"""
+        serializer = self.get_serializer()
+        sources = {
+            field.source.split('.')[0]
+            for field in serializer.fields.values()
+            if not field.write_only and field.source != '*'
+        }
+        # 排序字段要保留，游标分页需要读取它们的值
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        sources.update(item.lstrip('-') for item in ordering if isinstance(item, str))
+
+        deferred = [
+            field.name for field in queryset.model._meta.concrete_fields
+            if not field.primary_key and not field.is_relation and field.name not in sources
+        ]
+        if deferred:
+            queryset = queryset.defer(*deferred)
+
+        related = queryset.query.select_related
+        if isinstance(related, dict):
+            paths = []
+
+            def walk(tree, prefix):
+                for name, children in tree.items():
+                    paths.append(prefix + name)
+                    walk(children, prefix + name + '__')
+
+            walk({name: children for name, children in related.items() if name in sources}, '')
+            queryset = queryset.select_related(None)
+            if paths:
+                queryset = queryset.select_related(*paths)
+        return queryset
+
+
+class ReadYourWritesMixin:
+    """写入成功后，该用户接下来 STICKY_SECONDS 秒的读请求走主库（见 backend_project.db_routing）"""
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method not in permissions.SAFE_METHODS and response.status_code < 400:
+            db_routing.pin_to_primary(request.user)
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    list / retrieve 支持条件请求：响应带 ETag 与 Last-Modified，
+    If-None-Match / If-Modified-Since 命中时直接返回 304，不做序列化。
+
+    子类提供两个钩子，返回 (用于计算 ETag 的值列表, 最后修改时间)：
+    - get_list_validators(queryset)：基于过滤后的 queryset 做一次廉价的聚合查询；
+      最后修改时间返回 None（不发送 Last-Modified）：删除或移出过滤范围的行不会推进剩余行的最大修改时间，
+      只带 If-Modified-Since 的客户端会对已变化的列表得到 304，列表只依靠包含行数的 ETag；
+    - get_object_validators(obj)：基于已取出的对象字段。
+    ETag 同时包含请求路径（分页、过滤、字段裁剪参数）和当前用户，因为可见范围因人而异。
+    """
+
+    def get_list_validators(self, queryset):
+        raise NotImplementedError
+
+    def get_object_validators(self, obj):
+        raise NotImplementedError
+
+    def list(self, request, *args, **kwargs):
+        validators = self.get_list_validators(self.filter_queryset(self.get_queryset()))
+        return self.conditional_response(request, validators, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        return self.conditional_response(
+            request,
+            self.get_object_validators(instance),
+            lambda: Response(self.get_serializer(instance).data),
+        )
+
+    def conditional_response(self, request, validators, build_response):
+        values, last_modified = validators
+        user_key = request.user.pk if request.user.is_authenticated else 'anon'
+        digest = hashlib.sha1(repr([*values, request.get_full_path(), user_key]).encode('utf-8')).hexdigest()
+        etag = f'W/"{digest}"'
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = build_response()
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        patch_vary_headers(response, ['Authorization'])
+        return response
+
+
+class ArticleViewSet(ReadYourWritesMixin, SparseFieldsetMixin, ResponseCacheMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Article.objects.select_related('author', 'category').all()
+    # 匿名访问的列表与详情走响应缓存；评论数等计数字段随评论变化，因此也依赖评论的代数
+    cache_dependencies = ('article', 'category', 'comment')
     serializer_class = ArticleSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # 默认页码分页；无限滚动等场景可用 ?pagination=cursor 切换为游标分页
+    pagination_class = CursorOrPageNumberPagination
+    # 全文检索 (?search=) 使用预计算的检索文档，替代 SearchFilter 的 icontains 扫描
+    filter_backends = [DjangoFilterBackend, ArticleSearchFilter, filters.OrderingFilter]
     # 从 filterset_fields 中移除 'category'，因为我们将自定义处理它
     filterset_fields = {
         'status': ['exact'],
         'author__username': ['exact', 'icontains'], # 示例：允许精确和包含查询
         # 'category': ['exact'], # 我们将手动处理 category
     }
-    search_fields = ['title', 'content', 'excerpt']
-    ordering_fields = ['created_at', 'updated_at', 'title']
+    ordering_fields = ['created_at', 'updated_at', 'title', 'comment_count', 'last_commented_at']
+    detail_actions = (
+        'retrieve', 'update', 'partial_update', 'destroy', 'revision_list', 'revision', 'compare_revisions', 'autosave',
+    )
 
     def _get_category_with_descendants(self, category_id):
         """
-        辅助函数，获取给定分类ID及其所有子孙分类的ID列表。
+        辅助函数，返回给定分类ID及其所有子孙分类ID的子查询。
+        基于闭包表，只需一次索引查询，不再逐层遍历。
         """
-        try:
-            category = Category.objects.get(pk=category_id)
-        except Category.DoesNotExist:
-            return []
+        return CategoryClosure.objects.descendant_ids(category_id)
 
-        descendant_ids = [category.id]
-        
-        # 简单递归获取子孙 (对于非常深的层级或大量数据，可能需要优化)
-        # 或者使用 django-mptt 等库
-        children = category.children.all()
-        queue = list(children)
-        
-        while queue:
-            child = queue.pop(0)
-            descendant_ids.append(child.id)
-            queue.extend(list(child.children.all()))
-            
-        return list(set(descendant_ids)) # 使用 set 去重（理论上不应该有重复）
 
+    def get_object(self):
+        return self.prepare_object(super().get_object())
+
+    def prepare_object(self, article):
+        # 把查询时标注的子分类数量交给分类序列化器，避免再查一次 children.count()
+        if article.category is not None and hasattr(article, 'category_children_count'):
+            article.category.children_count = article.category_children_count
+        return article
+
+    def get_serializer_class(self):
+        # 列表使用不含 content 的轻量表示，详情保持完整内容
+        if self.action == 'list':
+            return ArticleListSerializer
+        return super().get_serializer_class()
 
     def get_queryset(self):
         queryset = super().get_queryset() # 获取基础 queryset
         user = self.request.user
         
         # 针对单篇文章的操作（详情、编辑、删除等）
-        if self.action in ['retrieve', 'update', 'partial_update', 'destroy']:
+        if self.action in self.detail_actions:
+            # 一次查询取齐详情需要的数据：作者、分类及其父分类 JOIN，分类的子分类数量用子查询标注
+            queryset = queryset.select_related('category__parent').annotate(
+                category_children_count=Coalesce(
+                    Subquery(
+                        Category.objects.filter(parent_id=OuterRef('category_id')).order_by()
+                        .values('parent_id').annotate(total=Count('id')).values('total')
+                    ),
+                    0,
+                )
+            )
+            if self.action == 'autosave':
+                queryset = queryset.defer('content') # 草稿正文由 articles.autosave 读取
             article_id = self.kwargs.get('pk')
             if user.is_authenticated and article_id:
                 # 允许用户访问：已发布的文章 或 自己的草稿
-                from django.db.models import Q
-                return Article.objects.filter(
-                    Q(id=article_id) & (Q(status='published') | Q(status='draft', author=user))
+                return queryset.filter(
+                    Q(id=article_id) & (Q(status='published') | Q(status='draft', author_id=user.id))
                 )
         
         # 处理列表请求
+        # 列表不返回完整内容，只在数据库端截取预览 (content 列由 SparseFieldsetMixin defer)
+        if self.action == 'list':
+            queryset = queryset.annotate(content_preview=Left('content', CONTENT_PREVIEW_LENGTH))
         status_filter = self.request.query_params.get('status')
         
         # 对草稿的处理：无论是否管理员，都只能看到自己的草稿
@@ -136,38 +384,255 @@ class ArticleViewSet(viewsets.ModelViewSet):
         category_id_param = self.request.query_params.get('category')
         if category_id_param:
             try:
-                category_ids_to_filter = self._get_category_with_descendants(int(category_id_param))
-                if category_ids_to_filter:
-                    queryset = queryset.filter(category__id__in=category_ids_to_filter)
-                else:
-                    queryset = queryset.none()
+                # 分类不存在时子查询为空，结果自然为空
+                queryset = queryset.filter(
+                    category_id__in=self._get_category_with_descendants(int(category_id_param))
+                )
             except ValueError:
                 pass
 
         return queryset
 
+    def get_list_validators(self, queryset):
+        # 一次聚合：行数变化（增删）、任一文章更新、评论增删都会改变结果
+        stats = queryset.order_by().aggregate(
+            total=Count('id'),
+            latest=Max('updated_at'),
+            activity=Max('last_commented_at'),
+            comments=Sum('comment_count'),
+        )
+        # 分类名称显示在列表中，分类树版本变化时也要失效
+        return [stats['total'], stats['latest'], stats['activity'], stats['comments'], category_tree.get_version()], None
+
+    def get_object_validators(self, obj):
+        last_modified = max(filter(None, [obj.updated_at, obj.last_commented_at]))
+        return [obj.pk, obj.updated_at, obj.comment_count, obj.last_commented_at, category_tree.get_version()], last_modified
+
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        with transaction.atomic():
+            article = serializer.save(author=self.request.user)
+            revisions.record(article, author=self.request.user)
 
     def perform_update(self, serializer):
-        serializer.save()
+        try:
+            # 普通保存优先于尚未写入的自动保存
+            with autosave.buffer.replacing(serializer.instance.pk), transaction.atomic():
+                # 锁住文章行：并发保存时按顺序取得保存前的状态与版本号
+                previous = (
+                    Article.objects.select_for_update().only('title', 'excerpt', 'content').get(pk=serializer.instance.pk)
+                )
+                article = serializer.save()
+                revisions.record(article, previous=previous, author=self.request.user)
+        except autosave.Busy:
+            raise AutosaveBusy()
+
+    def get_authored_article(self, message):
+        """历史版本与自动保存的草稿只对作者和管理员开放"""
+        article = self.get_object()
+        user = self.request.user
+        if article.author_id != user.id and not user.is_staff:
+            self.permission_denied(self.request, message=message)
+        return article
+
+    def get_revisions_article(self):
+        return self.get_authored_article('只有作者可以查看文章的历史版本。')
+
+    @action(detail=True, methods=['get', 'post'])
+    def autosave(self, request, pk=None):
+        """
+        增量自动保存。GET 返回当前草稿（含尚未写入数据库的修改）与版本号；
+        POST {"version", "patch" | "content", "title", "excerpt", "flush"} 应用补丁，
+        返回新的版本号与是否已写入数据库，版本不一致时返回 409 与当前版本号
+        """
+        article = self.get_authored_article('只有作者可以编辑文章。')
+        try:
+            if request.method == 'GET':
+                return Response(autosave.buffer.get(article.pk))
+            serializer = ArticleAutosaveSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            version, saved = autosave.buffer.save(article.pk, request.user, **serializer.validated_data)
+        except autosave.Conflict as e:
+            return Response({'detail': str(e), 'version': e.version}, status=status.HTTP_409_CONFLICT)
+        except autosave.InvalidPatch as e:
+            raise exceptions.ValidationError({'patch': [str(e)]})
+        except autosave.Busy:
+            raise AutosaveBusy()
+        return Response({'version': version, 'saved': saved})
+
+    @action(detail=True, methods=['get'], url_path='revisions')
+    def revision_list(self, request, pk=None):
+        """历史版本列表（新版本在前），不含正文"""
+        article = self.get_revisions_article()
+        queryset = (
+            ArticleRevision.objects.filter(article_id=article.pk)
+            .select_related('author').defer('content', 'delta').order_by('-number')
+        )
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(ArticleRevisionSerializer(page, many=True).data)
 
-class CommentViewSet(viewsets.ModelViewSet):
-    queryset = Comment.objects.select_related('author', 'article').all()
+    @action(detail=True, methods=['get'], url_path=r'revisions/(?P<number>\d+)')
+    def revision(self, request, pk=None, number=None):
+        """某个历史版本的完整内容"""
+        article = self.get_revisions_article()
+        try:
+            revision = revisions.get_revision(article.pk, int(number))
+        except ArticleRevision.DoesNotExist:
+            raise exceptions.NotFound('该版本不存在。')
+        return Response(ArticleRevisionDetailSerializer(revision).data)
+
+    @action(detail=True, methods=['get'], url_path='revisions/compare')
+    def compare_revisions(self, request, pk=None):
+        """
+        比较两个版本：?from=<版本号>&to=<版本号>，to 默认为最新版本。
+        返回两个版本的信息与正文的 unified diff
+        """
+        article = self.get_revisions_article()
+        try:
+            from_number = int(request.query_params['from'])
+            to_number = request.query_params.get('to')
+            if to_number is None:
+                to_number = ArticleRevision.objects.filter(article_id=article.pk).order_by('-number').values_list(
+                    'number', flat=True
+                ).first() or 0
+            to_number = int(to_number)
+        except (KeyError, ValueError):
+            raise exceptions.ParseError('请提供整数版本号 from（以及可选的 to）。')
+        try:
+            old, new, changes = revisions.compare(article.pk, from_number, to_number)
+        except ArticleRevision.DoesNotExist:
+            raise exceptions.NotFound('该版本不存在。')
+        return Response({
+            'from': ArticleRevisionSerializer(old).data,
+            'to': ArticleRevisionSerializer(new).data,
+            **changes,
+        })
+
+class CommentFilter(django_filters.FilterSet):
+    # 按外键列直接过滤；ModelChoiceFilter 会为校验参数先查询一次整篇文章
+    article = django_filters.NumberFilter(field_name='article_id')
+
+    class Meta:
+        model = Comment
+        fields = ['article']
+
+
+class CommentViewSet(ReadYourWritesMixin, SparseFieldsetMixin, ConditionalGetMixin, viewsets.ModelViewSet):
+    # 序列化时只需要 article_id，不再连接查询整篇文章（含 content）
+    queryset = Comment.objects.select_related('author').all()
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
+    pagination_class = CursorOrPageNumberPagination
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = ['article'] # 按文章ID过滤评论
+    filterset_class = CommentFilter # 按文章ID过滤评论
+    replies_per_thread = 20 # threads 接口中每个楼层默认附带的回复数
+
+    def get_list_validators(self, queryset):
+        stats = queryset.order_by().aggregate(total=Count('id'), latest=Max('updated_at'))
+        return [stats['total'], stats['latest']], None
+
+    def get_object_validators(self, obj):
+        return [obj.pk, obj.updated_at], obj.updated_at
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        # 评论与文章的冗余计数在同一事务中更新，F() 表达式保证并发安全
+        with transaction.atomic():
+            comment = serializer.save(author=self.request.user)
+            created = Value(comment.created_at)
+            Article.objects.filter(pk=comment.article_id).update(
+                comment_count=F('comment_count') + 1,
+                # 并发评论的 UPDATE 提交顺序可能与创建时间相反，只允许向后推进；
+                # SQLite 的 MAX() 遇到 NULL 返回 NULL，先用 Coalesce 补上
+                last_commented_at=Greatest(Coalesce(F('last_commented_at'), created), created),
+            )
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            article_id = instance.article_id
+            # 删除评论时其下所有回复一并删除（按路径前缀一次选出整棵子树）
+            _, deleted = instance.subtree().delete()
+            removed = deleted.get(Comment._meta.label, 0)
+            latest = Comment.objects.filter(article_id=OuterRef('pk')).order_by('-created_at').values('created_at')[:1]
+            Article.objects.filter(pk=article_id).update(
+                comment_count=Greatest(F('comment_count') - removed, 0),
+                last_commented_at=Subquery(latest),
+            )
 
+    def _get_replies_limit(self):
+        try:
+            limit = int(self.request.query_params.get('replies_limit', self.replies_per_thread))
+        except ValueError:
+            limit = self.replies_per_thread
+        return max(0, min(limit, MAX_PAGE_SIZE))
+
+    @action(detail=False, methods=['get'])
+    def threads(self, request):
+        """
+        楼层式评论列表：分页的是顶层评论，每个楼层附带前 replies_limit 条回复（按路径顺序）。
+        当前页所有楼层的回复由一次查询取出（窗口函数限制每楼层条数并统计总数），
+        再按路径顺序一次遍历组装成树。其余回复通过 /comments/<id>/replies/ 继续分页加载。
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional_response(
+            request, self.get_list_validators(queryset), lambda: self._threads_response(queryset)
+        )
+
+    def _threads_response(self, queryset):
+        roots = self.paginate_queryset(queryset.filter(depth=0))
+        limit = self._get_replies_limit()
+        replies = []
+        if roots and limit:
+            replies = list(
+                self.get_queryset()
+                .filter(thread_id__in=[root.pk for root in roots], depth__gt=0)
+                .annotate(
+                    position=Window(RowNumber(), partition_by=[F('thread_id')], order_by=F('path').asc()),
+                    thread_reply_count=Window(Count('id'), partition_by=[F('thread_id')]),
+                )
+                .filter(position__lte=limit)
+                .order_by('thread_id', 'path')
+            )
+
+        comments = list(roots) + replies
+        nodes = {}
+        threads = []
+        for comment, data in zip(comments, self.get_serializer(comments, many=True).data):
+            data['replies'] = []
+            nodes[comment.pk] = data
+            if comment.depth == 0:
+                data['reply_count'] = 0
+                data['has_more_replies'] = False
+                threads.append(data)
+            else:
+                # 按路径排序时父评论一定先于子评论出现
+                nodes[comment.parent_comment_id]['replies'].append(data)
+                root = nodes[comment.thread_id]
+                root['reply_count'] = comment.thread_reply_count
+                root['has_more_replies'] = comment.position < comment.thread_reply_count
+        return self.get_paginated_response(threads)
 
-class CategoryViewSet(viewsets.ModelViewSet):
-    queryset = Category.objects.all()
+    @action(detail=True, methods=['get'])
+    def replies(self, request, pk=None):
+        """某条评论下的全部回复，按楼层内的路径顺序分页（扁平列表，含 parent_comment 与 depth）"""
+        comment = self.get_object()
+        queryset = self.apply_projection(
+            comment.subtree().exclude(pk=comment.pk).select_related('author').order_by('path')
+        )
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+
+class CategoryViewSet(ResponseCacheMixin, viewsets.ModelViewSet):
+    # 预先关联父分类并聚合子分类数量，列表序列化时不再逐行查询
+    queryset = Category.objects.select_related('parent').annotate(children_count=Count('children')).order_by('name')
     serializer_class = CategorySerializer
     # 管理员可增删改查，普通用户只读
     permission_classes = [IsAdminOrReadOnly]
+    cache_dependencies = ('category',)
+
+    @action(detail=False, methods=['get'])
+    def tree(self, request):
+        """完整的嵌套分类树：一次查询构建，进程内缓存，分类变更时失效"""
+        return Response(get_category_tree())
 
     # 如果需要支持三级分类的创建，例如前端传递 parent_id
     # CategorySerializer 已经配置了 parent_id 为 write_only
\ No newline at end of file
@@ -0,0 +1,255 @@
+# backend_project/db_routing.py
+"""
+只读副本路由。
+
+DATABASE_ROUTING['REPLICAS'] 配置副本别名及权重（别名须在 DATABASES 中定义），为空时所有查询都走 default。
+- 只有安全方法 (GET/HEAD/OPTIONS) 请求中的读查询才会发往副本，写请求、事务内的读、
+  管理命令与后台线程始终使用主库；
+- 每个请求按权重随机选一个副本，同一请求内的读都使用它；
+- 选中副本时确认连接可用，PostgreSQL 副本每隔 HEALTH_CHECK_INTERVAL 秒检查一次复制延迟，
+  连接失败或延迟超过 MAX_LAG 秒的副本被摘除 EJECT_SECONDS 秒，期间改用其余副本或主库；
+- 读己之写：用户通过文章、评论接口写入后 STICKY_SECONDS 秒内，该用户的读请求都走主库。
+  标记保存在 CACHE 指定的缓存中，多进程部署时应使用共享缓存；
+- 匿名响应仍从副本读取，但某个模型的数据变化后 STICKY_SECONDS 秒内，依赖它的响应从副本读出时不写入
+  响应缓存，避免把副本上的旧数据缓存到新的代数下（按模型的代数分别记录，见 note_write）。
+STICKY_SECONDS 应大于 MAX_LAG，副本延迟超过 MAX_LAG 时已被摘除。
+
+副本由数据库自身的复制维护，不执行迁移。本地可以用 SQLite 文件模拟副本，见 settings.DATABASES 中的说明。
+"""
+import contextvars
+import logging
+import random
+import threading
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import SynchronousOnlyOperation
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'REPLICAS': {},
+    'STICKY_SECONDS': 10,
+    'EJECT_SECONDS': 30,
+    'HEALTH_CHECK_INTERVAL': 5,
+    'MAX_LAG': 5,
+    'CACHE': 'default',
+}
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# 副本上执行：不在恢复模式（即主库）时返回 NULL；已回放完收到的 WAL 时延迟为 0，避免主库空闲时误判
+POSTGRESQL_LAG_SQL = '''
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+'''
+
+
+def get_settings():
+    return {**DEFAULTS, **getattr(settings, 'DATABASE_ROUTING', {})}
+
+
+class RoutingState:
+    """一个请求的路由状态，由中间件放入 contextvar（异步 ORM 的线程中同样可见）"""
+    __slots__ = ('use_replicas', 'alias')
+
+    def __init__(self, use_replicas):
+        self.use_replicas = use_replicas
+        self.alias = None
+
+
+_state = contextvars.ContextVar('db_routing_state', default=None)
+
+
+class ReplicaSet:
+    """进程内的副本健康状态"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ejected = {}    # 别名 -> 摘除截止时间 (monotonic)
+        self._next_check = {} # 别名 -> 下次检查复制延迟的时间
+        self.reads = {}       # 别名 -> 被选中的请求数
+        self.ejections = 0
+
+    def choose(self):
+        """按权重选一个可用副本，都不可用时返回 None"""
+        options = get_settings()
+        now = time.monotonic()
+        candidates = {
+            alias: weight for alias, weight in options['REPLICAS'].items()
+            if weight > 0 and self._ejected.get(alias, 0) <= now
+        }
+        while candidates:
+            alias = random.choices(list(candidates), weights=list(candidates.values()))[0]
+            if self.probe(alias, options):
+                with self._lock:
+                    self.reads[alias] = self.reads.get(alias, 0) + 1
+                return alias
+            del candidates[alias]
+        return None
+
+    def probe(self, alias, options):
+        connection = connections[alias]
+        try:
+            connection.ensure_connection() # 已连接时不做任何事
+            if options['MAX_LAG'] is not None and time.monotonic() >= self._next_check.get(alias, 0):
+                self._next_check[alias] = time.monotonic() + options['HEALTH_CHECK_INTERVAL']
+                lag = replication_lag(connection)
+                if lag is not None and lag > options['MAX_LAG']:
+                    self.eject(alias, f'replication lag {lag:.1f}s', options)
+                    return False
+        except SynchronousOnlyOperation:
+            return True # 在事件循环线程中确定路由（异步 ORM 查询前），不做检查，由查询本身报错
+        except DatabaseError as e:
+            self.eject(alias, e, options)
+            return False
+        return True
+
+    def eject(self, alias, reason, options=None):
+        options = options or get_settings()
+        with self._lock:
+            self._ejected[alias] = time.monotonic() + options['EJECT_SECONDS']
+            self.ejections += 1
+        logger.warning('只读副本 %s 被摘除 %s 秒：%s', alias, options['EJECT_SECONDS'], reason)
+
+    def as_dict(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                'replicas': {
+                    alias: {
+                        'weight': weight,
+                        'healthy': self._ejected.get(alias, 0) <= now,
+                        'reads': self.reads.get(alias, 0),
+                    }
+                    for alias, weight in get_settings()['REPLICAS'].items()
+                },
+                'ejections': self.ejections,
+            }
+
+    def reset(self):
+        with self._lock:
+            self._ejected.clear()
+            self._next_check.clear()
+            self.reads.clear()
+            self.ejections = 0
+
+
+replica_set = ReplicaSet()
+
+
+def replication_lag(connection):
+    """副本落后主库的秒数，无法判断（非 PostgreSQL 或实际连到了主库）时返回 None"""
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(POSTGRESQL_LAG_SQL)
+        lag = cursor.fetchone()[0]
+    return float(lag) if lag is not None else None
+
+
+RECENT_WRITE_KEY = 'db_routing:recent_write:{}'
+
+
+def _pin_key(user_id):
+    return f'db_routing:pinned:{user_id}'
+
+
+def pin_to_primary(user):
+    """用户刚写入数据，之后 STICKY_SECONDS 秒内的读请求走主库"""
+    options = get_settings()
+    if not options['REPLICAS'] or not user.is_authenticated or not options['STICKY_SECONDS']:
+        return
+    caches[options['CACHE']].set(_pin_key(user.pk), True, timeout=options['STICKY_SECONDS'])
+
+
+def note_write(name):
+    """name 对应的数据有写入（由 articles.response_cache 在递增该代数时调用）"""
+    options = get_settings()
+    if options['REPLICAS'] and options['STICKY_SECONDS']:
+        caches[options['CACHE']].set(RECENT_WRITE_KEY.format(name), True, timeout=options['STICKY_SECONDS'])
+
+
+def written_recently(names):
+    """names 中任一数据在最近 STICKY_SECONDS 秒内有写入"""
+    options = get_settings()
+    if not options['REPLICAS'] or not names:
+        return False
+    return bool(caches[options['CACHE']].get_many([RECENT_WRITE_KEY.format(name) for name in names]))
+
+
+def read_from_replica():
+    """本请求的读查询是否发往了副本"""
+    state = _state.get()
+    return state is not None and state.alias not in (None, DEFAULT_DB_ALIAS)
+
+
+def identify(user):
+    """认证得到用户后调用：仍在读己之写窗口内的用户，本请求剩余的读都走主库"""
+    state = _state.get()
+    if state is None or not state.use_replicas or not user.is_authenticated:
+        return
+    if caches[get_settings()['CACHE']].get(_pin_key(user.pk)):
+        state.use_replicas = False
+
+
+class ReplicaRoutingMiddleware:
+    """为安全方法请求开启副本路由；同时支持同步与异步调用"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def make_state(request):
+        return RoutingState(use_replicas=bool(get_settings()['REPLICAS']) and request.method in SAFE_METHODS)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = _state.set(self.make_state(request))
+        try:
+            return self.get_response(request)
+        finally:
+            _state.reset(token)
+
+    async def __acall__(self, request):
+        token = _state.set(self.make_state(request))
+        try:
+            return await self.get_response(request)
+        finally:
+            _state.reset(token)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.use_replicas:
+            return None
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db # 关联对象跟随已加载对象所在的库
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None # 事务内的读要看到事务中的写
+        if state.alias is None:
+            state.alias = replica_set.choose() or DEFAULT_DB_ALIAS
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True # 副本与主库数据相同
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in get_settings()['REPLICAS']
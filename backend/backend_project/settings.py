@@ -51,6 +51,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'articles.instrumentation.ServerTimingMiddleware', # 请求耗时统计，放在最前面
+    'backend_project.db_routing.ReplicaRoutingMiddleware', # 安全方法请求的读查询可以发往只读副本
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware', # CORS 中间件，确保在 CommonMiddleware 之前
@@ -95,6 +97,26 @@ DATABASES = {
         'PORT': '5432',                 # PostgreSQL 默认端口
     }
 }
+# 只读副本：在 DATABASES 中加入副本连接，并在 DATABASE_ROUTING['REPLICAS'] 中配置权重。
+# replica1 默认使用主库的连接参数，REPLICAS 为空时不会有查询发往它；测试时它是 default 的镜像，
+# 供多库路由测试 (articles.tests) 使用。部署副本时改为副本的地址，例如 'HOST': 'replica1.internal'
+DATABASES['replica1'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+# 本地可以用 SQLite 文件模拟主库与副本（副本文件从主库复制而来）：
+# DATABASES = {
+#     'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / 'db.sqlite3'},
+#     'replica1': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / 'replica1.sqlite3', 'TEST': {'MIRROR': 'default'}},
+# }
+DATABASE_ROUTERS = ['backend_project.db_routing.ReplicaRouter']
+
+# 只读副本路由 (backend_project.db_routing)
+DATABASE_ROUTING = {
+    'REPLICAS': {},            # 副本别名 -> 权重，例如 {'replica1': 2, 'replica2': 1}；为空时只用主库
+    'STICKY_SECONDS': 10,      # 用户写入文章/评论后，其读请求走主库的时间
+    'EJECT_SECONDS': 30,       # 连接失败或延迟过大的副本被摘除的时间
+    'HEALTH_CHECK_INTERVAL': 5, # 检查副本复制延迟的间隔（秒，仅 PostgreSQL）
+    'MAX_LAG': 5,              # 允许的最大复制延迟（秒），None 表示不检查
+    'CACHE': 'default',        # 保存读己之写标记的缓存，多进程部署时应为共享缓存
+}
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -116,6 +138,41 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# 文章封面的校验与缩略图变体 (articles.images)
+COVER_IMAGES = {
+    'WIDTHS': (320, 640, 1280),     # 变体宽度，超过原图宽度的按原图宽度生成
+    'FORMATS': ('webp', 'jpeg'),
+    'QUALITY': 80,
+    'MAX_UPLOAD_SIZE': 10 * 1024 * 1024,
+    'MAX_PIXELS': 40_000_000,
+    'WORKERS': 2,                   # 后台生成变体的线程数；0 表示提交事务后同步生成
+}
+
+# 封面图片下载 (articles.media)
+MEDIA_DELIVERY = {
+    # 'django': FileResponse（gunicorn 等支持 wsgi.file_wrapper 时使用 sendfile）
+    # 'x-accel-redirect': 交给 nginx，需要配置 internal location，例如：
+    #     location /protected-media/ { internal; alias /path/to/backend/media/; }
+    # 'x-sendfile': 交给 Apache mod_xsendfile
+    'BACKEND': 'django',
+    'X_ACCEL_PREFIX': '/protected-media/',
+    'MAX_AGE': 365 * 24 * 3600,     # 按内容寻址的文件 (immutable)
+    'MUTABLE_MAX_AGE': 3600,        # 旧的非内容寻址文件
+}
+
+# 文章历史版本 (articles.revisions)
+ARTICLE_REVISIONS = {
+    'SNAPSHOT_INTERVAL': 10, # 每隔多少个版本保存一次完整正文，其余只保存差异
+    'PRUNE_KEEP': 50,        # prune_revisions 保留每篇文章最新的版本数
+    'PRUNE_AFTER_DAYS': 90,  # 早于该天数的其余版本按天合并
+}
+
+# 编辑器增量自动保存 (articles.autosave)：连续的自动保存在缓存中合并后再写入数据库
+ARTICLE_AUTOSAVE = {
+    'CACHE': 'default',      # 多进程部署时必须是共享缓存 (check --deploy: articles.E002)
+    'FLUSH_INTERVAL': 10,    # 秒；未写入的修改最多缓冲这么久，0 表示每次都写入
+}
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -127,7 +184,7 @@ AUTH_USER_MODEL = 'accounts.User'
 # Django REST framework 配置
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication', # 使用 JWT
+        'accounts.authentication.CachedJWTAuthentication', # 使用 JWT（带进程内用户缓存，并检查冻结状态）
         # 'rest_framework.authentication.TokenAuthentication', # 如果使用 DRF Token
     ),
     'DEFAULT_PERMISSION_CLASSES': [
@@ -144,7 +201,7 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),    # Refresh Token 有效期
     'ROTATE_REFRESH_TOKENS': False,
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True, # 登录时更新 last_login 字段
+    'UPDATE_LAST_LOGIN': False, # last_login 由 accounts.login_activity 批量写入，见 LOGIN_ACTIVITY
 
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY, # 使用项目的 SECRET_KEY
@@ -171,6 +228,101 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# JWT 认证的进程内用户缓存 (accounts.authentication)
+JWT_USER_CACHE = {
+    'TTL': 30,            # 秒；用户保存后本进程立即失效，其他进程最长延迟 TTL
+    'MAX_ENTRIES': 10000,
+}
+
+# JWT 撤销列表 (accounts.revocation)
+TOKEN_REVOCATION = {
+    'SYNC_INTERVAL': 5,   # 秒；其他进程的撤销（退出登录、冻结）最长延迟这么久生效
+    'SYNC_MARGIN': 60,    # 增量同步时回看的秒数，覆盖较晚提交的事务
+    'GC_INTERVAL': 3600,  # 清理数据库中已过期撤销记录的间隔
+}
+
+# 登录时间 (last_login) 批量写入 (accounts.login_activity)
+LOGIN_ACTIVITY = {
+    'FLUSH_INTERVAL': 10, # 秒；0 表示在登录请求中直接写入
+    'MAX_PENDING': 1000,  # 待写入用户数达到该值时提前写入
+    'BATCH_SIZE': 500,
+}
+
+
+# AI 摘要服务配置 (articles.summary)
+SUMMARY_SERVICE = {
+    # 离线开发/测试可改为 'articles.summary.backends.LocalStubBackend'
+    'BACKEND': 'articles.summary.backends.ZhipuAIBackend',
+    'OPTIONS': {
+        'api_key': os.environ.get('ZHIPUAI_API_KEY', ''), # 不要把密钥写进代码
+        'model': 'glm-z1-flash',
+        'max_tokens': 1000,
+        'temperature': 0.2,
+        'timeout': 60, # 单次模型调用超时（秒）
+    },
+    'WORKERS': 4,        # 同时调用模型的最大任务数
+    'QUEUE_SIZE': 32,    # 排队任务上限，超出时返回 429
+    'MAX_RETRIES': 2,    # 临时错误的重试次数
+    'RETRY_BACKOFF': 1.0, # 重试退避基数（秒），指数增长
+    'JOB_TTL': 3600,     # 任务结果保留时间（秒）
+    # 摘要缓存：按规范化内容哈希 + 模型参数缓存，LRU + TTL 淘汰
+    'CACHE_MAX_ENTRIES': 1024,
+    'CACHE_TTL': 86400,
+    # 长文分块：超过阈值的内容按块并行摘要后再合并（单位：字符）
+    'CHUNK_THRESHOLD': 8000,
+    'CHUNK_SIZE': 4000,
+    'CHUNK_WORKERS': 4,
+}
+
+
+# 缓存：default 用于分类树版本号、摘要任务状态等；responses 用于匿名只读响应缓存
+# 多进程部署时 default 与 responses 都必须改为共享存储（manage.py check --deploy 会检查），例如：
+#   'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/var/tmp/textmanager_cache'
+#   'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://127.0.0.1:6379/1'
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'responses',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+
+# 请求耗时统计 (articles.instrumentation)：Server-Timing 响应头 + articles.timing 日志
+# 每个被统计请求的 JSON 日志是 INFO 级别，默认不输出（慢查询为 WARNING，照常输出）。
+# 排查性能时设置环境变量 REQUEST_TIMING_LOG_LEVEL=INFO；需要更多样本时（如 benchmark_api --url 统计 SQL 数量）
+# 调高 REQUEST_TIMING_SAMPLE_RATE。Server-Timing 头默认只发给 DEBUG 下的请求和管理员，
+# 对运行中的非 DEBUG 服务压测时设置 REQUEST_TIMING_EXPOSE_HEADER=1
+REQUEST_TIMING = {
+    'ENABLED': True,
+    'SAMPLE_RATE': float(os.environ.get('REQUEST_TIMING_SAMPLE_RATE', '0.05')), # 被统计的请求比例
+    'SLOW_QUERY_MS': 100,                  # 超过该耗时的 SQL 记录到慢查询日志
+    'EXPOSE_HEADER': os.environ.get('REQUEST_TIMING_EXPOSE_HEADER') == '1', # 对所有客户端发送 Server-Timing
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'articles.timing': {
+            'handlers': ['console'],
+            'level': os.environ.get('REQUEST_TIMING_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
+# 匿名只读响应缓存 (articles.response_cache)
+RESPONSE_CACHE = {
+    'CACHE': 'responses', # 多进程部署时必须是共享缓存 (check --deploy: articles.E003)
+    'TIMEOUT': 300, # 秒；数据变更通过代数失效，TTL 只用于回收旧条目
+    'ENABLED': True,
+}
 
 # CORS 配置
 CORS_ALLOWED_ORIGINS = [
@@ -180,6 +332,7 @@ CORS_ALLOWED_ORIGINS = [
 ]
 # CORS_ALLOW_ALL_ORIGINS = True # 开发时可以设为True，但不推荐用于生产
 CORS_ALLOW_CREDENTIALS = True # 如果前端需要发送 cookies
+CORS_EXPOSE_HEADERS = ['Retry-After'] # 前端按它的间隔轮询摘要任务
 # 如果需要允许特定的请求头或方法
 # CORS_ALLOW_HEADERS = list(default_headers) + ['my-custom-header']
 # CORS_ALLOW_METHODS = list(default_methods) + ['PATCH']
@@ -5,7 +5,8 @@ from django.conf import settings
 from django.conf.urls.static import static
 # from rest_framework_simplejwt.views import TokenObtainPairView # 不再直接从这里导入用于登录
 from accounts.views import CustomTokenObtainPairView # <<<--- 导入你的自定义视图
-from rest_framework_simplejwt.views import TokenRefreshView, TokenVerifyView
+from accounts.views import CustomTokenRefreshView, CustomTokenVerifyView # 检查令牌是否已撤销
+from articles.media import serve_cover
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -14,9 +15,12 @@ urlpatterns = [
 
     # JWT 认证路由 - 使用自定义的视图
     path('api/token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'), # <<<--- 使用自定义视图
-    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
-    path('api/token/verify/', TokenVerifyView.as_view(), name='token_verify'),
+    path('api/token/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/verify/', CustomTokenVerifyView.as_view(), name='token_verify'),
 
+    # 封面图片：支持 Range、长期缓存，可交给前端代理发送 (MEDIA_DELIVERY)；
+    # 放在 static() 之前，DEBUG 下也走这个视图
+    path(f'{settings.MEDIA_URL.lstrip("/")}article_covers/<path:path>', serve_cover, name='cover-media'),
 ]
 
 if settings.DEBUG: